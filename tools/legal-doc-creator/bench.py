@@ -0,0 +1,467 @@
+"""Benchmark suite with regression gates for the Contoso documentation generator.
+
+Measures docs/sec for Markdown generation and Markdown to Word conversion at
+fixed document counts, stores results as a JSON baseline and fails when a
+phase regresses past a threshold:
+
+	python bench.py run --save baseline.json
+	python bench.py compare baseline.json --threshold 0.15
+
+The template subcommand compares a fresh python-docx Document per file
+with the cached base template main.convert_markdown_file uses:
+
+	python bench.py template --documents 1000
+
+The tokenizer subcommand times the Markdown tokenizer against the previous
+line-by-line parser on a large input, and a whole conversion against the
+previous parser and python-docx writer. It fails if either is slower per line
+by more than the threshold:
+
+	python bench.py tokenizer --size-mb 10 --convert-mb 1
+
+The startup subcommand fails when the generate-only cold start, measured with
+python -X importtime, goes over a budget:
+
+	python bench.py startup --budget-ms 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import collections
+import dataclasses
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import main
+
+
+SUITE_SIZES = [10, 100, 1000]
+DEFAULT_THRESHOLD = 0.15
+MIN_MEASURE_SECONDS = 0.2
+STARTUP_BUDGET_MS = 100
+STARTUP_FORBIDDEN = ("docx", "lxml")
+# Expanded over the built-in templates, this gives 1,200 documents with distinct text
+SUITE_MATRIX = {
+	"site": [
+		{"plant": plant, "country": country}
+		for plant, country in (
+			("Berlin", "Germany"),
+			("Austin", "United States"),
+			("Lyon", "France"),
+			("Osaka", "Japan"),
+			("Pune", "India"),
+			("Monterrey", "Mexico"),
+			("Gdansk", "Poland"),
+			("Campinas", "Brazil"),
+			("Leeds", "United Kingdom"),
+			("Penang", "Malaysia"),
+		)
+	],
+	"language": ["en", "de", "fr", "es", "ja"],
+	"unit": ["Manufacturing", "Logistics", "Research"],
+}
+SUITE_SECTION = (
+	"Local Requirements",
+	"- Applies to the {unit} unit at the {plant} plant ({country})\n"
+	"- The {language} version is the binding text for {plant} staff\n"
+	"- Report deviations to the {country} compliance officer",
+)
+# Tables and numbered lists, which the generated documents do not contain yet
+TOKENIZER_SAMPLE = """## Retention Schedule
+
+1. Classify the record at creation
+2. Apply the **retention period** below
+3. Dispose of expired records with `DISPOSE` approval
+
+| Record | Retention | Owner |
+|---|---|---|
+| Contracts | 7 years | **Legal** |
+| Invoices | 10 years | Finance |
+| Audit logs | 2 years | `IT-SEC` |
+"""
+
+
+def fixed_templates(size: int) -> list[main.DocumentTemplate]:
+	"""Return size distinct documents: the built-in templates, made site-specific and expanded over SUITE_MATRIX."""
+	templates = [
+		dataclasses.replace(
+			template,
+			title=f"{template.title} ({{plant}})",
+			body_sections=[*template.body_sections, SUITE_SECTION],
+		)
+		for template in main.build_templates()
+	]
+	variants = list(main.iter_document_variants(templates, SUITE_MATRIX, size))
+	if len(variants) < size:
+		raise SystemExit(f"The suite matrix only gives {len(variants)} distinct documents")
+	return variants
+
+
+def best_rate(func: Callable, items: list, repeat: int) -> float:
+	"""Return the best items/sec over repeat runs, each lasting at least MIN_MEASURE_SECONDS."""
+	best = 0.0
+	for _ in range(repeat):
+		processed = 0
+		start = time.perf_counter()
+		while True:
+			for item in items:
+				func(item)
+			processed += len(items)
+			elapsed = time.perf_counter() - start
+			if elapsed >= MIN_MEASURE_SECONDS:
+				break
+		best = max(best, processed / elapsed)
+	return best
+
+
+def run_suite(sizes: list[int], repeat: int) -> dict:
+	results: dict[str, dict[str, float]] = {"generation": {}, "markdown_docx": {}}
+	with tempfile.TemporaryDirectory() as temp_dir:
+		work_dir = Path(temp_dir)
+		for size in sizes:
+			templates = fixed_templates(size)
+			markdown_dir = work_dir / f"markdown-{size}"
+			main.write_markdown_files(markdown_dir, templates)
+			md_inputs = sorted(markdown_dir.glob("*.md"))
+			docx_path = work_dir / "out.docx"
+
+			results["generation"][str(size)] = best_rate(main.render_markdown, templates, repeat)
+			results["markdown_docx"][str(size)] = best_rate(
+				lambda md_path: main.convert_markdown_file(md_path, docx_path), md_inputs, repeat
+			)
+			print(f"  {size:>6} docs: " + ", ".join(
+				f"{phase} {results[phase][str(size)]:,.1f}/s" for phase in results
+			))
+	return results
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list[str]:
+	regressions = []
+	print(f"  {'phase':<16} {'size':>6} {'baseline':>12} {'current':>12} {'change':>8}")
+	for phase, by_size in baseline["results"].items():
+		for size, baseline_rate in by_size.items():
+			current_rate = current["results"].get(phase, {}).get(size)
+			if current_rate is None:
+				continue
+			change = current_rate / baseline_rate - 1
+			flag = "  REGRESSION" if change < -threshold else ""
+			print(f"  {phase:<16} {size:>6} {baseline_rate:12.1f} {current_rate:12.1f} {change:+8.1%}{flag}")
+			if flag:
+				regressions.append(f"{phase} @ {size} docs: {change:+.1%}")
+	return regressions
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+	"""Return cumulative microseconds per top-level import from -X importtime output."""
+	imports = {}
+	for line in stderr.splitlines():
+		if not line.startswith("import time:") or "cumulative" in line:
+			continue
+		_, cumulative, name = line[len("import time:"):].split("|")
+		if not name[1:].startswith(" "):
+			imports[name.strip()] = int(cumulative)
+	return imports
+
+
+def run_startup(budget_ms: float, repeat: int) -> None:
+	best_wall, imports = None, {}
+	with tempfile.TemporaryDirectory() as temp_dir:
+		command = [sys.executable, "-X", "importtime", str(Path(main.__file__).resolve()), "generate", "--output", temp_dir]
+		for _ in range(repeat):
+			start = time.perf_counter()
+			completed = subprocess.run(command, capture_output=True, text=True, check=True)
+			wall = time.perf_counter() - start
+			if best_wall is None or wall < best_wall:
+				best_wall, imports = wall, parse_importtime(completed.stderr)
+
+	import_ms = sum(imports.values()) / 1000
+	forbidden = sorted(name for name in imports if name.split(".")[0] in STARTUP_FORBIDDEN)
+	print(f"Generate-only cold start: {best_wall * 1000:.0f} ms wall, {import_ms:.0f} ms imports (budget {budget_ms:.0f} ms)")
+	for name, cumulative in sorted(imports.items(), key=lambda item: -item[1])[:8]:
+		print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+	failures = []
+	if import_ms > budget_ms:
+		failures.append(f"import time {import_ms:.0f} ms is over the {budget_ms:.0f} ms budget")
+	if forbidden:
+		failures.append(f"generate imported {', '.join(forbidden)}")
+	if failures:
+		for failure in failures:
+			print(f"  - {failure}")
+		raise SystemExit(1)
+	print("Within budget")
+
+
+def convert_with_fresh_document(md_path: Path, docx_path: Path) -> None:
+	"""The previous converter: a new Document() and style lookups by name for every file."""
+	from docx import Document
+
+	doc = Document()
+	for line in md_path.read_text(encoding="utf-8").splitlines():
+		stripped = line.strip()
+		if not stripped:
+			continue
+		if stripped.startswith("### "):
+			doc.add_heading(main.strip_basic_markdown(stripped[4:]), level=3)
+		elif stripped.startswith("## "):
+			doc.add_heading(main.strip_basic_markdown(stripped[3:]), level=2)
+		elif stripped.startswith("# "):
+			doc.add_heading(main.strip_basic_markdown(stripped[2:]), level=1)
+		elif stripped.startswith("- "):
+			doc.add_paragraph(main.strip_basic_markdown(stripped[2:]), style="List Bullet")
+		elif stripped.startswith("---"):
+			doc.add_paragraph("\u2014")
+		else:
+			doc.add_paragraph(main.strip_basic_markdown(stripped))
+	doc.save(docx_path)
+
+
+def previous_markdown_blocks(markdown: str):
+	"""The previous parser: up to six startswith checks and two replaces per line."""
+	for line in markdown.splitlines():
+		stripped = line.strip()
+		if not stripped:
+			continue
+		if stripped.startswith("### "):
+			yield "Heading 3", main.strip_basic_markdown(stripped[4:])
+		elif stripped.startswith("## "):
+			yield "Heading 2", main.strip_basic_markdown(stripped[3:])
+		elif stripped.startswith("# "):
+			yield "Heading 1", main.strip_basic_markdown(stripped[2:])
+		elif stripped.startswith("- "):
+			yield "List Bullet", main.strip_basic_markdown(stripped[2:])
+		elif stripped.startswith("---"):
+			yield None, "\u2014"
+		else:
+			yield None, main.strip_basic_markdown(stripped)
+
+
+def tokenizer_input(size_mb: float) -> str:
+	documents = [main.render_markdown(template) for template in main.build_templates()]
+	documents.append(TOKENIZER_SAMPLE)
+	target = int(size_mb * 1024 * 1024)
+	parts, size = [], 0
+	for document in itertools.cycle(documents):
+		if size >= target:
+			break
+		parts.append(document)
+		size += len(document)
+	return "\n".join(parts)
+
+
+def convert_with_previous_parser(markdown: str, docx_path: Path) -> None:
+	"""The previous conversion: the line-by-line parser and python-docx's add_paragraph."""
+	template = main.get_base_template()
+	doc = template.new_document()
+	for style_name, text in previous_markdown_blocks(markdown):
+		paragraph = doc.add_paragraph(text)
+		style_id = template.style_ids.get(style_name) if style_name else None
+		if style_id:
+			paragraph._p.style = style_id
+	doc.save(docx_path)
+
+
+def convert_with_tokenizer(markdown: str, docx_path: Path) -> None:
+	main.write_docx(main.iter_markdown_blocks(markdown), docx_path)
+
+
+def time_interleaved(variants: dict[str, Callable[[], object]], repeat: int) -> dict[str, float]:
+	"""Best time of each variant, alternating between them so load changes hit all alike."""
+	timings = dict.fromkeys(variants, float("inf"))
+	for _ in range(repeat):
+		for name, run in variants.items():
+			start = time.perf_counter()
+			run()
+			timings[name] = min(timings[name], time.perf_counter() - start)
+	return timings
+
+
+def report_per_line(title: str, timings: dict[str, float], lines: int, threshold: float) -> bool:
+	print(title)
+	for name, seconds in timings.items():
+		print(f"  {name:<16} {seconds * 1000:10.1f} ms  {seconds / lines * 1e9:8.0f} ns/line")
+	previous, current = timings.values()
+	print(f"  {previous / current:.2f}x as fast")
+	if current > previous * (1 + threshold):
+		print(f"  Slower per line than before by more than {threshold:.0%}")
+		return False
+	return True
+
+
+def run_tokenizer(size_mb: float, convert_mb: float, repeat: int, threshold: float) -> None:
+	markdown = tokenizer_input(size_mb)
+	lines = markdown.count("\n") + 1
+	timings = time_interleaved(
+		{
+			"previous parser": lambda: collections.deque(previous_markdown_blocks(markdown), maxlen=0),
+			"tokenizer": lambda: collections.deque(main.iter_markdown_blocks(markdown), maxlen=0),
+		},
+		repeat,
+	)
+	title = f"Markdown tokenizing, {len(markdown) / 1024 / 1024:.1f} MB, {lines:,} lines"
+	passed = report_per_line(title, timings, lines, threshold)
+
+	if convert_mb:
+		# python-docx's add_paragraph is quadratic in the body length, so the previous
+		# converter is timed on a smaller input than the tokenizer
+		markdown = tokenizer_input(convert_mb)
+		lines = markdown.count("\n") + 1
+		with tempfile.TemporaryDirectory() as temp_dir:
+			docx_path = Path(temp_dir) / "out.docx"
+			main.get_base_template()
+			timings = time_interleaved(
+				{
+					"previous": lambda: convert_with_previous_parser(markdown, docx_path),
+					"tokenizer": lambda: convert_with_tokenizer(markdown, docx_path),
+				},
+				1,
+			)
+		title = f"Markdown to Word, {len(markdown) / 1024 / 1024:.1f} MB, {lines:,} lines"
+		passed = report_per_line(title, timings, lines, threshold) and passed
+
+	if not passed:
+		raise SystemExit(1)
+
+
+def run_template(documents: int, template_path: Path | None) -> None:
+	with tempfile.TemporaryDirectory() as temp_dir:
+		work_dir = Path(temp_dir)
+		main.write_markdown_files(work_dir / "markdown", fixed_templates(documents))
+		md_inputs = sorted((work_dir / "markdown").glob("*.md"))
+		docx_path = work_dir / "out.docx"
+
+		variants: dict[str, Callable[[Path], None]] = {
+			"fresh Document": lambda md_path: convert_with_fresh_document(md_path, docx_path),
+			"base template": lambda md_path: main.convert_markdown_file(md_path, docx_path, template_path),
+		}
+		if template_path is not None:
+			del variants["fresh Document"]
+			variants["default template"] = lambda md_path: main.convert_markdown_file(md_path, docx_path)
+
+		# Import python-docx and parse the templates before timing, as a long run would
+		for convert in variants.values():
+			convert(md_inputs[0])
+
+		timings = {}
+		for name, convert in variants.items():
+			start = time.perf_counter()
+			for md_path in md_inputs:
+				convert(md_path)
+			timings[name] = (time.perf_counter() - start) / documents * 1000
+
+	print(f"Markdown to Word, {documents} documents")
+	reference = max(timings.values())
+	for name, ms_per_doc in timings.items():
+		print(f"  {name:<18} {ms_per_doc:8.2f} ms/doc  {1000 / ms_per_doc:8.1f} docs/sec  {1 - ms_per_doc / reference:6.0%} saved")
+
+
+def parse_args() -> argparse.Namespace:
+	parser = argparse.ArgumentParser(description="Contoso documentation generator benchmarks")
+	subparsers = parser.add_subparsers(dest="command", required=True)
+
+	run = subparsers.add_parser("run", help="Run the benchmark suite")
+	run.add_argument("--sizes", type=int, nargs="+", default=SUITE_SIZES, help="Document counts to measure")
+	run.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+	run.add_argument("--save", type=Path, help="Write results as a JSON baseline")
+
+	compare = subparsers.add_parser("compare", help="Fail if any phase regressed against a baseline")
+	compare.add_argument("baseline", type=Path, help="Baseline JSON written by 'run --save'")
+	compare.add_argument("--current", type=Path, help="Compare this results file instead of re-running")
+	compare.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+	compare.add_argument(
+		"--threshold",
+		type=float,
+		default=DEFAULT_THRESHOLD,
+		help=f"Allowed slowdown as a fraction (default: {DEFAULT_THRESHOLD})",
+	)
+
+	template = subparsers.add_parser("template", help="Compare a fresh Document per file with the cached base template")
+	template.add_argument("--documents", type=int, default=1000, help="Documents to convert per variant")
+	template.add_argument("--template", type=Path, help="Time this .docx or .dotx against the default template")
+
+	tokenizer = subparsers.add_parser("tokenizer", help="Fail if the Markdown tokenizer is slower per line than before")
+	tokenizer.add_argument("--size-mb", type=float, default=10, help="Markdown input size in megabytes")
+	tokenizer.add_argument(
+		"--convert-mb",
+		type=float,
+		default=1,
+		help="Markdown size converted to Word by both versions, 0 to skip (default: 1)",
+	)
+	tokenizer.add_argument("--repeat", type=int, default=5, help="Runs per parser (best is kept)")
+	tokenizer.add_argument(
+		"--threshold",
+		type=float,
+		default=DEFAULT_THRESHOLD,
+		help=f"Allowed slowdown as a fraction (default: {DEFAULT_THRESHOLD})",
+	)
+
+	startup = subparsers.add_parser("startup", help="Fail if generate-only cold start is over budget")
+	startup.add_argument(
+		"--budget-ms",
+		type=float,
+		default=STARTUP_BUDGET_MS,
+		help=f"Allowed import time in milliseconds (default: {STARTUP_BUDGET_MS})",
+	)
+	startup.add_argument("--repeat", type=int, default=5, help="Interpreter launches (fastest is kept)")
+
+	return parser.parse_args()
+
+
+def bench_main() -> None:
+	args = parse_args()
+	if args.command == "startup":
+		run_startup(args.budget_ms, args.repeat)
+		return
+	if args.command == "template":
+		run_template(args.documents, args.template)
+		return
+	if args.command == "tokenizer":
+		run_tokenizer(args.size_mb, args.convert_mb, args.repeat, args.threshold)
+		return
+
+	baseline = None
+	if args.command == "compare":
+		baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+		sizes = sorted({int(size) for by_size in baseline["results"].values() for size in by_size})
+	else:
+		sizes = args.sizes
+
+	if args.command == "compare" and args.current:
+		current = json.loads(args.current.read_text(encoding="utf-8"))
+	else:
+		print("Legal document creator benchmark suite (docs/sec, higher is better)")
+		current = {
+			"tool": "legal-doc-creator",
+			"created": datetime.now().isoformat(timespec="seconds"),
+			"python": platform.python_version(),
+			"machine": platform.machine(),
+			"results": run_suite(sizes, args.repeat),
+		}
+
+	if args.command == "run":
+		if args.save:
+			args.save.write_text(json.dumps(current, indent=2), encoding="utf-8")
+			print(f"Baseline written to {args.save}")
+		return
+
+	print(f"Comparing with {args.baseline} (threshold {args.threshold:.0%})")
+	regressions = compare_results(baseline, current, args.threshold)
+	if regressions:
+		print(f"{len(regressions)} regressions:")
+		for regression in regressions:
+			print(f"  - {regression}")
+		raise SystemExit(1)
+	print("No regressions")
+
+
+if __name__ == "__main__":
+	bench_main()
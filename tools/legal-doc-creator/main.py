@@ -3,15 +3,42 @@
 from __future__ import annotations
 
 import argparse
-from dataclasses import dataclass
-from datetime import datetime
+import copy
+import functools
+import hashlib
+import io
+import itertools
+import json
+import os
+import re
+import shutil
+import string
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable, Iterator
 
-from docx import Document
+if TYPE_CHECKING:
+	from docx.document import Document
 
 
 COMPANY_NAME = "Contoso Corporation"
+APPROVAL_ITEMS = (
+	"Document owner: <role>",
+	"Approver: <role>",
+	"Review cycle: Annual or upon regulation change",
+)
+CHANGE_LOG_ITEMS = ("<date>: <summary of change>", "<date>: <summary of change>")
+MANIFEST_FILENAME = ".manifest.json"
+WRITE_BATCH_SIZE = 256
+WRITE_BUFFER_SIZE = 64 * 1024
+# Bump when convert_markdown_file changes its output, so every DOCX is rebuilt
+CONVERTER_VERSION = 2
+
+# One shared encoder is much cheaper than json.dumps with arguments per line
+_encode_chunk = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
 
 
 @dataclass
@@ -279,37 +306,369 @@ def build_templates() -> list[DocumentTemplate]:
 	return legal + travel + hr
 
 
-def render_markdown(template: DocumentTemplate) -> str:
+def slugify(value: str) -> str:
+	return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+
+
+def template_parameters(template: DocumentTemplate) -> set[str]:
+	"""Return the placeholder names a template uses, rejecting malformed placeholders."""
+	names: set[str] = set()
+	texts = [template.title, template.filename, template.summary, *itertools.chain.from_iterable(template.body_sections)]
+	for text in texts:
+		for _, name, _, _ in string.Formatter().parse(text):
+			if name is None:
+				continue
+			if not name.isidentifier():
+				raise ValueError(f"'{{{name}}}' is not a parameter name; write literal braces as {{{{ and }}}}")
+			names.add(name)
+	return names
+
+
+def _template_from_entry(entry: dict, today: str) -> DocumentTemplate:
+	try:
+		sections = []
+		for section in entry["sections"]:
+			heading, body = (section["heading"], section["body"]) if isinstance(section, dict) else section
+			if not isinstance(body, str):
+				body = "\n".join(f"- {item}" for item in body)
+			sections.append((heading, body))
+		template = DocumentTemplate(
+			category=entry["category"],
+			name=entry["name"],
+			title=entry["title"],
+			filename=entry.get("filename") or f"{entry['name']}-{today}.md",
+			summary=entry["summary"],
+			body_sections=sections,
+		)
+		# Fail on malformed placeholders now rather than halfway through a large run
+		template_parameters(template)
+		return template
+	except (KeyError, TypeError, ValueError, IndexError) as e:
+		raise ValueError(f"Invalid template {entry.get('name', '?') if isinstance(entry, dict) else entry!r}: {e}") from None
+
+
+def read_data_file(path: Path) -> object:
+	if path.suffix.lower() in (".yaml", ".yml"):
+		try:
+			import yaml
+		except ImportError:
+			raise ImportError("Reading YAML files needs PyYAML (pip install pyyaml)") from None
+		return yaml.safe_load(path.read_text(encoding="utf-8"))
+	return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_template_catalog(path: Path) -> list[DocumentTemplate]:
+	"""Load templates from a JSON or YAML catalog.
+
+	The catalog is {"templates": [...]} where each template has category,
+	name, title, summary and sections, a list of {"heading", "body"} whose
+	body is Markdown or a list of bullet items, and an optional filename.
+	Any text may contain {parameter} placeholders, which every matrix row
+	must set; literal braces are written {{ and }}.
+	"""
+	today = datetime.utcnow().date().isoformat()
+	data = read_data_file(path)
+	entries = data.get("templates") if isinstance(data, dict) else data
+	if not entries:
+		raise ValueError(f"{path} has no templates")
+	return [_template_from_entry(entry, today) for entry in entries]
+
+
+def load_parameter_matrix(path: Path) -> dict[str, list]:
+	"""Load {axis: [values]} whose cartesian product gives the variants.
+
+	A value can be a mapping to set several parameters together, e.g. a
+	"site" axis of {"plant": "Berlin", "country": "Germany"} entries.
+	"""
+	data = read_data_file(path)
+	if not isinstance(data, dict) or not data or not all(isinstance(values, list) and values for values in data.values()):
+		raise ValueError(f"{path} must map each parameter to a non-empty list of values")
+	return data
+
+
+def choice_slug(choice: dict[str, str]) -> str:
+	return slugify(" ".join(str(value) for value in choice.values()))
+
+
+def variant_slug(choices: Iterable[dict[str, str]]) -> str:
+	# Slugs never contain "_", so the name splits back into one slug per axis
+	return "_".join(choice_slug(choice) for choice in choices)
+
+
+def expand_template(template: DocumentTemplate, choices: Iterable[dict[str, str]] = ()) -> DocumentTemplate:
+	"""Fill a template's placeholders from one matrix row, naming the variant after it.
+
+	choices holds the row's entry from each axis. Raises ValueError for a
+	placeholder that the row does not set.
+	"""
+	choices = list(choices)
+	parameters = _merge_choices(choices)
+	try:
+		filename = template.filename.format_map(parameters)
+		expanded = DocumentTemplate(
+			category=template.category,
+			name=template.name,
+			title=template.title.format_map(parameters),
+			filename=filename,
+			summary=template.summary.format_map(parameters),
+			body_sections=[
+				(heading.format_map(parameters), body.format_map(parameters)) for heading, body in template.body_sections
+			],
+		)
+	except KeyError as e:
+		raise ValueError(f"Template {template.name} uses {{{e.args[0]}}}, which the matrix does not set") from None
+	except (AttributeError, IndexError, TypeError, ValueError) as e:
+		raise ValueError(f"Template {template.name} cannot be filled: {e}") from None
+	if choices:
+		slug = variant_slug(choices)
+		expanded.name = f"{template.name}_{slug}"
+		expanded.filename = f"{Path(filename).stem}_{slug}.md"
+	return expanded
+
+
+def _merge_choices(choices: Iterable[dict[str, str]]) -> dict[str, str]:
+	parameters: dict[str, str] = {}
+	for choice in choices:
+		parameters.update(choice)
+	return parameters
+
+
+def _check_parameters(templates: list[DocumentTemplate], axes: list[list[dict[str, str]]]) -> None:
+	# A parameter is set in every row if one axis sets it in all of its entries
+	always_set = set().union(*(set.intersection(*(set(choice) for choice in axis)) for axis in axes))
+	first_row = [axis[0] for axis in axes]
+	for template in templates:
+		missing = template_parameters(template) - always_set
+		if missing:
+			source = "not every matrix row sets it" if axes else "there is no matrix to set it"
+			raise ValueError(f"Template {template.name} uses {{{sorted(missing)[0]}}}, but {source}")
+		# Formatting errors such as a bad format spec show up on any row
+		expand_template(template, first_row)
+
+
+def _check_unique_variants(templates: list[DocumentTemplate], axes: list[list[dict[str, str]]]) -> None:
+	# Variants that share a name or filename would silently overwrite each other's output
+	for attribute in ("name", "filename"):
+		seen: set[str] = set()
+		for template in templates:
+			value = getattr(template, attribute)
+			if attribute == "filename" and axes:
+				# Variant filenames keep only the stem
+				value = Path(value).stem
+			if value in seen:
+				raise ValueError(f"More than one template has the {attribute} '{value}'")
+			seen.add(value)
+	# Variant names are unique when every axis gives each of its entries its own slug
+	for axis in axes:
+		slugs: dict[str, dict[str, str]] = {}
+		for choice in axis:
+			slug = choice_slug(choice)
+			if not slug:
+				raise ValueError(f"Matrix value {choice} has no letters or digits to name its documents by")
+			if slug in slugs:
+				raise ValueError(
+					f"Matrix values {slugs[slug]} and {choice} both name their documents '{slug}'; "
+					"make the values differ in letters or digits"
+				)
+			slugs[slug] = choice
+
+
+def iter_document_variants(
+	templates: list[DocumentTemplate],
+	matrix: dict[str, list] | None = None,
+	limit: int | None = None,
+	shard: tuple[int, int] = (0, 1),
+) -> Iterator[DocumentTemplate]:
+	"""Lazily yield every template for every combination of matrix values.
+
+	Variants are numbered template by template in matrix order. limit keeps
+	the first limit variants, and shard (i, n) keeps variants i, i + n, ...
+	of those, so n machines together produce exactly the unsharded set.
+	Raises ValueError before yielding anything if two variants would get the
+	same name or filename, whichever shard they fall in, or if a template
+	uses a placeholder that some matrix row does not set.
+	"""
+	axes = [
+		[value if isinstance(value, dict) else {axis: value} for value in values]
+		for axis, values in (matrix or {}).items()
+	]
+	_check_parameters(templates, axes)
+	_check_unique_variants(templates, axes)
+	return _iter_variants(templates, axes, limit, shard)
+
+
+def _iter_variants(
+	templates: list[DocumentTemplate],
+	axes: list[list[dict[str, str]]],
+	limit: int | None,
+	shard: tuple[int, int],
+) -> Iterator[DocumentTemplate]:
+	combinations = itertools.product(templates, *axes)
+	shard_index, shard_count = shard
+	for position, (template, *choices) in enumerate(itertools.islice(combinations, limit)):
+		if position % shard_count != shard_index:
+			continue
+		yield expand_template(template, choices)
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+	try:
+		index, count = (int(part) for part in value.split("/"))
+	except ValueError:
+		raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected i/N (e.g. 0/10)") from None
+	if count < 1 or not 0 <= index < count:
+		raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected 0 <= i < N")
+	return index, count
+
+
+def document_fields(template: DocumentTemplate) -> list[tuple[str, str]]:
 	today = datetime.utcnow().date().isoformat()
-	lines: list[str] = []
-	lines.append(f"# {template.title}")
-	lines.append(f"**Company:** {COMPANY_NAME}  ")
-	lines.append(f"**Category:** {template.category}  ")
-	lines.append(f"**Document:** {template.name}  ")
-	lines.append(f"**Last Updated:** {today}")
-	lines.append("")
-	lines.append("## Overview")
-	lines.append(template.summary)
-	lines.append("")
+	return [
+		("Company", COMPANY_NAME),
+		("Category", template.category),
+		("Document", template.name),
+		("Last Updated", today),
+	]
+
+
+def iter_markdown_sections(template: DocumentTemplate) -> Iterator[tuple[list[str], list[str]]]:
+	"""Yield (heading path, lines) for each section of a document, title block first."""
+	fields = [f"**{label}:** {value}  " for label, value in document_fields(template)]
+	# The last field ends the block, so it gets no Markdown line break
+	fields[-1] = fields[-1].rstrip()
+	yield [template.title], [f"# {template.title}", *fields]
+	yield [template.title, "Overview"], ["## Overview", template.summary]
 	for heading, body in template.body_sections:
-		lines.append(f"## {heading}")
-		lines.extend(body.split("\n"))
-		lines.append("")
-	lines.append("## Approvals and Ownership")
-	lines.append("- Document owner: <role>\n- Approver: <role>\n- Review cycle: Annual or upon regulation change")
-	lines.append("")
-	lines.append("## Change Log")
-	lines.append("- <date>: <summary of change>\n- <date>: <summary of change>")
-	return "\n".join(lines).strip() + "\n"
-
-
-def write_markdown_files(output_dir: Path, templates: Iterable[DocumentTemplate]) -> list[Path]:
+		yield [template.title, heading], [f"## {heading}", *body.split("\n")]
+	yield [template.title, "Approvals and Ownership"], [
+		"## Approvals and Ownership",
+		*(f"- {item}" for item in APPROVAL_ITEMS),
+	]
+	yield [template.title, "Change Log"], ["## Change Log", *(f"- {item}" for item in CHANGE_LOG_ITEMS)]
+
+
+def render_markdown(template: DocumentTemplate) -> str:
+	sections = ("\n".join(lines) for _, lines in iter_markdown_sections(template))
+	return "\n\n".join(sections).strip() + "\n"
+
+
+def estimate_tokens(text: str) -> int:
+	# About four characters per token for English text
+	return (len(text) + 3) // 4
+
+
+def iter_document_chunks(template: DocumentTemplate) -> Iterator[dict]:
+	"""Yield one retrieval chunk per section, straight from the template."""
+	for heading_path, lines in iter_markdown_sections(template):
+		text = "\n".join(lines)
+		yield {
+			"doc_id": template.name,
+			"chunk_id": f"{template.name}#{' > '.join(heading_path[1:] or heading_path)}",
+			"heading_path": heading_path,
+			"text": text,
+			"token_estimate": estimate_tokens(text),
+			"hash": hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest(),
+		}
+
+
+def export_chunks(
+	output: Path,
+	templates: Iterable[DocumentTemplate],
+	full: bool = False,
+	shard: tuple[int, int] = (0, 1),
+) -> dict[str, int]:
+	"""Append section chunks to a JSON Lines log, skipping chunks unchanged since the last export.
+
+	Every record carries the "run" time of its export, and a run is only
+	appended once it is complete. The chunk hashes are kept in a state file
+	next to the log, one per shard. A chunk that disappeared from a
+	re-exported document, or with a document that was not exported again,
+	is written as {"doc_id", "chunk_id", "deleted": true, "run"}.
+	"""
+	shard_index, shard_count = shard
+	scope = f".shard-{shard_index}-of-{shard_count}" if shard_count > 1 else ""
+	state_path = output.with_name(f".{output.name}{scope}.state.json")
+	# Read even for a full export, to find deleted documents
+	try:
+		previous: dict[str, dict[str, str]] = json.loads(state_path.read_text(encoding="utf-8"))
+	except (OSError, ValueError):
+		previous = {}
+	state: dict[str, dict[str, str]] = {}
+	counts = {"documents": 0, "written": 0, "unchanged": 0, "deleted": 0}
+	run = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+	output.parent.mkdir(parents=True, exist_ok=True)
+	temp_path = output.with_name(output.name + ".tmp")
+	with open(temp_path, "w", encoding="utf-8") as f:
+
+		def write_deleted(doc_id: str, chunk_ids: Iterable[str]) -> None:
+			for chunk_id in chunk_ids:
+				f.write(_encode_chunk({"doc_id": doc_id, "chunk_id": chunk_id, "deleted": True, "run": run}) + "\n")
+				counts["deleted"] += 1
+
+		for template in templates:
+			known = previous.get(template.name, {})
+			skip = {} if full else known
+			current: dict[str, str] = {}
+			for chunk in iter_document_chunks(template):
+				current[chunk["chunk_id"]] = chunk["hash"]
+				if skip.get(chunk["chunk_id"]) == chunk["hash"]:
+					counts["unchanged"] += 1
+					continue
+				chunk["run"] = run
+				f.write(_encode_chunk(chunk) + "\n")
+				counts["written"] += 1
+			write_deleted(template.name, known.keys() - current.keys())
+			state[template.name] = current
+			counts["documents"] += 1
+		for doc_id in previous.keys() - state.keys():
+			write_deleted(doc_id, previous[doc_id])
+
+	# Consumers replay the log, so a run is appended rather than replacing the last one
+	with open(temp_path, "rb") as source, open(output, "ab") as target:
+		shutil.copyfileobj(source, target)
+	temp_path.unlink()
+
+	temp_state = state_path.with_name(state_path.name + ".tmp")
+	temp_state.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+	os.replace(temp_state, state_path)
+	return counts
+
+
+def _write_batch(batch: list[tuple[Path, str]]) -> None:
+	for path, content in batch:
+		with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+			f.write(content)
+
+
+def write_markdown_files(
+	output_dir: Path,
+	templates: Iterable[DocumentTemplate],
+	batch_size: int = WRITE_BATCH_SIZE,
+) -> int:
+	"""Render and write templates batch by batch, returning how many files were written.
+
+	templates may be a lazy iterator of any length: one batch is rendered
+	while the previous one is written by a background thread, so at most two
+	batches are held in memory.
+	"""
+	from concurrent.futures import ThreadPoolExecutor
+
 	output_dir.mkdir(parents=True, exist_ok=True)
-	written: list[Path] = []
-	for template in templates:
-		path = output_dir / template.filename
-		path.write_text(render_markdown(template), encoding="utf-8")
-		written.append(path)
+	templates = iter(templates)
+	written = 0
+	pending = None
+	with ThreadPoolExecutor(max_workers=1) as writer:
+		while batch := [
+			(output_dir / template.filename, render_markdown(template))
+			for template in itertools.islice(templates, batch_size)
+		]:
+			if pending is not None:
+				pending.result()
+			pending = writer.submit(_write_batch, batch)
+			written += len(batch)
+		if pending is not None:
+			pending.result()
 	return written
 
 
@@ -317,37 +676,510 @@ def strip_basic_markdown(text: str) -> str:
 	return text.replace("**", "").replace("`", "").strip()
 
 
-def convert_markdown_file(md_path: Path, docx_path: Path) -> None:
-	doc = Document()
-	lines = md_path.read_text(encoding="utf-8").splitlines()
-	for line in lines:
-		stripped = line.strip()
-		if not stripped:
+# Inline formatting flags of a text run
+BOLD = 1
+ITALIC = 2
+CODE = 4
+CODE_FONT = "Consolas"
+# Element and attribute names of the WordprocessingML the writer builds directly
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_P, W_PPR, W_PSTYLE, W_NUMPR, W_ILVL, W_NUMID = (
+	WORD_NAMESPACE + name for name in ("p", "pPr", "pStyle", "numPr", "ilvl", "numId")
+)
+W_R, W_RPR, W_RFONTS, W_B, W_I, W_T = (WORD_NAMESPACE + name for name in ("r", "rPr", "rFonts", "b", "i", "t"))
+W_NUM, W_ABSTRACT_NUM_ID, W_LVL_OVERRIDE, W_START_OVERRIDE = (
+	WORD_NAMESPACE + name for name in ("num", "abstractNumId", "lvlOverride", "startOverride")
+)
+W_VAL, W_ASCII, W_HANSI = (WORD_NAMESPACE + name for name in ("val", "ascii", "hAnsi"))
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+# Block kind of tables; paragraphs are keyed by their Word style name
+TABLE_BLOCK = "table"
+
+# One match per non-blank line (or per table), told apart by the group that matched.
+# Captures run to the end of the line; backtracking to its last non-blank
+# character in the pattern costs more than rstrip.
+_LINE_TEXT = r"(\S[^\n]*)"
+BLOCK_PATTERN = re.compile(
+	r"^[ \t]*(?:"
+	rf"###[ \t]+{_LINE_TEXT}"
+	rf"|##[ \t]+{_LINE_TEXT}"
+	rf"|#[ \t]+{_LINE_TEXT}"
+	rf"|-[ \t]+{_LINE_TEXT}"
+	rf"|\d+[.)][ \t]+{_LINE_TEXT}"
+	r"|(---)[^\n]*"
+	r"|(\|[^\n]*(?:\n[ \t]*\|[^\n]*)*)"
+	rf"|{_LINE_TEXT}"
+	r")",
+	re.MULTILINE,
+)
+BLOCK_STYLES = (None, "Heading 3", "Heading 2", "Heading 1", "List Bullet", "List Number", None, TABLE_BLOCK, None)
+RULE_GROUP = 6
+TEXT_GROUP = 8
+# Bold, code and italic spans, kept whole so re.split puts each between its plain text
+INLINE_PATTERN = re.compile(r"(\*\*[^*\n]+\*\*|`[^`\n]+`|\*[^*\s](?:[^*\n]*[^*\s])?\*(?![\w*]))")
+# Text with exactly one bold or code span, by far the most common case
+SINGLE_SPAN_PATTERN = re.compile(r"([^*`]*)(?:\*\*([^*`]+)\*\*|`([^`]+)`)([^*`]*)")
+TABLE_SEPARATOR = re.compile(r"\|?(?:[ \t]*:?-+:?[ \t]*\|)*[ \t]*:?-+:?[ \t]*\|?[ \t\r]*")
+
+
+def _plain_run(text: str) -> tuple[str, int]:
+	# Unmatched markers are dropped, as they always were
+	return text.replace("**", "").replace("`", ""), 0
+
+
+def parse_inline(text: str) -> str | list[tuple[str, int]]:
+	"""Split text into (text, flags) runs at its **bold**, *italic* and `code` spans.
+
+	Text without any of them is returned as it is.
+	"""
+	if "*" not in text and "`" not in text:
+		return text
+	match = SINGLE_SPAN_PATTERN.fullmatch(text)
+	if match is not None:
+		before, bold, code, after = match.groups()
+		runs = [(before, 0)] if before else []
+		runs.append((bold, BOLD) if bold is not None else (code, CODE))
+		if after:
+			runs.append((after, 0))
+		return runs
+
+	parts = INLINE_PATTERN.split(text)
+	runs = []
+	for index in range(0, len(parts) - 1, 2):
+		plain, span = parts[index], parts[index + 1]
+		if plain:
+			runs.append(_plain_run(plain))
+		if span[1] == "*":
+			runs.append((span[2:-2], BOLD))
+		elif span[0] == "`":
+			runs.append((span[1:-1], CODE))
+		else:
+			runs.append((span[1:-1], ITALIC))
+	if parts[-1]:
+		runs.append(_plain_run(parts[-1]))
+	return runs
+
+
+def parse_table(table: str) -> list[list[str | list[tuple[str, int]]]]:
+	"""Split the lines of a Markdown table into rows of cells, bolding the header row."""
+	rows = []
+	for line in table.split("\n"):
+		if TABLE_SEPARATOR.fullmatch(line.strip()):
+			if len(rows) == 1:
+				rows[0] = [
+					[(cell, BOLD)] if isinstance(cell, str) else [(text, flags | BOLD) for text, flags in cell]
+					for cell in rows[0]
+				]
 			continue
-		if stripped.startswith("### "):
-			doc.add_heading(strip_basic_markdown(stripped[4:]), level=3)
-		elif stripped.startswith("## "):
-			doc.add_heading(strip_basic_markdown(stripped[3:]), level=2)
-		elif stripped.startswith("# "):
-			doc.add_heading(strip_basic_markdown(stripped[2:]), level=1)
-		elif stripped.startswith("- "):
-			doc.add_paragraph(strip_basic_markdown(stripped[2:]), style="List Bullet")
-		elif stripped.startswith("---"):
-			doc.add_paragraph("\u2014")
+		rows.append([parse_inline(cell.strip()) for cell in line.strip().strip("|").split("|")])
+	return rows
+
+
+def iter_markdown_blocks(markdown: str) -> Iterator[tuple[str | None, object]]:
+	"""Yield (style name, text) for each paragraph and (TABLE_BLOCK, rows) for each table.
+
+	Text is a str, or a list of (text, flags) runs when it has inline
+	formatting. The whole Markdown is scanned by one compiled pattern.
+	"""
+	for match in BLOCK_PATTERN.finditer(markdown):
+		index = match.lastindex
+		if index < RULE_GROUP or index == TEXT_GROUP:
+			text = match[index].rstrip()
+			# parse_inline's own check, inlined: most lines have no formatting
+			yield BLOCK_STYLES[index], text if "*" not in text and "`" not in text else parse_inline(text)
+		elif index == RULE_GROUP:
+			yield None, "\u2014"
 		else:
-			doc.add_paragraph(strip_basic_markdown(stripped))
+			rows = parse_table(match[index])
+			if rows:
+				yield TABLE_BLOCK, rows
+
+
+# Content types of the main part: a .dotx is opened as the .docx it creates
+TEMPLATE_CONTENT_TYPE = b"application/vnd.openxmlformats-officedocument.wordprocessingml.template.main+xml"
+DOCUMENT_CONTENT_TYPE = b"application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"
+
+
+def read_template_package(template_path: Path) -> io.BytesIO:
+	"""Return a .docx or .dotx package as an in-memory .docx python-docx can open."""
+	data = template_path.read_bytes()
+	if template_path.suffix.lower() != ".dotx":
+		return io.BytesIO(data)
+
+	import zipfile
+
+	converted = io.BytesIO()
+	with zipfile.ZipFile(io.BytesIO(data)) as source, zipfile.ZipFile(converted, "w", zipfile.ZIP_DEFLATED) as target:
+		for item in source.infolist():
+			content = source.read(item.filename)
+			if item.filename == "[Content_Types].xml":
+				content = content.replace(TEMPLATE_CONTENT_TYPE, DOCUMENT_CONTENT_TYPE)
+			target.writestr(item, content)
+	converted.seek(0)
+	return converted
+
+
+class BaseTemplate:
+	"""A Word template parsed once, handing out its document for each conversion.
+
+	Converting only ever appends paragraphs and tables to the body, so
+	instead of opening the package again, every conversion restores a copy
+	of the template's original body and keeps the parsed styles, numbering,
+	headers and other parts. Style IDs are resolved once, because looking a
+	style up by name scans every style in the template.
+
+	Paragraphs and table elements are built directly and put in front of the
+	body's section properties. python-docx finds that position, and the table
+	width, by scanning the body for every block, and writes run text one
+	character at a time, which makes long documents quadratic. Table cells
+	are filled through the public Table API.
+
+	Each numbered list gets its own numbering instance restarting at 1;
+	those are dropped again with the body.
+	"""
+
+	STYLE_NAMES = ("Heading 1", "Heading 2", "Heading 3", "List Bullet", "List Number", "Table Grid")
+
+	def __init__(self, template_path: Path | None = None) -> None:
+		# python-docx (and lxml) are only needed for conversion, so generate starts without them
+		from docx import Document
+		from docx.shared import Inches
+
+		self.document = Document(read_template_package(template_path) if template_path else None)
+		self._body_element = self.document.element.body
+		self._original_body = [copy.deepcopy(child) for child in self._body_element]
+		self._sect_pr = None
+		# Tables span the last section's text width, as with Document.add_table; the
+		# sections come with the template and never change between conversions
+		section = self.document.sections[-1]
+		self.table_width = (
+			(section.page_width or Inches(8.5)) - (section.left_margin or Inches(1)) - (section.right_margin or Inches(1))
+		)
+		self.style_ids: dict[str, str | None] = {}
+		self.table_style = None
+		for name in self.STYLE_NAMES:
+			try:
+				style = self.document.styles[name]
+			except KeyError:
+				# Templates without the style get plain paragraphs and tables
+				self.style_ids[name] = None
+				continue
+			self.style_ids[name] = style.style_id
+			if name == "Table Grid":
+				self.table_style = style
+
+		self._numbering = None
+		try:
+			num_id = self.document.styles["List Number"].element.pPr.numPr.numId.val
+			numbering = self.document.part.numbering_part.element
+			self._list_number_abstract = numbering.num_having_numId(num_id).abstractNumId.val
+			nums = numbering.num_lst
+			self._numbering = numbering
+			# python-docx's add_num rescans every num for a free ID, quadratic in the lists
+			self._first_num_id = max(num.numId for num in nums) + 1
+			self._last_num = nums[-1]
+			self._added_nums = []
+		except (KeyError, AttributeError, NotImplementedError):
+			# No numbering behind List Number: numbered items just take the style
+			pass
+
+	def new_document(self) -> Document:
+		for child in list(self._body_element):
+			self._body_element.remove(child)
+		for child in self._original_body:
+			self._body_element.append(copy.deepcopy(child))
+		self._sect_pr = self._body_element.sectPr
+		if self._numbering is not None:
+			for num in self._added_nums:
+				self._numbering.remove(num)
+			self._added_nums.clear()
+		return self.document
+
+	def start_numbered_list(self) -> int | None:
+		"""Return the numbering ID of a new List Number list starting at 1."""
+		if self._numbering is None:
+			return None
+		num_id = self._first_num_id + len(self._added_nums)
+		num = self._numbering.makeelement(W_NUM, {W_NUMID: str(num_id)})
+		num.append(num.makeelement(W_ABSTRACT_NUM_ID, {W_VAL: str(self._list_number_abstract)}))
+		override = num.makeelement(W_LVL_OVERRIDE, {W_ILVL: "0"})
+		override.append(override.makeelement(W_START_OVERRIDE, {W_VAL: "1"}))
+		num.append(override)
+		(self._added_nums[-1] if self._added_nums else self._last_num).addnext(num)
+		self._added_nums.append(num)
+		return num_id
+
+	def _append_block(self, element) -> None:
+		if self._sect_pr is not None:
+			self._sect_pr.addprevious(element)
+		else:
+			self._body_element.append(element)
+
+	@staticmethod
+	def _add_runs(p, text: str | list[tuple[str, int]]) -> None:
+		for run_text, flags in ((text, 0),) if isinstance(text, str) else text:
+			if not run_text:
+				continue
+			r = p.makeelement(W_R, {})
+			p.append(r)
+			if flags:
+				# Child order follows the schema: rFonts, b, i
+				r_pr = r.makeelement(W_RPR, {})
+				r.append(r_pr)
+				if flags & CODE:
+					r_pr.append(r_pr.makeelement(W_RFONTS, {W_ASCII: CODE_FONT, W_HANSI: CODE_FONT}))
+				if flags & BOLD:
+					r_pr.append(r_pr.makeelement(W_B, {}))
+				if flags & ITALIC:
+					r_pr.append(r_pr.makeelement(W_I, {}))
+			if "\t" in run_text or "\n" in run_text or "\r" in run_text:
+				# python-docx turns these into tab and break elements
+				r.text = run_text
+				continue
+			t = r.makeelement(W_T, {})
+			t.text = run_text
+			if len(run_text.strip()) < len(run_text):
+				t.set(XML_SPACE, "preserve")
+			r.append(t)
+
+	def add_paragraph(self, text: str | list[tuple[str, int]], style_name: str | None = None, num_id: int | None = None) -> None:
+		p = self._body_element.makeelement(W_P, {})
+		style_id = self.style_ids.get(style_name) if style_name else None
+		if style_id or num_id is not None:
+			p_pr = p.makeelement(W_PPR, {})
+			p.append(p_pr)
+			if style_id:
+				p_pr.append(p_pr.makeelement(W_PSTYLE, {W_VAL: style_id}))
+			if num_id is not None:
+				num_pr = p_pr.makeelement(W_NUMPR, {})
+				p_pr.append(num_pr)
+				num_pr.append(num_pr.makeelement(W_ILVL, {W_VAL: "0"}))
+				num_pr.append(num_pr.makeelement(W_NUMID, {W_VAL: str(num_id)}))
+		self._add_runs(p, text)
+		self._append_block(p)
+
+	def add_table(self, rows: list[list[str | list[tuple[str, int]]]]) -> None:
+		from docx.oxml.table import CT_Tbl
+		from docx.table import Table
+
+		tbl = CT_Tbl.new_tbl(len(rows), max(len(row) for row in rows), self.table_width)
+		self._append_block(tbl)
+		table = Table(tbl, self.document)
+		if self.table_style is not None:
+			table.style = self.table_style
+		for row, cells in zip(table.rows, rows):
+			for cell, text in zip(row.cells, cells):
+				paragraph = cell.paragraphs[0]
+				for run_text, flags in ((text, 0),) if isinstance(text, str) else text:
+					if not run_text:
+						continue
+					run = paragraph.add_run(run_text)
+					if flags & CODE:
+						run.font.name = CODE_FONT
+					if flags & BOLD:
+						run.bold = True
+					if flags & ITALIC:
+						run.italic = True
+
+
+@functools.lru_cache(maxsize=None)
+def get_base_template(template_path: Path | None = None) -> BaseTemplate:
+	# One parsed template per process (and per template file)
+	return BaseTemplate(template_path)
+
+
+def iter_template_blocks(template: DocumentTemplate) -> Iterator[tuple[str | None, object]]:
+	"""Yield (style name, text) for each block straight from a template's fields.
+
+	Produces the same blocks as rendering the template to Markdown and
+	parsing it back; only the section bodies, which are Markdown lists, are parsed.
+	"""
+	yield "Heading 1", parse_inline(template.title)
+	for label, value in document_fields(template):
+		yield None, parse_inline(f"**{label}:** {value}")
+	yield "Heading 2", "Overview"
+	yield None, parse_inline(template.summary)
+	for heading, body in template.body_sections:
+		yield "Heading 2", parse_inline(heading)
+		yield from iter_markdown_blocks(body)
+	yield "Heading 2", "Approvals and Ownership"
+	for item in APPROVAL_ITEMS:
+		yield "List Bullet", parse_inline(item)
+	yield "Heading 2", "Change Log"
+	for item in CHANGE_LOG_ITEMS:
+		yield "List Bullet", parse_inline(item)
+
+
+def write_docx(blocks: Iterable[tuple[str | None, object]], docx_path: Path, template_path: Path | None = None) -> None:
+	template = get_base_template(template_path)
+	doc = template.new_document()
+	num_id = previous = None
+	for style_name, content in blocks:
+		if style_name == TABLE_BLOCK:
+			template.add_table(content)
+		elif style_name == "List Number":
+			if previous != "List Number":
+				num_id = template.start_numbered_list()
+			template.add_paragraph(content, style_name, num_id)
+		else:
+			template.add_paragraph(content, style_name)
+		previous = style_name
 	docx_path.parent.mkdir(parents=True, exist_ok=True)
 	doc.save(docx_path)
 
 
-def convert_directory(input_dir: Path, output_dir: Path) -> list[Path]:
+def convert_markdown_file(md_path: Path, docx_path: Path, template_path: Path | None = None) -> None:
+	write_docx(iter_markdown_blocks(md_path.read_text(encoding="utf-8")), docx_path, template_path)
+
+
+def build_documents(
+	templates: Iterable[DocumentTemplate],
+	output_dir: Path,
+	markdown_dir: Path | None = None,
+	template_path: Path | None = None,
+) -> int:
+	"""Render templates straight to Word, writing Markdown copies only when markdown_dir is given."""
+	output_dir.mkdir(parents=True, exist_ok=True)
+	if markdown_dir is not None:
+		markdown_dir.mkdir(parents=True, exist_ok=True)
+	built = 0
+	for template in templates:
+		if markdown_dir is not None:
+			(markdown_dir / template.filename).write_text(render_markdown(template), encoding="utf-8")
+		docx_path = output_dir / (Path(template.filename).stem + ".docx")
+		write_docx(iter_template_blocks(template), docx_path, template_path)
+		built += 1
+	return built
+
+
+@dataclass
+class ConversionSummary:
+	converted: list[Path] = field(default_factory=list)
+	skipped: int = 0
+	failed: list[str] = field(default_factory=list)
+	removed: int = 0
+	seconds: float = 0.0
+
+
+def template_hash(template_path: Path | None) -> str | None:
+	return hashlib.sha256(template_path.read_bytes()).hexdigest() if template_path else None
+
+
+def load_manifest(output_dir: Path, template_digest: str | None = None) -> tuple[dict[str, dict[str, str]], bool]:
+	"""Return ({markdown name: {"hash", "docx"}}, still valid) from the last conversion.
+
+	The entries are returned even when the converter or template changed, so
+	the DOCX of deleted Markdown files can still be found.
+	"""
+	try:
+		manifest = json.loads((output_dir / MANIFEST_FILENAME).read_text(encoding="utf-8"))
+	except (OSError, ValueError):
+		return {}, False
+	valid = manifest.get("converter") == CONVERTER_VERSION and manifest.get("template") == template_digest
+	return manifest.get("documents", {}), valid
+
+
+def save_manifest(output_dir: Path, documents: dict[str, dict[str, str]], template_digest: str | None = None) -> None:
+	manifest_path = output_dir / MANIFEST_FILENAME
+	temp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+	temp_path.write_text(
+		json.dumps(
+			{"converter": CONVERTER_VERSION, "template": template_digest, "documents": documents},
+			indent=2,
+			sort_keys=True,
+		),
+		encoding="utf-8",
+	)
+	os.replace(temp_path, manifest_path)
+
+
+def convert_directory(
+	input_dir: Path,
+	output_dir: Path,
+	workers: int = 1,
+	force: bool = False,
+	template_path: Path | None = None,
+) -> ConversionSummary:
+	"""Convert every Markdown file whose content changed since the last run.
+
+	A manifest in output_dir records the content hash behind each DOCX, so
+	unchanged files are skipped unless force is set, and the DOCX of a
+	Markdown file that no longer exists is deleted, also on forced runs and
+	after the converter or template changed. With workers > 1 the
+	conversions run in a process pool. Each process parses the base template
+	(python-docx's default, or template_path) once; changing the template
+	converts everything again. Failed files are retried next run.
+	"""
+	start_time = time.perf_counter()
 	output_dir.mkdir(parents=True, exist_ok=True)
-	generated: list[Path] = []
-	for md_file in input_dir.glob("*.md"):
+	template_digest = template_hash(template_path)
+	recorded, valid = load_manifest(output_dir, template_digest)
+	previous = recorded if valid and not force else {}
+	documents: dict[str, dict[str, str]] = {}
+	summary = ConversionSummary()
+
+	sources = sorted(input_dir.glob("*.md"))
+	pending: list[tuple[Path, Path, str]] = []
+	for md_file in sources:
+		content_hash = hashlib.sha256(md_file.read_bytes()).hexdigest()
 		target = output_dir / (md_file.stem + ".docx")
-		convert_markdown_file(md_file, target)
-		generated.append(target)
-	return generated
+		entry = previous.get(md_file.name)
+		if entry and entry["hash"] == content_hash and target.exists():
+			documents[md_file.name] = entry
+			summary.skipped += 1
+		else:
+			pending.append((md_file, target, content_hash))
+
+	present = {md_file.name for md_file in sources}
+	for name, entry in recorded.items():
+		if name not in present:
+			try:
+				(output_dir / entry["docx"]).unlink()
+			except FileNotFoundError:
+				# Already deleted by hand, or never written because the conversion failed
+				continue
+			summary.removed += 1
+
+	def record(md_file: Path, target: Path, content_hash: str, error: BaseException | None) -> None:
+		if error is not None:
+			summary.failed.append(md_file.name)
+			print(f"Failed to convert {md_file.name}: {error}", file=sys.stderr)
+			# Keep tracking an older DOCX so it is still removed with its source
+			if md_file.name in recorded:
+				documents[md_file.name] = {"hash": "", "docx": recorded[md_file.name]["docx"]}
+			return
+		documents[md_file.name] = {"hash": content_hash, "docx": target.name}
+		summary.converted.append(target)
+
+	try:
+		if workers > 1 and len(pending) > 1:
+			from concurrent.futures import ProcessPoolExecutor, as_completed
+
+			with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+				futures = {
+					executor.submit(convert_markdown_file, md_file, target, template_path): (
+						md_file,
+						target,
+						content_hash,
+					)
+					for md_file, target, content_hash in pending
+				}
+				for future in as_completed(futures):
+					record(*futures[future], future.exception())
+		else:
+			for md_file, target, content_hash in pending:
+				try:
+					convert_markdown_file(md_file, target, template_path)
+				except Exception as e:
+					record(md_file, target, content_hash, e)
+				else:
+					record(md_file, target, content_hash, None)
+	finally:
+		# Keep what was converted so far even when the run is interrupted
+		save_manifest(output_dir, documents, template_digest)
+
+	summary.seconds = time.perf_counter() - start_time
+	return summary
 
 
 def parse_args() -> argparse.Namespace:
@@ -375,19 +1207,107 @@ def parse_args() -> argparse.Namespace:
 		default=Path("output/word"),
 		help="Directory to write Word documents",
 	)
+	conv.add_argument(
+		"--workers",
+		type=int,
+		default=1,
+		help="Number of worker processes",
+	)
+	conv.add_argument(
+		"--force",
+		action="store_true",
+		help="Convert every file, even if its Word document is up to date",
+	)
+	conv.add_argument(
+		"--template",
+		type=Path,
+		help="Corporate .docx or .dotx to base every Word document on",
+	)
+
+	build = subparsers.add_parser("build", help="Render Word documents straight from the templates")
+	export = subparsers.add_parser("export", help="Export section chunks as JSON Lines")
+	for sub in (gen, build, export):
+		sub.add_argument("--catalog", type=Path, help="JSON or YAML template catalog (default: built-in templates)")
+		sub.add_argument("--matrix", type=Path, help="JSON or YAML parameter matrix to expand every template with")
+		sub.add_argument("--limit", type=int, help="Only produce the first N documents")
+		sub.add_argument(
+			"--shard",
+			type=parse_shard,
+			default=(0, 1),
+			metavar="I/N",
+			help="Only produce shard I of N (e.g. 0/10), so N machines can split one job",
+		)
+
+	build.add_argument(
+		"--output",
+		type=Path,
+		default=Path("output/word"),
+		help="Directory to write Word documents",
+	)
+	build.add_argument(
+		"--markdown",
+		type=Path,
+		help="Also write the Markdown copies to this directory",
+	)
+	build.add_argument(
+		"--template",
+		type=Path,
+		help="Corporate .docx or .dotx to base every Word document on",
+	)
+
+	export.add_argument(
+		"--output",
+		type=Path,
+		default=Path("output/chunks.jsonl"),
+		help="JSON Lines file to write",
+	)
+	export.add_argument(
+		"--full",
+		action="store_true",
+		help="Write every chunk, not only those changed since the last export",
+	)
 
 	return parser.parse_args()
 
 
+def iter_requested_documents(args: argparse.Namespace) -> Iterator[DocumentTemplate]:
+	templates = load_template_catalog(args.catalog) if args.catalog else build_templates()
+	matrix = load_parameter_matrix(args.matrix) if args.matrix else None
+	return iter_document_variants(templates, matrix, args.limit, args.shard)
+
+
 def main() -> None:
 	args = parse_args()
+	if args.command in ("generate", "build", "export"):
+		try:
+			documents = iter_requested_documents(args)
+		except (OSError, ValueError, ImportError) as e:
+			sys.exit(f"Cannot load templates: {e}")
 	if args.command == "generate":
-		templates = build_templates()
-		written = write_markdown_files(args.output, templates)
-		print(f"Generated {len(written)} Markdown files in {args.output}")
+		written = write_markdown_files(args.output, documents)
+		print(f"Generated {written} Markdown files in {args.output}")
+	elif args.command in ("convert", "build") and args.template and not args.template.is_file():
+		sys.exit(f"Template not found: {args.template}")
+	elif args.command == "build":
+		built = build_documents(documents, args.output, args.markdown, args.template)
+		copies = f" and Markdown copies in {args.markdown}" if args.markdown else ""
+		print(f"Built {built} Word documents in {args.output}{copies}")
 	elif args.command == "convert":
-		generated = convert_directory(args.input, args.output)
-		print(f"Converted {len(generated)} files to Word in {args.output}")
+		summary = convert_directory(args.input, args.output, args.workers, args.force, args.template)
+		rate = len(summary.converted) / summary.seconds if summary.seconds > 0 else 0.0
+		print(
+			f"Converted {len(summary.converted)}, skipped {summary.skipped} up to date, "
+			f"failed {len(summary.failed)}, removed {summary.removed} stale Word files in {args.output} "
+			f"({summary.seconds:.2f}s, {rate:.1f} docs/sec)"
+		)
+		if summary.failed:
+			sys.exit(1)
+	elif args.command == "export":
+		counts = export_chunks(args.output, documents, args.full, args.shard)
+		print(
+			f"Appended {counts['written']} chunks of {counts['documents']} documents to {args.output} "
+			f"({counts['unchanged']} unchanged skipped, {counts['deleted']} deleted)"
+		)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,251 @@
+"""Tests for legal-doc-creator. Run with: python -m unittest test_main"""
+
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+import main
+
+
+class ConvertDirectoryTests(unittest.TestCase):
+	def setUp(self) -> None:
+		temp_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(temp_dir.cleanup)
+		self.input_dir = Path(temp_dir.name) / "md"
+		self.output_dir = Path(temp_dir.name) / "docx"
+		self.input_dir.mkdir()
+		for name in ("first", "second"):
+			(self.input_dir / f"{name}.md").write_text(f"# {name}\n\nBody of **{name}**.\n", encoding="utf-8")
+		main.convert_directory(self.input_dir, self.output_dir)
+
+	def test_deleted_source_is_removed(self) -> None:
+		(self.input_dir / "second.md").unlink()
+		summary = main.convert_directory(self.input_dir, self.output_dir)
+		self.assertEqual(summary.removed, 1)
+		self.assertEqual(sorted(path.name for path in self.output_dir.glob("*.docx")), ["first.docx"])
+
+	def test_deleted_source_is_removed_when_forced(self) -> None:
+		(self.input_dir / "second.md").unlink()
+		summary = main.convert_directory(self.input_dir, self.output_dir, force=True)
+		self.assertEqual(summary.removed, 1)
+		self.assertEqual(len(summary.converted), 1)
+		self.assertFalse((self.output_dir / "second.docx").exists())
+
+	def test_deleted_source_is_removed_after_template_change(self) -> None:
+		template_path = self.output_dir.parent / "corporate.docx"
+		main.get_base_template().new_document().save(template_path)
+		(self.input_dir / "second.md").unlink()
+		summary = main.convert_directory(self.input_dir, self.output_dir, template_path=template_path)
+		self.assertEqual(summary.removed, 1)
+		self.assertFalse((self.output_dir / "second.docx").exists())
+
+		# The next run still knows about every remaining DOCX
+		(self.input_dir / "first.md").unlink()
+		summary = main.convert_directory(self.input_dir, self.output_dir, force=True, template_path=template_path)
+		self.assertEqual(summary.removed, 1)
+		self.assertEqual(list(self.output_dir.glob("*.docx")), [])
+
+	def test_only_existing_word_files_count_as_removed(self) -> None:
+		(self.input_dir / "first.md").unlink()
+		(self.input_dir / "second.md").unlink()
+		(self.output_dir / "second.docx").unlink()
+		summary = main.convert_directory(self.input_dir, self.output_dir)
+		self.assertEqual(summary.removed, 1)
+
+	def test_unchanged_sources_are_skipped(self) -> None:
+		summary = main.convert_directory(self.input_dir, self.output_dir)
+		self.assertEqual((summary.skipped, summary.converted, summary.removed), (2, [], 0))
+
+
+class ExportChunksTests(unittest.TestCase):
+	def setUp(self) -> None:
+		temp_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(temp_dir.cleanup)
+		self.output = Path(temp_dir.name) / "chunks.jsonl"
+		self.templates = main.build_templates()
+
+	def read_records(self) -> list[dict]:
+		return [json.loads(line) for line in self.output.read_text(encoding="utf-8").splitlines()]
+
+	def test_unchanged_export_keeps_the_previous_run(self) -> None:
+		first = main.export_chunks(self.output, self.templates)
+		second = main.export_chunks(self.output, self.templates)
+		self.assertEqual((second["written"], second["unchanged"]), (0, first["written"]))
+		self.assertEqual(len(self.read_records()), first["written"])
+
+	def test_documents_missing_from_a_run_are_deleted(self) -> None:
+		main.export_chunks(self.output, self.templates)
+		dropped = self.templates[-1].name
+		counts = main.export_chunks(self.output, self.templates[:-1])
+		deleted = [record for record in self.read_records() if record.get("deleted")]
+		self.assertEqual(counts["deleted"], len(deleted))
+		self.assertTrue(deleted)
+		self.assertEqual({record["doc_id"] for record in deleted}, {dropped})
+
+		# A forced export still finds them, and nothing is deleted twice
+		counts = main.export_chunks(self.output, self.templates[:-2], full=True)
+		self.assertEqual({record["doc_id"] for record in self.read_records()[-counts["deleted"]:]}, {self.templates[-2].name})
+
+
+def catalog_entry(**text: str) -> dict:
+	entry = {"category": "Safety", "name": "site-safety", "title": "Site Safety", "summary": "Safety rules.", "sections": []}
+	return {**entry, **text}
+
+
+class DocumentVariantTests(unittest.TestCase):
+	def test_every_variant_gets_its_own_file(self) -> None:
+		matrix = {"plant": ["Berlin", "Austin"], "language": ["en", "de"]}
+		variants = list(main.iter_document_variants(main.build_templates(), matrix))
+		self.assertEqual(len({variant.filename for variant in variants}), len(variants))
+
+	def test_matrix_values_with_the_same_slug_are_rejected(self) -> None:
+		with self.assertRaisesRegex(ValueError, "berlin"):
+			main.iter_document_variants(main.build_templates(), {"plant": ["Berlin", "berlin"]}, shard=(1, 2))
+
+	def test_values_that_only_collide_when_joined_get_their_own_file(self) -> None:
+		matrix = {"area": ["North East", "North"], "site": ["Mill", "East Mill"]}
+		variants = list(main.iter_document_variants(main.build_templates()[:1], matrix))
+		self.assertEqual(len({variant.filename for variant in variants}), 4)
+
+	def test_matrix_entries_with_the_same_slug_are_rejected(self) -> None:
+		site = [{"plant": "Berlin", "country": "Germany"}, {"plant": "Berlin Germany", "country": ""}]
+		with self.assertRaisesRegex(ValueError, "berlin-germany"):
+			main.iter_document_variants(main.build_templates(), {"site": site})
+		with self.assertRaisesRegex(ValueError, "no letters or digits"):
+			main.iter_document_variants(main.build_templates(), {"plant": ["Berlin", "--"]})
+
+	def test_templates_with_the_same_name_are_rejected(self) -> None:
+		templates = main.build_templates()
+		with self.assertRaisesRegex(ValueError, templates[0].name):
+			main.iter_document_variants([*templates, templates[0]])
+
+	def test_literal_braces_are_unescaped_without_a_matrix(self) -> None:
+		template = main._template_from_entry(catalog_entry(summary="Use {{braces}} literally."), "2024-01-01")
+		(variant,) = main.iter_document_variants([template])
+		self.assertEqual(variant.summary, "Use {braces} literally.")
+		self.assertEqual(variant.name, "site-safety")
+
+	def test_placeholders_the_matrix_does_not_set_are_rejected(self) -> None:
+		template = main._template_from_entry(catalog_entry(title="Rules for {plant}"), "2024-01-01")
+		with self.assertRaisesRegex(ValueError, "plant"):
+			main.iter_document_variants([template])
+		with self.assertRaisesRegex(ValueError, "plant"):
+			main.iter_document_variants([template], {"site": [{"plant": "Berlin"}, {"country": "Germany"}]})
+		(variant,) = main.iter_document_variants([template], {"plant": ["Berlin"]})
+		self.assertEqual(variant.title, "Rules for Berlin")
+
+	def test_malformed_placeholders_are_rejected_on_load(self) -> None:
+		for title in ("Rules for {plant.name}", "Rules for {plant[0]}", "Rules for {}", "Rules for {plant"):
+			with self.subTest(title=title), self.assertRaises(ValueError):
+				main._template_from_entry(catalog_entry(title=title), "2024-01-01")
+
+	def test_bad_format_specs_are_rejected_before_expanding(self) -> None:
+		template = main._template_from_entry(catalog_entry(title="Rules for {plant:d}"), "2024-01-01")
+		with self.assertRaisesRegex(ValueError, "site-safety"):
+			main.iter_document_variants([template], {"plant": ["Berlin"]})
+
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+SAMPLE_MARKDOWN = """# Retention Policy
+
+Records are kept for **seven years** unless *legal hold* applies; see `DISPOSE`.
+  Leading and trailing spaces  \ttab
+
+| Record | Period |
+|--------|--------|
+| **Invoices** | 10 years |
+| Contracts | `term + 6` |
+
+- First bullet
+- Second bullet with *emphasis*
+
+1. Classify the record
+2. Apply the period
+
+Between the lists.
+
+1. Restart at one
+"""
+
+
+def write_with_public_api(blocks, docx_path: Path) -> None:
+	"""Write blocks the slow way, through python-docx's public API only."""
+	from docx import Document
+
+	document = Document()
+
+	def add_runs(paragraph, content) -> None:
+		for text, flags in ((content, 0),) if isinstance(content, str) else content:
+			if not text:
+				continue
+			run = paragraph.add_run(text)
+			if flags & main.CODE:
+				run.font.name = main.CODE_FONT
+			if flags & main.BOLD:
+				run.bold = True
+			if flags & main.ITALIC:
+				run.italic = True
+
+	for style_name, content in blocks:
+		if style_name == main.TABLE_BLOCK:
+			table = document.add_table(len(content), max(len(row) for row in content))
+			table.style = document.styles["Table Grid"]
+			for row, cells in zip(table.rows, content):
+				for cell, text in zip(row.cells, cells):
+					add_runs(cell.paragraphs[0], text)
+		else:
+			add_runs(document.add_paragraph(style=style_name), content)
+	document.save(docx_path)
+
+
+class DocxWriterTests(unittest.TestCase):
+	"""The writer builds python-docx's XML elements itself; these fail on a python-docx it does not support."""
+
+	def setUp(self) -> None:
+		temp_dir = tempfile.TemporaryDirectory()
+		self.addCleanup(temp_dir.cleanup)
+		self.temp_dir = Path(temp_dir.name)
+		self.blocks = list(main.iter_markdown_blocks(SAMPLE_MARKDOWN))
+
+	def read_part(self, docx_path: Path, name: str) -> bytes:
+		with zipfile.ZipFile(docx_path) as package:
+			return package.read(name)
+
+	def test_output_matches_the_public_api(self) -> None:
+		# Numbered lists are left out: python-docx has no public API to restart them
+		blocks = [(style, content) for style, content in self.blocks if style != "List Number"]
+		main.write_docx(blocks, self.temp_dir / "writer.docx")
+		write_with_public_api(blocks, self.temp_dir / "reference.docx")
+		self.assertEqual(
+			self.read_part(self.temp_dir / "writer.docx", "word/document.xml").decode("utf-8"),
+			self.read_part(self.temp_dir / "reference.docx", "word/document.xml").decode("utf-8"),
+		)
+
+	def test_each_numbered_list_restarts_at_one(self) -> None:
+		docx_path = self.temp_dir / "writer.docx"
+		main.write_docx(self.blocks, docx_path)
+		body = ElementTree.fromstring(self.read_part(docx_path, "word/document.xml"))
+		num_ids = [
+			num_id.get(f"{WORD_NAMESPACE}val")
+			for num_id in body.iter(f"{WORD_NAMESPACE}numId")
+		]
+		self.assertEqual(len(num_ids), 3)
+		self.assertEqual(num_ids[0], num_ids[1])
+		self.assertNotEqual(num_ids[1], num_ids[2])
+
+		numbering = ElementTree.fromstring(self.read_part(docx_path, "word/numbering.xml"))
+		starts = {
+			num.get(f"{WORD_NAMESPACE}numId"): num.find(f"{WORD_NAMESPACE}lvlOverride/{WORD_NAMESPACE}startOverride")
+			for num in numbering.iter(f"{WORD_NAMESPACE}num")
+		}
+		for num_id in set(num_ids):
+			self.assertEqual(starts[num_id].get(f"{WORD_NAMESPACE}val"), "1")
+
+
+if __name__ == "__main__":
+	unittest.main()
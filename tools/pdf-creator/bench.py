@@ -0,0 +1,615 @@
+"""
+PDF Creator - Micro-benchmarks
+
+Run from this directory with the same environment as main.py:
+
+    python bench.py generation --documents 200 --spec-rows 500 --revisions 200
+    python bench.py sampling --products 1000000
+    python bench.py catalog --sizes 10 100 1000 5000
+    python bench.py fragments --documents 200
+    python bench.py bundle --documents 50
+    python bench.py profiles --documents 50 --save profiles.json
+
+Regression suite (docs/sec per phase at 10, 100 and 1,000 documents):
+
+    python bench.py run --save baseline.json
+    python bench.py compare baseline.json --threshold 0.15
+
+Cold-start budget for the generate-only path (python -X importtime):
+
+    python bench.py startup --budget-ms 250
+"""
+
+import io
+import os
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import main
+
+
+def build_large_specs(spec_rows: int) -> dict:
+    """Build a synthetic category with the given number of specification rows."""
+    return {
+        "prefix": "BM",
+        "specs": {
+            f"Parameter {i:04d}": [f"Option {i}-{j}" for j in range(4)]
+            for i in range(spec_rows)
+        },
+    }
+
+
+def generate_by_concatenation(product_number: str, category: str, specs: dict, num_revisions: int) -> str:
+    """Build a document by repeated string concatenation (the previous implementation)."""
+    content = ""
+    for piece in main.iter_markdown_sections(product_number, category, specs, num_revisions):
+        content += piece
+    return content
+
+
+def generate_by_join(product_number: str, category: str, specs: dict, num_revisions: int) -> str:
+    """Build a document in memory by joining the streamed sections once."""
+    return "".join(main.iter_markdown_sections(product_number, category, specs, num_revisions))
+
+
+def generate_by_streaming(product_number: str, category: str, specs: dict, num_revisions: int):
+    """Write a document section by section to a file without building it in memory."""
+    with open(os.devnull, 'w', encoding='utf-8') as f:
+        f.writelines(main.iter_markdown_sections(product_number, category, specs, num_revisions))
+
+
+def measure(func: Callable, documents: int, specs: dict, num_revisions: int) -> tuple[float, int]:
+    """Return elapsed seconds and peak traced memory in bytes for generating documents."""
+
+    random.seed(1234)
+    start_time = time.perf_counter()
+    for i in range(documents):
+        func(f"PRD{10000 + i}", "Benchmark Equipment", specs, num_revisions)
+    elapsed = time.perf_counter() - start_time
+
+    # Memory is measured in a separate pass because tracing slows down allocation
+    random.seed(1234)
+    tracemalloc.start()
+    func("PRD10000", "Benchmark Equipment", specs, num_revisions)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def run_generation_benchmark(documents: int, spec_rows: int, revisions: int):
+    """Compare concatenation, join and streaming markdown generation."""
+
+    specs = build_large_specs(spec_rows)
+    sample = generate_by_join("PRD10000", "Benchmark Equipment", specs, revisions)
+
+    print(f"\n{'='*60}")
+    print("Markdown generation benchmark")
+    print(f"{'='*60}")
+    print(f"Documents: {documents}, spec rows: {spec_rows}, revisions: {revisions}")
+    print(f"Document size: {len(sample.encode('utf-8')) / 1024:.1f} KiB\n")
+
+    variants = [
+        ("concatenate", generate_by_concatenation),
+        ("join", generate_by_join),
+        ("stream", generate_by_streaming),
+    ]
+
+    for name, func in variants:
+        elapsed, peak = measure(func, documents, specs, revisions)
+        rate = documents / elapsed if elapsed > 0 else 0.0
+        print(f"  {name:<12} {elapsed:8.3f}s  {rate:10.1f} docs/sec  peak {peak / 1024:10.1f} KiB")
+
+    print()
+
+
+def run_sampling_benchmark(products: int, seed: int):
+    """Time vectorized attribute sampling for a large catalog."""
+
+    start_time = time.perf_counter()
+    table = main.sample_product_table(products, seed)
+    elapsed = time.perf_counter() - start_time
+
+    # Rendering records is per product, so time a sample of rows only
+    rows = min(products, 10000)
+    start_time = time.perf_counter()
+    for index in range(rows):
+        table.record(index, f"PRD{10000 + index % main.PRODUCT_NUMBER_SPACE}")
+    record_elapsed = time.perf_counter() - start_time
+
+    table_bytes = sum(getattr(table, field.name).nbytes for field in fields(main.ProductTable))
+
+    print(f"\n{'='*60}")
+    print("Batch sampling benchmark")
+    print(f"{'='*60}")
+    print(f"  Sampled {products} products in {elapsed:.3f}s ({products / elapsed:,.0f} products/sec)")
+    print(f"  Table size: {table_bytes / (1024 * 1024):.1f} MiB")
+    print(f"  Built {rows} records in {record_elapsed:.3f}s ({rows / record_elapsed:,.0f} records/sec)\n")
+
+
+def run_catalog_benchmark(sizes: list[int], samples: int, seed: int):
+    """Time catalog loading (parse vs compiled cache) and weighted category sampling."""
+    import numpy as np
+    from catalog import load_catalog
+
+    print(f"\n{'='*60}")
+    print("Catalog benchmark (20 specs x 10 options per category, weighted)")
+    print(f"{'='*60}")
+    print(f"  {'categories':>10} {'parse':>10} {'cached':>10} {'sampling':>16}")
+
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in sizes:
+            categories = {
+                f"Category {i:05d}": {
+                    "prefix": f"C{i:05d}",
+                    "weight": rng.randint(1, 100),
+                    "specs": {f"Spec {j}": [f"Option {j}-{k}" for k in range(10)] for j in range(20)},
+                }
+                for i in range(size)
+            }
+            path = Path(temp_dir) / f"catalog-{size}.json"
+            path.write_text(json.dumps({"categories": categories}), encoding='utf-8')
+
+            start_time = time.perf_counter()
+            load_catalog(str(path), main.SAFETY_STANDARDS, main.WARRANTY_OPTIONS)
+            parse_elapsed = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            catalog = load_catalog(str(path), main.SAFETY_STANDARDS, main.WARRANTY_OPTIONS)
+            cached_elapsed = time.perf_counter() - start_time
+
+            generator = np.random.default_rng(seed)
+            start_time = time.perf_counter()
+            catalog.sample_indexes(generator, samples)
+            sample_elapsed = time.perf_counter() - start_time
+
+            print(f"  {size:>10} {parse_elapsed * 1000:8.1f}ms {cached_elapsed * 1000:8.1f}ms "
+                  f"{samples / sample_elapsed:12,.0f}/sec")
+    print()
+
+
+def build_documents(documents: int, seed: int) -> list[str]:
+    """Generate markdown for a fixed catalog of products."""
+    table = main.sample_product_table(documents, seed)
+    numbers = main.ProductNumberAllocator(seed).allocate(documents)
+    return ["".join(main.iter_product_sections(table.record(i, number))) for i, number in enumerate(numbers)]
+
+
+def run_fragment_benchmark(documents: int, seed: int):
+    """Compare whole-document markdown parsing with the fragment cache."""
+    import markdown
+
+    docs = build_documents(documents, seed)
+
+    start_time = time.perf_counter()
+    for md_content in docs:
+        markdown.markdown(md_content, extensions=['tables', 'fenced_code', 'toc', 'attr_list'])
+    full_elapsed = time.perf_counter() - start_time
+
+    main.convert_markdown_fragment.cache_clear()
+    start_time = time.perf_counter()
+    for md_content in docs:
+        main.render_markdown_to_html(md_content)
+    cached_elapsed = time.perf_counter() - start_time
+    info = main.convert_markdown_fragment.cache_info()
+
+    print(f"\n{'='*60}")
+    print("Markdown to HTML benchmark")
+    print(f"{'='*60}")
+    print(f"Documents: {documents}\n")
+    print(f"  {'full parse':<16} {full_elapsed:8.3f}s  {full_elapsed / documents * 1000:8.2f} ms/doc")
+    print(f"  {'fragment cache':<16} {cached_elapsed:8.3f}s  {cached_elapsed / documents * 1000:8.2f} ms/doc")
+    print(f"\n  Fragment hits: {info.hits}, misses: {info.misses} "
+          f"({info.hits / max(1, info.hits + info.misses):.0%} hit rate)")
+    print(f"  Parse time saved: {1 - cached_elapsed / full_elapsed:.0%}\n")
+
+
+def run_bundle_benchmark(documents: int, seed: int):
+    """Compare one bundled PDF with separate PDFs plus a merge."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        markdown_dir = Path(temp_dir) / "markdown"
+        markdown_dir.mkdir()
+        markdown_files = []
+        for index, md_content in enumerate(build_documents(documents, seed)):
+            md_file = markdown_dir / f"doc{index:05d}.md"
+            md_file.write_text(md_content, encoding='utf-8')
+            markdown_files.append(md_file)
+
+        # Warm up fonts and stylesheet so both variants start equal
+        main.render_pdf_bytes(markdown_files[0].read_text(encoding='utf-8'))
+
+        main.convert_markdown_fragment.cache_clear()
+        start_time = time.perf_counter()
+        separate_pdfs = [main.render_pdf_bytes(md_file.read_text(encoding='utf-8')) for md_file in markdown_files]
+        separate_elapsed = time.perf_counter() - start_time
+        separate_bytes = sum(len(pdf) for pdf in separate_pdfs)
+
+        merge_elapsed = None
+        try:
+            from pypdf import PdfWriter
+        except ImportError:
+            PdfWriter = None
+        if PdfWriter is not None:
+            start_time = time.perf_counter()
+            writer = PdfWriter()
+            for pdf in separate_pdfs:
+                writer.append(io.BytesIO(pdf))
+            merged = io.BytesIO()
+            writer.write(merged)
+            merge_elapsed = time.perf_counter() - start_time
+            separate_bytes = len(merged.getvalue())
+
+        bundle_path = Path(temp_dir) / "bundle.pdf"
+        main.convert_markdown_fragment.cache_clear()
+        start_time = time.perf_counter()
+        pages = main.create_pdf_bundle(markdown_files, bundle_path)
+        bundle_elapsed = time.perf_counter() - start_time
+        bundle_bytes = bundle_path.stat().st_size
+
+    separate_total = separate_elapsed + (merge_elapsed or 0.0)
+
+    print(f"\n{'='*60}")
+    print("PDF bundle benchmark")
+    print(f"{'='*60}")
+    print(f"Documents: {documents}, bundle pages: {pages}\n")
+    if merge_elapsed is None:
+        print(f"  {'separate':<10} {separate_elapsed:8.2f}s  {separate_bytes / 1024:10.1f} KiB (pypdf not installed, merge not measured)")
+    else:
+        print(f"  {'separate':<10} {separate_elapsed:8.2f}s  + merge {merge_elapsed:.2f}s  {separate_bytes / 1024:10.1f} KiB merged")
+    print(f"  {'bundle':<10} {bundle_elapsed:8.2f}s  {bundle_bytes / 1024:10.1f} KiB")
+    print(f"\n  Time saved: {1 - bundle_elapsed / separate_total:.0%}, size saved: {1 - bundle_bytes / separate_bytes:.0%}\n")
+
+
+def render_with_profile(full_html: str, profile: "main.PdfProfile") -> bytes:
+    """Lay out an HTML document and write it to PDF bytes with one output profile."""
+    from weasyprint import HTML
+
+    font_config, stylesheet = main.get_render_resources()
+    document = HTML(string=full_html).render(font_config=font_config, stylesheets=[stylesheet], **profile.options)
+    return document.write_pdf(**profile.write_options())
+
+
+def run_profile_benchmark(documents: int, seed: int, repeat: int, save_path: Optional[str] = None):
+    """Measure render time against output size for every PDF profile."""
+
+    # Markdown is converted up front so only layout and PDF writing are timed
+    html_docs = [main.render_markdown_to_html(md_content) for md_content in build_documents(documents, seed)]
+    results = {}
+
+    for name, profile in main.PDF_PROFILES.items():
+        # The first document warms up fonts for this profile
+        render_with_profile(html_docs[0], profile)
+        best_elapsed = None
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            total_bytes = sum(len(render_with_profile(full_html, profile)) for full_html in html_docs)
+            elapsed = time.perf_counter() - start_time
+            best_elapsed = elapsed if best_elapsed is None else min(best_elapsed, elapsed)
+        results[name] = {
+            "ms_per_doc": best_elapsed / documents * 1000,
+            "kib_per_doc": total_bytes / documents / 1024,
+        }
+
+    reference = results[main.DEFAULT_PDF_PROFILE]
+    print(f"\n{'='*60}")
+    print("PDF profile benchmark (render time against output size)")
+    print(f"{'='*60}")
+    print(f"Documents: {documents}, best of {repeat}\n")
+    print(f"  {'profile':<10} {'ms/doc':>8} {'KiB/doc':>9} {'time':>7} {'size':>7}")
+    for name, result in results.items():
+        time_change = result["ms_per_doc"] / reference["ms_per_doc"] - 1
+        size_change = result["kib_per_doc"] / reference["kib_per_doc"] - 1
+        print(f"  {name:<10} {result['ms_per_doc']:8.1f} {result['kib_per_doc']:9.1f} "
+              f"{time_change:+7.0%} {size_change:+7.0%}")
+    print(f"\n  Changes are relative to the '{main.DEFAULT_PDF_PROFILE}' profile\n")
+
+    if save_path:
+        with open(save_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "tool": "pdf-creator",
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "documents": documents,
+                "profiles": {name: main.PDF_PROFILES[name].options for name in results},
+                "results": results,
+            }, f, indent=2)
+        print(f"Results written to '{save_path}'")
+
+
+SUITE_SIZES = [10, 100, 1000]
+SUITE_SEED = 20240601
+DEFAULT_THRESHOLD = 0.15
+MIN_MEASURE_SECONDS = 0.2
+
+
+def best_rate(func: Callable, items: list, repeat: int) -> float:
+    """Run func over all items repeat times and return the best items/sec.
+    
+    Small inputs are processed repeatedly until a measurement lasts at least
+    MIN_MEASURE_SECONDS, so fast phases are not dominated by timer noise.
+    """
+    best = 0.0
+    for _ in range(repeat):
+        processed = 0
+        start_time = time.perf_counter()
+        while True:
+            for item in items:
+                func(item)
+            processed += len(items)
+            elapsed = time.perf_counter() - start_time
+            if elapsed >= MIN_MEASURE_SECONDS:
+                break
+        best = max(best, processed / elapsed)
+    return best
+
+
+def render_html_to_pdf(full_html: str) -> bytes:
+    """Lay out an HTML document and serialize it to PDF bytes."""
+    from weasyprint import HTML
+
+    font_config, stylesheet = main.get_render_resources()
+    return HTML(string=full_html).render(font_config=font_config, stylesheets=[stylesheet]).write_pdf()
+
+
+def run_suite(sizes: list[int], repeat: int) -> dict:
+    """Measure docs/sec for every phase at every size with fixed inputs."""
+
+    # Fonts and stylesheet are warmed up once, like in a long conversion run
+    main.get_render_resources()
+    results = {"generation": {}, "markdown_html": {}, "html_pdf": {}}
+
+    for size in sizes:
+        table = main.sample_product_table(size, SUITE_SEED)
+        numbers = list(main.ProductNumberAllocator(SUITE_SEED).allocate(size))
+        today = datetime(2024, 6, 1)
+
+        def generate(index: int) -> str:
+            return "".join(main.iter_product_sections(table.record(index, numbers[index], today)))
+
+        docs = [generate(index) for index in range(size)]
+        html_docs = [main.render_markdown_to_html(md_content) for md_content in docs]
+        main.convert_markdown_fragment.cache_clear()
+
+        results["generation"][str(size)] = best_rate(generate, list(range(size)), repeat)
+
+        # Each run starts with a cold fragment cache so the measurement is repeatable
+        to_html = main.render_markdown_to_html
+        rates = []
+        for _ in range(repeat):
+            main.convert_markdown_fragment.cache_clear()
+            start_time = time.perf_counter()
+            for md_content in docs:
+                to_html(md_content)
+            rates.append(size / (time.perf_counter() - start_time))
+        results["markdown_html"][str(size)] = max(rates)
+
+        results["html_pdf"][str(size)] = best_rate(render_html_to_pdf, html_docs, repeat)
+
+        print(f"  {size:>6} docs: " + ", ".join(
+            f"{phase} {results[phase][str(size)]:,.1f}/s" for phase in results))
+
+    return results
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Return a description of every phase that regressed past the threshold."""
+
+    regressions = []
+    print(f"  {'phase':<16} {'size':>6} {'baseline':>12} {'current':>12} {'change':>8}")
+    for phase, by_size in baseline["results"].items():
+        for size, baseline_rate in by_size.items():
+            current_rate = current["results"].get(phase, {}).get(size)
+            if current_rate is None:
+                continue
+            change = current_rate / baseline_rate - 1
+            flag = "  REGRESSION" if change < -threshold else ""
+            print(f"  {phase:<16} {size:>6} {baseline_rate:12.1f} {current_rate:12.1f} {change:+8.1%}{flag}")
+            if flag:
+                regressions.append(f"{phase} @ {size} docs: {change:+.1%}")
+    return regressions
+
+
+def run_suite_command(args: argparse.Namespace):
+    """Run the benchmark suite, optionally saving or comparing against a baseline."""
+
+    baseline = None
+    if args.command == "compare":
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        sizes = sorted({int(size) for by_size in baseline["results"].values() for size in by_size})
+    else:
+        sizes = args.sizes
+
+    if args.command == "compare" and args.current:
+        with open(args.current, 'r', encoding='utf-8') as f:
+            current = json.load(f)
+    else:
+        print(f"\n{'='*60}")
+        print("PDF Creator benchmark suite (docs/sec, higher is better)")
+        print(f"{'='*60}")
+        current = {
+            "tool": "pdf-creator",
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": run_suite(sizes, args.repeat),
+        }
+
+    if args.command == "run":
+        if args.save:
+            with open(args.save, 'w', encoding='utf-8') as f:
+                json.dump(current, f, indent=2)
+            print(f"\nBaseline written to '{args.save}'")
+        return
+
+    print(f"\nComparing with '{args.baseline}' (threshold {args.threshold:.0%})\n")
+    regressions = compare_results(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regressions:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        raise SystemExit(1)
+    print("\n✓ No regressions")
+
+
+STARTUP_BUDGET_MS = 250
+# Modules the generate-only path must never import
+STARTUP_FORBIDDEN = ("weasyprint", "markdown", "multiprocessing")
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Return cumulative microseconds per top-level import from -X importtime output."""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented below the module that triggered them
+        if not name[1:].startswith(" "):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def measure_startup(repeat: int) -> tuple[float, dict[str, int]]:
+    """Time a generate-only CLI run in a fresh interpreter; keep the fastest run."""
+    best_wall, best_imports = None, {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        command = [
+            sys.executable, "-X", "importtime", str(Path(main.__file__).resolve()),
+            "generate", "--count", "1", "--seed", str(SUITE_SEED), "--output", temp_dir,
+        ]
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            completed = subprocess.run(command, capture_output=True, text=True, check=True)
+            wall = time.perf_counter() - start_time
+            if best_wall is None or wall < best_wall:
+                best_wall, best_imports = wall, parse_importtime(completed.stderr)
+    return best_wall, best_imports
+
+
+def run_startup_benchmark(budget_ms: float, repeat: int):
+    """Fail if the generate-only cold start imports more than the budget allows."""
+
+    wall, imports = measure_startup(repeat)
+    import_ms = sum(imports.values()) / 1000
+    forbidden = sorted(name for name in imports if name.split(".")[0] in STARTUP_FORBIDDEN)
+
+    print(f"\n{'='*60}")
+    print("BENCHMARK: Generate-only cold start")
+    print(f"{'='*60}")
+    print(f"  Wall time (best of {repeat}): {wall * 1000:.0f} ms")
+    print(f"  Import time: {import_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    print("  Heaviest imports:")
+    for name, cumulative in sorted(imports.items(), key=lambda item: -item[1])[:8]:
+        print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if import_ms > budget_ms:
+        failures.append(f"import time {import_ms:.0f} ms is over the {budget_ms:.0f} ms budget")
+    if forbidden:
+        failures.append(f"generate imported {', '.join(forbidden)}")
+    if failures:
+        for failure in failures:
+            print(f"\n✗ {failure}")
+        raise SystemExit(1)
+    print("\n✓ Within budget")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="PDF Creator micro-benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gen = subparsers.add_parser("generation", help="Compare markdown generation strategies")
+    gen.add_argument("--documents", type=int, default=200, help="Documents to generate")
+    gen.add_argument("--spec-rows", type=int, default=500, help="Specification rows per document")
+    gen.add_argument("--revisions", type=int, default=200, help="Revision history entries per document")
+
+    sample = subparsers.add_parser("sampling", help="Time vectorized product attribute sampling")
+    sample.add_argument("--products", type=int, default=1_000_000, help="Products to sample")
+    sample.add_argument("--seed", type=int, default=42, help="Sampling seed")
+
+    cat = subparsers.add_parser("catalog", help="Time catalog loading and weighted category sampling")
+    cat.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000], help="Categories per catalog")
+    cat.add_argument("--samples", type=int, default=1_000_000, help="Categories to sample per catalog")
+    cat.add_argument("--seed", type=int, default=42, help="Catalog seed")
+
+    frag = subparsers.add_parser("fragments", help="Compare full markdown parsing with the fragment cache")
+    frag.add_argument("--documents", type=int, default=200, help="Documents to convert")
+    frag.add_argument("--seed", type=int, default=42, help="Catalog seed")
+
+    bundle = subparsers.add_parser("bundle", help="Compare a PDF bundle with separate PDFs plus a merge")
+    bundle.add_argument("--documents", type=int, default=50, help="Documents to bundle")
+    bundle.add_argument("--seed", type=int, default=42, help="Catalog seed")
+
+    prof = subparsers.add_parser("profiles", help="Compare render time and PDF size of every output profile")
+    prof.add_argument("--documents", type=int, default=50, help="Documents to render per profile")
+    prof.add_argument("--seed", type=int, default=42, help="Catalog seed")
+    prof.add_argument("--repeat", type=int, default=3, help="Runs per profile (fastest is kept)")
+    prof.add_argument("--save", metavar="FILE", help="Write the results as JSON")
+
+    run = subparsers.add_parser("run", help="Run the benchmark suite for every phase")
+    run.add_argument("--sizes", type=int, nargs="+", default=SUITE_SIZES, help="Document counts to measure")
+    run.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    run.add_argument("--save", metavar="FILE", help="Write results as a JSON baseline")
+
+    compare = subparsers.add_parser("compare", help="Fail if any phase regressed against a baseline")
+    compare.add_argument("baseline", help="Baseline JSON written by 'run --save'")
+    compare.add_argument("--current", metavar="FILE", help="Compare this results file instead of re-running")
+    compare.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Allowed slowdown as a fraction (default: {DEFAULT_THRESHOLD})",
+    )
+
+    startup = subparsers.add_parser("startup", help="Fail if generate-only cold start is over budget")
+    startup.add_argument(
+        "--budget-ms",
+        type=float,
+        default=STARTUP_BUDGET_MS,
+        help=f"Allowed import time in milliseconds (default: {STARTUP_BUDGET_MS})",
+    )
+    startup.add_argument("--repeat", type=int, default=5, help="Interpreter launches (fastest is kept)")
+
+    return parser.parse_args()
+
+
+def main_cli():
+    """Entry point for the benchmark command line."""
+    args = parse_args()
+    if args.command == "generation":
+        run_generation_benchmark(args.documents, args.spec_rows, args.revisions)
+    elif args.command == "sampling":
+        run_sampling_benchmark(args.products, args.seed)
+    elif args.command == "catalog":
+        run_catalog_benchmark(args.sizes, args.samples, args.seed)
+    elif args.command == "fragments":
+        run_fragment_benchmark(args.documents, args.seed)
+    elif args.command == "bundle":
+        run_bundle_benchmark(args.documents, args.seed)
+    elif args.command == "profiles":
+        run_profile_benchmark(args.documents, args.seed, args.repeat, args.save)
+    elif args.command in ("run", "compare"):
+        run_suite_command(args)
+    elif args.command == "startup":
+        run_startup_benchmark(args.budget_ms, args.repeat)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,292 @@
+"""
+PDF Creator - Product Catalog
+
+Loads the product catalog (categories, their spec options and sampling
+weights, safety standards and warranty terms) from JSON, YAML or CSV and
+compiles it into flat tuples plus an alias table, so a category is drawn
+with a given weight in constant time however many categories there are.
+
+The compiled form is cached with marshal next to the source file and reused
+while the source is unchanged, so start-up does not re-parse and re-validate
+a large catalog on every run. Each category's specs are kept as one packed
+string and only unpacked when a product of that category is rendered, so
+loading a cached catalog stays cheap as it grows.
+
+JSON and YAML catalogs look like this (weight defaults to 1; the standards
+and warranty lists default to the built-in ones):
+
+    {
+      "categories": {
+        "Industrial Motors": {
+          "prefix": "IM",
+          "weight": 3,
+          "specs": {"Voltage": ["230V AC", "400V AC"], "Speed": ["1500 RPM"]}
+        }
+      },
+      "safety_standards": ["CE Marking", "UL Listed"],
+      "warranty_options": ["12 months from date of shipment"]
+    }
+
+CSV catalogs have one row per spec option, with the columns category,
+prefix, weight (optional), spec and option.
+"""
+
+import os
+import json
+import marshal
+from dataclasses import dataclass, fields
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import random
+    import numpy as np
+
+
+# Bump when the compiled layout changes so stale caches are rebuilt
+COMPILED_FORMAT = 1
+
+# Separators of the packed spec string: specs by RS, name and options by US
+SPEC_SEPARATOR = "\x1e"
+FIELD_SEPARATOR = "\x1f"
+
+
+def build_alias_table(weights: list[float]) -> tuple[list[float], list[int]]:
+    """Build Vose's alias table for sampling indexes in proportion to weights."""
+    count = len(weights)
+    total = sum(weights)
+    scaled = [weight * count / total for weight in weights]
+    probability = [1.0] * count
+    alias = list(range(count))
+
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        probability[less] = scaled[less]
+        alias[less] = more
+        scaled[more] += scaled[less] - 1.0
+        (small if scaled[more] < 1.0 else large).append(more)
+
+    # Whatever is left is 1.0 up to rounding error
+    return probability, alias
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """A compiled product catalog; category data is indexed by category number."""
+    names: tuple
+    prefixes: tuple
+    packed_specs: tuple
+    option_count_table: tuple
+    weights: tuple
+    safety_standards: tuple
+    warranty_options: tuple
+    alias_probability: tuple
+    alias_index: tuple
+
+    @classmethod
+    def from_mapping(cls, categories: dict, safety_standards: list, warranty_options: list) -> "Catalog":
+        """Validate and compile a {name: {"prefix", "specs", "weight"}} mapping."""
+        if not categories:
+            raise ValueError("The catalog has no categories")
+        if not safety_standards or not warranty_options:
+            raise ValueError("The catalog needs at least one safety standard and one warranty option")
+
+        names, prefixes, packed_specs, option_count_table, weights = [], [], [], [], []
+        for name, category in categories.items():
+            if not category.get("prefix"):
+                raise ValueError(f"Category '{name}' has no prefix")
+            specs = category.get("specs") or {}
+            if not specs:
+                raise ValueError(f"Category '{name}' has no specs")
+            packed = []
+            for spec, options in specs.items():
+                if not options:
+                    raise ValueError(f"Spec '{spec}' of category '{name}' has no options")
+                values = [str(spec)] + [str(option) for option in options]
+                if any(SPEC_SEPARATOR in value or FIELD_SEPARATOR in value for value in values):
+                    raise ValueError(f"Spec '{spec}' of category '{name}' contains a control character")
+                packed.append(FIELD_SEPARATOR.join(values))
+            weight = float(category.get("weight", 1))
+            if weight < 0:
+                raise ValueError(f"Category '{name}' has a negative weight")
+
+            names.append(str(name))
+            prefixes.append(str(category["prefix"]))
+            packed_specs.append(SPEC_SEPARATOR.join(packed))
+            option_count_table.append(tuple(len(options) for options in specs.values()))
+            weights.append(weight)
+
+        if sum(weights) <= 0:
+            raise ValueError("At least one category needs a positive weight")
+        probability, alias = build_alias_table(weights)
+
+        return cls(
+            names=tuple(names),
+            prefixes=tuple(prefixes),
+            packed_specs=tuple(packed_specs),
+            option_count_table=tuple(option_count_table),
+            weights=tuple(weights),
+            safety_standards=tuple(str(standard) for standard in safety_standards),
+            warranty_options=tuple(str(option) for option in warranty_options),
+            alias_probability=tuple(probability),
+            alias_index=tuple(alias),
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @cached_property
+    def uniform(self) -> bool:
+        """True when every category has the same weight."""
+        return len(set(self.weights)) == 1
+
+    @cached_property
+    def max_options(self) -> int:
+        """The largest number of options of any single spec."""
+        return max(max(counts) for counts in self.option_count_table)
+
+    @cached_property
+    def option_counts(self) -> "np.ndarray":
+        """Options per (category, spec slot); unused slots get one dummy option."""
+        import numpy as np
+
+        max_specs = max(len(counts) for counts in self.option_count_table)
+        counts = np.ones((len(self.names), max_specs), dtype=np.int64)
+        for row, row_counts in enumerate(self.option_count_table):
+            counts[row, :len(row_counts)] = row_counts
+        return counts
+
+    @cached_property
+    def _unpacked(self) -> dict:
+        return {}
+
+    def specs(self, index: int) -> tuple[tuple, tuple]:
+        """Return (spec names, options per spec) of one category, unpacking it once."""
+        index = int(index)
+        unpacked = self._unpacked.get(index)
+        if unpacked is None:
+            rows = [spec.split(FIELD_SEPARATOR) for spec in self.packed_specs[index].split(SPEC_SEPARATOR)]
+            unpacked = tuple(row[0] for row in rows), tuple(tuple(row[1:]) for row in rows)
+            self._unpacked[index] = unpacked
+        return unpacked
+
+    @cached_property
+    def _alias_arrays(self) -> tuple["np.ndarray", "np.ndarray"]:
+        import numpy as np
+
+        return np.array(self.alias_probability), np.array(self.alias_index, dtype=np.int64)
+
+    def category(self, index: int) -> dict:
+        """Return one category as {"prefix": ..., "specs": {spec: [options]}}."""
+        spec_names, spec_options = self.specs(index)
+        return {
+            "prefix": self.prefixes[index],
+            "specs": {name: list(options) for name, options in zip(spec_names, spec_options)},
+        }
+
+    def sample_index(self, rng: "random.Random") -> int:
+        """Draw one category index in proportion to the weights in O(1)."""
+        if self.uniform:
+            # Same draw as random.choice, so seeded uniform catalogs keep their output
+            return rng.choice(range(len(self.names)))
+        index = rng.randrange(len(self.names))
+        return index if rng.random() < self.alias_probability[index] else self.alias_index[index]
+
+    def sample_indexes(self, rng: "np.random.Generator", size: int) -> "np.ndarray":
+        """Draw size category indexes in proportion to the weights, vectorized."""
+        import numpy as np
+
+        dtype = np.int16 if len(self.names) <= np.iinfo(np.int16).max else np.int32
+        if self.uniform:
+            return rng.integers(0, len(self.names), size, dtype=dtype)
+        probability, alias = self._alias_arrays
+        index = rng.integers(0, len(self.names), size)
+        keep = rng.random(size) < probability[index]
+        return np.where(keep, index, alias[index]).astype(dtype)
+
+
+def _read_csv_categories(path: Path) -> dict:
+    import csv
+
+    categories = {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                name, spec, option = row["category"], row["spec"], row["option"]
+            except KeyError as e:
+                raise ValueError(f"{path.name}: missing column {e}") from None
+            if not name or not spec or not option:
+                raise ValueError(f"{path.name}:{line}: category, spec and option are required")
+            category = categories.setdefault(name, {"prefix": row.get("prefix"), "specs": {}})
+            if row.get("weight"):
+                category["weight"] = row["weight"]
+            category["specs"].setdefault(spec, []).append(option)
+    return {"categories": categories}
+
+
+def read_catalog_source(path: Path) -> dict:
+    """Parse a JSON, YAML or CSV catalog file into plain data."""
+    suffix = path.suffix.lower()
+    if suffix == ".json":
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    if suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Reading YAML catalogs needs PyYAML (pip install pyyaml)") from None
+        with open(path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f)
+    if suffix == ".csv":
+        return _read_csv_categories(path)
+    raise ValueError(f"Unsupported catalog format '{path.name}', use .json, .yaml or .csv")
+
+
+def compiled_path(path: Path) -> Path:
+    """Return where the compiled form of a catalog file is cached."""
+    return path.with_name(f".{path.name}.compiled")
+
+
+def load_catalog(path: str, safety_standards: list, warranty_options: list,
+                 use_cache: bool = True) -> Catalog:
+    """Load a catalog file, reusing its compiled cache while the file is unchanged.
+
+    safety_standards and warranty_options are used when the file does not
+    list its own.
+    """
+    path = Path(path)
+    stat = path.stat()
+    source_key = [stat.st_mtime_ns, stat.st_size, COMPILED_FORMAT]
+    cache_path = compiled_path(path)
+
+    if use_cache:
+        try:
+            # marshal.loads on the whole file is far faster than marshal.load on a stream
+            cached = marshal.loads(cache_path.read_bytes())
+            if cached["source"] == source_key:
+                return Catalog(**cached["catalog"])
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            pass
+
+    data = read_catalog_source(path) or {}
+    catalog = Catalog.from_mapping(
+        data.get("categories") or {},
+        data.get("safety_standards") or safety_standards,
+        data.get("warranty_options") or warranty_options,
+    )
+
+    if use_cache:
+        compiled = {field.name: getattr(catalog, field.name) for field in fields(catalog)}
+        temp_path = cache_path.with_name(cache_path.name + ".tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                marshal.dump({"source": source_key, "catalog": compiled}, f)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            # A read-only catalog directory only costs the cache
+            pass
+
+    return catalog
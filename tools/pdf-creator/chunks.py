@@ -0,0 +1,227 @@
+"""
+PDF Creator - Section Chunk Export
+
+Splits markdown documents into one chunk per heading and writes the chunks as
+JSON Lines for retrieval ingestion. The splitter consumes the pieces a
+document is generated in, so chunks are written while products are still
+being rendered and nothing is read back from disk.
+
+Each line carries the document ID, a stable chunk ID, the heading path, the
+section text, a token estimate, a content hash and the time of the export
+run that wrote it:
+
+    {"doc_id": "PRD12345", "chunk_id": "PRD12345#1. Product Overview > 1.1 Introduction",
+     "heading_path": ["Product Specification Document", "1. Product Overview", "1.1 Introduction"],
+     "text": "### 1.1 Introduction\\n\\nThe PRD12345 is ...", "token_estimate": 61, "hash": "...",
+     "run": "2026-10-17T08:30:00.000+00:00"}
+
+The export file is a log: every run appends its lines, so a consumer that
+missed a run still finds its changes. The hashes of every exported chunk
+are kept in a state file next to the export. A later export only appends
+the chunks whose hash changed, plus a {"doc_id", "chunk_id", "deleted":
+true, "run"} line for each chunk that disappeared, whether from a document
+that was exported again or with a whole document that was not.
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+HEADING_SEPARATOR = " > "
+
+# One shared encoder is much cheaper than json.dumps with arguments per line
+_encode_line = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of English text at about four characters per token."""
+    return (len(text) + 3) // 4
+
+
+def hash_chunk(text: str) -> str:
+    """Return the digest used to skip unchanged chunks."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def state_path(export_path: Path, shard: tuple[int, int] = (0, 1)) -> Path:
+    """Return where the chunk hashes of an export are kept; each shard keeps its own."""
+    shard_index, shard_count = shard
+    if shard_count == 1:
+        return export_path.with_name(f".{export_path.name}.state.json")
+    return export_path.with_name(f".{export_path.name}.shard-{shard_index}-of-{shard_count}.state.json")
+
+
+def _make_chunk(doc_id: str, headings: list[tuple[int, str]], lines: list[str],
+                seen: dict[str, int]) -> dict:
+    # Horizontal rules only separate sections, they carry nothing to retrieve
+    while lines and lines[-1].strip() in ("", "---"):
+        lines.pop()
+    text = "\n".join(lines)
+
+    # The title is part of every path, so chunk IDs leave it out unless it is all there is
+    titles = [title for _, title in headings]
+    chunk_id = f"{doc_id}#{HEADING_SEPARATOR.join(titles[1:] or titles)}"
+    seen[chunk_id] = seen.get(chunk_id, 0) + 1
+    if seen[chunk_id] > 1:
+        chunk_id += f"~{seen[chunk_id]}"
+
+    return {
+        "doc_id": doc_id,
+        "chunk_id": chunk_id,
+        "heading_path": titles,
+        "text": text,
+        "token_estimate": estimate_tokens(text),
+        "hash": hash_chunk(text),
+    }
+
+
+def iter_section_chunks(doc_id: str, pieces: Iterable[str]) -> Iterator[dict]:
+    """Yield one chunk per heading of a markdown document given piece by piece.
+
+    Pieces may split lines anywhere. Headings inside fenced code blocks do not
+    start a chunk, and sections holding nothing but their heading (a chapter
+    heading directly followed by its first subsection) are not emitted.
+    """
+
+    headings: list[tuple[int, str]] = []
+    lines: list[str] = []
+    has_body = False
+    in_fence = False
+    seen: dict[str, int] = {}
+    pending = ""
+
+    def split_lines():
+        nonlocal pending
+        for piece in pieces:
+            *complete, pending = (pending + piece).split("\n")
+            yield from complete
+        if pending:
+            yield pending
+
+    for line in split_lines():
+        stripped = line.strip()
+        match = None if in_fence else HEADING_PATTERN.match(line)
+        if match:
+            if has_body:
+                yield _make_chunk(doc_id, headings, lines, seen)
+            level = len(match.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, match.group(2)))
+            lines = [line]
+            has_body = False
+            continue
+
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+        if stripped and stripped != "---":
+            has_body = True
+        if lines or stripped:
+            lines.append(line)
+
+    if has_body:
+        yield _make_chunk(doc_id, headings, lines, seen)
+
+
+class ChunkExporter:
+    """Stream the chunks of many documents into one JSON Lines log.
+
+    With incremental set, chunks whose hash matches the previous export of
+    the same file are skipped. Documents of the previous export that are not
+    exported again are marked as deleted; a shard only tracks its own
+    documents, so shards sharing a file do not delete each other's. The run
+    is appended to the log and the state replaced only once close() runs.
+    """
+
+    def __init__(self, path: str, incremental: bool = True, shard: tuple[int, int] = (0, 1)):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.state_path = state_path(self.path, shard)
+        self.incremental = incremental
+        # The previous state is read even for a full export, to find deleted documents
+        self.previous = self._load_state()
+        self.state = {}
+        self.run = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self.documents = self.written = self.unchanged = self.deleted = 0
+
+        self._temp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._temp_path, 'w', encoding='utf-8')
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add_document(self, doc_id: str, pieces: Iterable[str]) -> int:
+        """Export the changed chunks of one document; returns how many were written."""
+        previous = self.previous.get(doc_id, {})
+        skip = previous if self.incremental else {}
+        current = {}
+        written = 0
+        write = self._file.write
+        run = self.run
+
+        for chunk in iter_section_chunks(doc_id, pieces):
+            current[chunk["chunk_id"]] = chunk["hash"]
+            if skip.get(chunk["chunk_id"]) == chunk["hash"]:
+                self.unchanged += 1
+                continue
+            chunk["run"] = run
+            write(_encode_line(chunk))
+            write("\n")
+            written += 1
+
+        self._write_deleted(doc_id, previous.keys() - current.keys())
+        self.state[doc_id] = current
+        self.documents += 1
+        self.written += written
+        return written
+
+    def _write_deleted(self, doc_id: str, chunk_ids: Iterable[str]):
+        write = self._file.write
+        for chunk_id in chunk_ids:
+            write(_encode_line({"doc_id": doc_id, "chunk_id": chunk_id, "deleted": True, "run": self.run}))
+            write("\n")
+            self.deleted += 1
+
+    def close(self):
+        """Append the run to the export and remember its chunk hashes for the next run."""
+        for doc_id in self.previous.keys() - self.state.keys():
+            self._write_deleted(doc_id, self.previous[doc_id])
+        self._file.close()
+
+        # The run is only appended once it is complete, so the log never holds half a run
+        with open(self._temp_path, 'rb') as source, open(self.path, 'ab') as target:
+            shutil.copyfileobj(source, target)
+        os.remove(self._temp_path)
+
+        temp_state = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(temp_state, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, separators=(",", ":"))
+        os.replace(temp_state, self.state_path)
+
+    def abort(self):
+        """Drop a failed run, keeping the export and state as they were."""
+        self._file.close()
+        try:
+            os.remove(self._temp_path)
+        except OSError:
+            pass
@@ -11,18 +11,68 @@ Product numbers follow the format: PRD12345 (PRD + 5 digits)
 
 import os
 import re
+import sys
+import math
+import heapq
+import marshal
+import cProfile
+import json
+import hashlib
+import zlib
 import random
+import time
+import queue
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, as_completed, wait
+from dataclasses import dataclass, fields
+from functools import lru_cache, partial
+from html import escape
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
-import markdown
-from weasyprint import HTML, CSS
-from weasyprint.text.fonts import FontConfiguration
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, TextIO
+
+from memory import peak_rss_mb
+
+# numpy, markdown and WeasyPrint are imported where they are used, so that
+# generating markdown never loads the PDF stack and listing files loads neither
+if TYPE_CHECKING:
+    import markdown
+    from catalog import Catalog
+    from search_index import SearchIndex
+    import numpy as np
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
 
 
 # Configuration
 MARKDOWN_OUTPUT_DIR = "markdown_output"
 PDF_OUTPUT_DIR = "pdf_output"
+MANIFEST_FILENAME = ".manifest.json"
+BUNDLE_FILENAME = "product_catalog.pdf"
+ARCHIVE_FILENAME = "product_catalog.zip"
+CHUNKS_FILENAME = "chunks.jsonl"
+PROFILE_DIR = "profiles"
+
+# Product numbers are PRD followed by five digits
+PRODUCT_NUMBER_MIN = 10000
+PRODUCT_NUMBER_MAX = 99999
+PRODUCT_NUMBER_SPACE = PRODUCT_NUMBER_MAX - PRODUCT_NUMBER_MIN + 1
+PRODUCT_NUMBER_PATTERN = re.compile(r"PRD\d{5}")
+
+# Number of converted markdown sections kept in memory per process
+FRAGMENT_CACHE_SIZE = 1024
+
+# Markdown that makes a section's HTML depend on the rest of the document
+REFERENCE_DEFINITION_PATTERN = re.compile(r"^ {0,3}\[[^\]]+\]:")
+ATX_HEADING_PATTERN = re.compile(r"^ {0,3}#{1,6}\s+(.*?)(?:\s+#+)?\s*$")
+SETEXT_UNDERLINE_PATTERN = re.compile(r"^(?:=+|-+)$")
+
+# Batch sampling draws product attributes in independently seeded blocks
+SAMPLE_BLOCK_SIZE = 65536
+MAX_SAMPLED_REVISIONS = 5
+MAX_SAMPLED_STANDARDS = 7
 
 # Product categories and their specifications
 PRODUCT_CATEGORIES = {
@@ -110,6 +160,7 @@ PRODUCT_CATEGORIES = {
     }
 }
 
+
 # Safety and compliance standards
 SAFETY_STANDARDS = [
     "IEC 61508 (Functional Safety)",
@@ -124,6 +175,20 @@ SAFETY_STANDARDS = [
     "REACH Compliant"
 ]
 
+# Revision history entries
+REVISION_DESCRIPTIONS = [
+    "Initial release",
+    "Updated technical specifications",
+    "Added safety information section",
+    "Revised installation procedures",
+    "Updated electrical diagrams",
+    "Added troubleshooting guide",
+    "Performance data updated",
+    "Compliance certifications added"
+]
+
+REVISION_AUTHORS = ["J. Smith", "M. Johnson", "K. Williams", "R. Brown", "L. Davis"]
+
 # Warranty terms
 WARRANTY_OPTIONS = [
     "12 months from date of shipment",
@@ -135,13 +200,99 @@ WARRANTY_OPTIONS = [
 
 def generate_product_number() -> str:
     """Generate a random product number in format PRD12345."""
-    return f"PRD{random.randint(10000, 99999)}"
+    return f"PRD{random.randint(PRODUCT_NUMBER_MIN, PRODUCT_NUMBER_MAX)}"
+
+
+def _mix64(value: int) -> int:
+    """Scramble a 64-bit integer (SplitMix64 finalizer)."""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & 0xFFFFFFFFFFFFFFFF
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & 0xFFFFFFFFFFFFFFFF
+    return value ^ (value >> 31)
+
+
+class ProductNumberAllocator:
+    """Allocate unique product numbers from a seeded permutation of the PRD space.
+    
+    The 90,000 numbers are treated as a 300 x 300 grid and shuffled with a keyed
+    Feistel network, so index i always maps to the same distinct number for a
+    given seed. Each draw is O(1) and no record of previous numbers is kept.
+    
+    Shard k of n owns the indices k, k + n, k + 2n, ... of the permutation, so
+    independent processes using the same seed never produce the same number.
+    """
+    
+    _RADIX = 300
+    _ROUNDS = 8
+    
+    def __init__(self, seed: int, shard_index: int = 0, shard_count: int = 1):
+        if shard_count < 1 or not 0 <= shard_index < shard_count:
+            raise ValueError(f"Invalid shard {shard_index}/{shard_count}")
+        digest = hashlib.sha256(str(seed).encode('utf-8')).digest()
+        self._key = int.from_bytes(digest[:8], "big")
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+    
+    @property
+    def capacity(self) -> int:
+        """Number of product numbers available to this shard."""
+        return len(range(self.shard_index, PRODUCT_NUMBER_SPACE, self.shard_count))
+    
+    def permute(self, index: int) -> int:
+        """Map an index in [0, 90000) to its position in the shuffled space."""
+        left, right = divmod(index, self._RADIX)
+        for round_number in range(self._ROUNDS):
+            mixed = _mix64((self._key + round_number * 0x9E3779B97F4A7C15 + right) & 0xFFFFFFFFFFFFFFFF)
+            left, right = right, (left + mixed) % self._RADIX
+        return left * self._RADIX + right
+    
+    def number_at(self, index: int) -> str:
+        """Return the product number for the given index within this shard."""
+        global_index = self.shard_index + index * self.shard_count
+        if not 0 <= global_index < PRODUCT_NUMBER_SPACE:
+            raise ValueError(f"Product number index {index} is outside the available space")
+        return f"PRD{PRODUCT_NUMBER_MIN + self.permute(global_index)}"
+    
+    def allocate(self, count: int) -> Iterator[str]:
+        """Yield the first count product numbers of this shard."""
+        if count > self.capacity:
+            raise ValueError(
+                f"Cannot allocate {count} unique product numbers; "
+                f"only {self.capacity} are available"
+            )
+        return (self.number_at(index) for index in range(count))
+
+
+_catalog: Optional["Catalog"] = None
+
+
+def get_catalog() -> "Catalog":
+    """Return the active product catalog, compiling the built-in one on first use."""
+    global _catalog
+    
+    if _catalog is None:
+        from catalog import Catalog
+        _catalog = Catalog.from_mapping(PRODUCT_CATEGORIES, SAFETY_STANDARDS, WARRANTY_OPTIONS)
+    return _catalog
+
+
+def use_catalog(path: str) -> "Catalog":
+    """Make the catalog in a JSON, YAML or CSV file the active one.
+    
+    The built-in safety standards and warranty terms are used when the file
+    does not list its own.
+    """
+    global _catalog
+    from catalog import load_catalog
+    
+    _catalog = load_catalog(path, SAFETY_STANDARDS, WARRANTY_OPTIONS)
+    return _catalog
 
 
 def get_random_category() -> tuple[str, dict]:
-    """Get a random product category and its specifications."""
-    category = random.choice(list(PRODUCT_CATEGORIES.keys()))
-    return category, PRODUCT_CATEGORIES[category]
+    """Get a random product category (drawn by catalog weight) and its specifications."""
+    catalog = get_catalog()
+    index = catalog.sample_index(random)
+    return catalog.names[index], catalog.category(index)
 
 
 def generate_serial_number(prefix: str) -> str:
@@ -150,49 +301,250 @@ def generate_serial_number(prefix: str) -> str:
     return f"{prefix}-{year}-{random.randint(100000, 999999)}"
 
 
-def generate_revision_history() -> list[dict]:
+def revision_label(index: int) -> str:
+    """Return the revision letter(s) for a zero-based index (A..Z, AA, AB, ...)."""
+    label = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(65 + remainder) + label
+    return label
+
+
+def generate_revision_history(num_revisions: Optional[int] = None) -> list[dict]:
     """Generate revision history for the document."""
     base_date = datetime.now() - timedelta(days=random.randint(365, 1000))
     revisions = []
     
-    revision_descriptions = [
-        "Initial release",
-        "Updated technical specifications",
-        "Added safety information section",
-        "Revised installation procedures",
-        "Updated electrical diagrams",
-        "Added troubleshooting guide",
-        "Performance data updated",
-        "Compliance certifications added"
-    ]
-    
-    num_revisions = random.randint(2, 5)
+    if num_revisions is None:
+        num_revisions = random.randint(2, 5)
     for i in range(num_revisions):
         rev_date = base_date + timedelta(days=i * random.randint(60, 180))
         revisions.append({
-            "revision": f"Rev {chr(65 + i)}",
+            "revision": f"Rev {revision_label(i)}",
             "date": rev_date.strftime("%Y-%m-%d"),
-            "description": revision_descriptions[i] if i < len(revision_descriptions) else "General updates",
-            "author": random.choice(["J. Smith", "M. Johnson", "K. Williams", "R. Brown", "L. Davis"])
+            "description": REVISION_DESCRIPTIONS[i] if i < len(REVISION_DESCRIPTIONS) else "General updates",
+            "author": random.choice(REVISION_AUTHORS)
         })
     
     return revisions
 
 
-def generate_markdown_content(product_number: str, category: str, specs: dict) -> str:
-    """Generate comprehensive markdown content for a product."""
+@dataclass
+class ProductRecord:
+    """All randomly chosen attributes needed to render one product document."""
+    product_number: str
+    category: str
+    serial_number: str
+    revisions: list[dict]
+    specs: dict[str, str]
+    width: int
+    height: int
+    depth: int
+    weight: int
+    standards: list[str]
+    warranty: str
+    mounting_pcd: int
+    issue_date: Optional[datetime] = None
+
+
+def sample_product(product_number: str, category: str, specs: dict,
+                   num_revisions: Optional[int] = None) -> ProductRecord:
+    """Sample the attributes of a single product using the random module."""
     
     serial_number = generate_serial_number(specs["prefix"])
-    revision_history = generate_revision_history()
-    current_revision = revision_history[-1]["revision"]
+    revisions = generate_revision_history(num_revisions)
     
     # Select random specifications
     selected_specs = {}
     for spec_name, options in specs["specs"].items():
         selected_specs[spec_name] = random.choice(options)
     
+    width = random.randint(200, 800)
+    height = random.randint(300, 1000)
+    depth = random.randint(150, 600)
+    weight = random.randint(15, 250)
+    catalog = get_catalog()
+    standards = random.sample(catalog.safety_standards, min(random.randint(4, 7), len(catalog.safety_standards)))
+    warranty = random.choice(catalog.warranty_options)
+    mounting_pcd = random.randint(150, 400)
+    
+    return ProductRecord(
+        product_number=product_number,
+        category=category,
+        serial_number=serial_number,
+        revisions=revisions,
+        specs=selected_specs,
+        width=width,
+        height=height,
+        depth=depth,
+        weight=weight,
+        standards=standards,
+        warranty=warranty,
+        mounting_pcd=mounting_pcd,
+    )
+
+
+@dataclass
+class ProductTable:
+    """Columnar product attributes sampled for a batch of products.
+    
+    Every column is a NumPy array with one entry (or row) per product. Spec
+    values, standards and warranty are stored as indexes into the catalog.
+    """
+    category: "np.ndarray"
+    serial: "np.ndarray"
+    spec_choices: "np.ndarray"
+    revision_count: "np.ndarray"
+    revision_base_days: "np.ndarray"
+    revision_gaps: "np.ndarray"
+    revision_authors: "np.ndarray"
+    width: "np.ndarray"
+    height: "np.ndarray"
+    depth: "np.ndarray"
+    weight: "np.ndarray"
+    standards_order: "np.ndarray"
+    standards_count: "np.ndarray"
+    warranty: "np.ndarray"
+    mounting_pcd: "np.ndarray"
+    
+    def __len__(self) -> int:
+        return len(self.category)
+    
+    def record(self, index: int, product_number: str, today: Optional[datetime] = None) -> ProductRecord:
+        """Build the ProductRecord for one row of the table."""
+        
+        catalog = get_catalog()
+        category = catalog.names[self.category[index]]
+        spec_names, spec_options = catalog.specs(self.category[index])
+        choices = self.spec_choices[index]
+        
+        today = today or datetime.now()
+        base_date = today - timedelta(days=int(self.revision_base_days[index]))
+        revisions = []
+        for i in range(int(self.revision_count[index])):
+            rev_date = base_date + timedelta(days=i * int(self.revision_gaps[index, i]))
+            revisions.append({
+                "revision": f"Rev {revision_label(i)}",
+                "date": rev_date.strftime("%Y-%m-%d"),
+                "description": REVISION_DESCRIPTIONS[i] if i < len(REVISION_DESCRIPTIONS) else "General updates",
+                "author": REVISION_AUTHORS[self.revision_authors[index, i]],
+            })
+        
+        standards_order = self.standards_order[index, :self.standards_count[index]]
+        
+        return ProductRecord(
+            product_number=product_number,
+            category=category,
+            serial_number=f"{catalog.prefixes[self.category[index]]}-{today.year}-{self.serial[index]}",
+            revisions=revisions,
+            specs={name: options[choices[slot]] for slot, (name, options) in enumerate(zip(spec_names, spec_options))},
+            width=int(self.width[index]),
+            height=int(self.height[index]),
+            depth=int(self.depth[index]),
+            weight=int(self.weight[index]),
+            standards=[catalog.safety_standards[i] for i in standards_order],
+            warranty=catalog.warranty_options[self.warranty[index]],
+            mounting_pcd=int(self.mounting_pcd[index]),
+            issue_date=today,
+        )
+
+
+def _sample_distinct(rng: "np.random.Generator", rows: int, population: int, k: int) -> "np.ndarray":
+    """Draw k distinct indexes below population for every row, in random order.
+    
+    Robert Floyd's algorithm takes k draws per row, so the cost does not grow
+    with the population the way sorting a random key per member does.
+    """
+    import numpy as np
+    
+    if population <= 3 * k:
+        # Sorting a handful of keys is still cheaper than k rounds of draws
+        return np.argsort(rng.random((rows, population)), axis=1)[:, :k]
+    
+    chosen = np.empty((rows, k), dtype=np.int64)
+    for slot, limit in enumerate(range(population - k, population)):
+        candidate = rng.integers(0, limit + 1, rows)
+        taken = (chosen[:, :slot] == candidate[:, None]).any(axis=1)
+        chosen[:, slot] = np.where(taken, limit, candidate)
+    # Floyd's algorithm picks a uniform set but not a uniform order
+    return rng.permuted(chosen, axis=1)
+
+
+def _sample_table_block(seed: int, block: int) -> ProductTable:
+    """Sample one fixed-size block of the product table from its own seed."""
+    import numpy as np
+    
+    catalog = get_catalog()
+    rng = np.random.default_rng([seed, block])
+    size = SAMPLE_BLOCK_SIZE
+    
+    category = catalog.sample_indexes(rng, size)
+    spec_choices = rng.integers(0, catalog.option_counts[category])
+    spec_choices = spec_choices.astype(np.uint8 if catalog.max_options <= 256 else np.uint16)
+    standards = len(catalog.safety_standards)
+    standards_order = _sample_distinct(rng, size, standards, min(MAX_SAMPLED_STANDARDS, standards))
+    standards_order = standards_order.astype(np.uint8 if standards <= 256 else np.uint16)
+    
+    return ProductTable(
+        category=category,
+        serial=rng.integers(100000, 1000000, size, dtype=np.int32),
+        spec_choices=spec_choices,
+        revision_count=rng.integers(2, MAX_SAMPLED_REVISIONS + 1, size, dtype=np.uint8),
+        revision_base_days=rng.integers(365, 1001, size, dtype=np.int16),
+        revision_gaps=rng.integers(60, 181, (size, MAX_SAMPLED_REVISIONS), dtype=np.int16),
+        revision_authors=rng.integers(0, len(REVISION_AUTHORS), (size, MAX_SAMPLED_REVISIONS), dtype=np.uint8),
+        width=rng.integers(200, 801, size, dtype=np.int16),
+        height=rng.integers(300, 1001, size, dtype=np.int16),
+        depth=rng.integers(150, 601, size, dtype=np.int16),
+        weight=rng.integers(15, 251, size, dtype=np.int16),
+        standards_order=standards_order,
+        standards_count=np.minimum(rng.integers(4, MAX_SAMPLED_STANDARDS + 1, size, dtype=np.uint8), standards),
+        warranty=rng.integers(0, len(catalog.warranty_options), size,
+                              dtype=np.uint8 if len(catalog.warranty_options) <= 256 else np.uint16),
+        mounting_pcd=rng.integers(150, 401, size, dtype=np.int16),
+    )
+
+
+def sample_product_table(count: int, seed: int, start: int = 0) -> ProductTable:
+    """Sample attributes for products start..start+count in vectorized blocks.
+    
+    Rows are drawn in blocks of SAMPLE_BLOCK_SIZE, each from its own seed, so
+    row i is the same no matter how the range is split between calls.
+    """
+    import numpy as np
+    
+    stop = start + count
+    first_block = start // SAMPLE_BLOCK_SIZE
+    last_block = max(first_block, (stop - 1) // SAMPLE_BLOCK_SIZE)
+    blocks = [_sample_table_block(seed, block) for block in range(first_block, last_block + 1)]
+    
+    offset = start - first_block * SAMPLE_BLOCK_SIZE
+    columns = {}
+    for field in fields(ProductTable):
+        column = np.concatenate([getattr(block, field.name) for block in blocks])
+        columns[field.name] = column[offset:offset + count]
+    
+    return ProductTable(**columns)
+
+
+def iter_product_sections(record: ProductRecord) -> Iterator[str]:
+    """Yield the markdown content for a product piece by piece.
+    
+    Sections and table rows are produced in document order, so callers can
+    write them straight to a file without holding the whole document.
+    """
+    
+    product_number = record.product_number
+    category = record.category
+    serial_number = record.serial_number
+    revision_history = record.revisions
+    current_revision = revision_history[-1]["revision"]
+    selected_specs = record.specs
+    issue_date = record.issue_date or datetime.now()
+    
     # Generate the markdown content
-    content = f"""# Product Specification Document
+    yield f"""# Product Specification Document
 
 ---
 
@@ -204,7 +556,7 @@ def generate_markdown_content(product_number: str, category: str, specs: dict) -
 | **Serial Number** | {serial_number} |
 | **Category** | {category} |
 | **Document Revision** | {current_revision} |
-| **Issue Date** | {datetime.now().strftime("%Y-%m-%d")} |
+| **Issue Date** | {issue_date.strftime("%Y-%m-%d")} |
 | **Classification** | Technical Documentation |
 
 ---
@@ -216,9 +568,9 @@ def generate_markdown_content(product_number: str, category: str, specs: dict) -
 """
     
     for rev in revision_history:
-        content += f"| {rev['revision']} | {rev['date']} | {rev['description']} | {rev['author']} |\n"
+        yield f"| {rev['revision']} | {rev['date']} | {rev['description']} | {rev['author']} |\n"
     
-    content += f"""
+    yield f"""
 ---
 
 ## 1. Product Overview
@@ -256,9 +608,9 @@ This product is intended for use in:
 """
     
     for spec_name, spec_value in selected_specs.items():
-        content += f"| {spec_name} | {spec_value} |\n"
+        yield f"| {spec_name} | {spec_value} |\n"
     
-    content += f"""
+    yield f"""
 ### 2.2 Environmental Specifications
 
 | Parameter | Value |
@@ -299,10 +651,10 @@ This product is intended for use in:
     │                                 │
     └─────────────────────────────────┘
     
-    Width (W):  {random.randint(200, 800)}mm
-    Height (H): {random.randint(300, 1000)}mm
-    Depth (D):  {random.randint(150, 600)}mm
-    Weight:     {random.randint(15, 250)}kg
+    Width (W):  {record.width}mm
+    Height (H): {record.height}mm
+    Depth (D):  {record.depth}mm
+    Weight:     {record.weight}kg
 ```
 
 ### 3.2 Mounting Requirements
@@ -527,18 +879,17 @@ This product complies with the following standards:
 
 """
     
-    selected_standards = random.sample(SAFETY_STANDARDS, random.randint(4, 7))
-    for standard in selected_standards:
-        content += f"- {standard}\n"
+    for standard in record.standards:
+        yield f"- {standard}\n"
     
-    content += f"""
+    yield f"""
 ---
 
 ## 9. Warranty Information
 
 ### 9.1 Standard Warranty
 
-{random.choice(WARRANTY_OPTIONS)}
+{record.warranty}
 
 ### 9.2 Warranty Conditions
 
@@ -658,7 +1009,7 @@ CONTROL CIRCUIT
                                  │
                                  D
                                  
-    Mounting Hole Pattern: 4x M12, PCD = {random.randint(150, 400)}mm
+    Mounting Hole Pattern: 4x M12, PCD = {record.mounting_pcd}mm
 ```
 
 ---
@@ -667,52 +1018,150 @@ CONTROL CIRCUIT
 
 *This document is confidential and proprietary. Reproduction without written consent is prohibited.*
 
-*© {datetime.now().year} Contoso Corporation. All rights reserved.*
+*© {issue_date.year} Contoso Corporation. All rights reserved.*
 """
-    
-    return content
 
 
-def create_markdown_files(num_products: int = 5) -> list[str]:
-    """Generate markdown files for the specified number of products."""
+def iter_markdown_sections(product_number: str, category: str, specs: dict,
+                           num_revisions: Optional[int] = None) -> Iterator[str]:
+    """Sample a product with the random module and yield its markdown piece by piece."""
+    return iter_product_sections(sample_product(product_number, category, specs, num_revisions))
+
+
+def generate_markdown_content(product_number: str, category: str, specs: dict) -> str:
+    """Generate comprehensive markdown content for a product."""
+    return "".join(iter_markdown_sections(product_number, category, specs))
+
+
+def write_markdown_content(file: TextIO, product_number: str, category: str, specs: dict) -> None:
+    """Stream the markdown content for a product to an open text file."""
+    file.writelines(iter_markdown_sections(product_number, category, specs))
+
+
+def write_product_markdown(file: TextIO, record: ProductRecord) -> None:
+    """Stream the markdown content for a sampled product to an open text file."""
+    file.writelines(iter_product_sections(record))
+
+
+def iter_product_records(count: int, seed: int, shard: tuple[int, int] = (0, 1),
+                         today: Optional[datetime] = None) -> Iterator[ProductRecord]:
+    """Return the product records of one shard of a seeded catalog.
+    
+    Shard i of n covers catalog positions i, i + n, i + 2n, ... below count,
+    and every position gets the same product number and attributes whichever
+    shard renders it, so the union of all shards is the single-node catalog.
+    Revision dates and serial numbers count from today (default: the current
+    date), so runs on different days only match when today is pinned.
+    
+    The table is sampled one block at a time, starting at the block of the
+    shard's first position, so memory stays flat however large the catalog.
+    """
+    
+    if count > PRODUCT_NUMBER_SPACE:
+        raise ValueError(
+            f"Cannot generate {count} unique product numbers; "
+            f"only {PRODUCT_NUMBER_SPACE} are available"
+        )
+    
+    shard_index, shard_count = shard
+    positions = range(shard_index, count, shard_count)
+    numbers = ProductNumberAllocator(seed, shard_index, shard_count).allocate(len(positions))
+    # One date for the whole run, even if it goes past midnight
+    today = today or datetime.now()
+    
+    def records():
+        first_block = shard_index // SAMPLE_BLOCK_SIZE
+        for start in range(first_block * SAMPLE_BLOCK_SIZE, count, SAMPLE_BLOCK_SIZE):
+            stop = min(start + SAMPLE_BLOCK_SIZE, count)
+            # First position of this shard at or after start
+            first = start + (shard_index - start) % shard_count
+            if first >= stop:
+                continue
+            table = sample_product_table(stop - start, seed, start)
+            for position in range(first, stop, shard_count):
+                yield table.record(position - start, next(numbers), today)
+    
+    return records()
+
+
+def parse_date(value: str) -> datetime:
+    """Parse a date like '2024-05-31'."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parse a shard specification like '3/10' into (3, 10)."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected i/N (e.g. 0/10)")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected 0 <= i < N")
+    return index, count
+
+
+def open_search_index(markdown_dir: Path) -> "SearchIndex":
+    """Open (creating if needed) the search index of a markdown directory."""
+    from search_index import INDEX_FILENAME, SearchIndex
+    return SearchIndex(Path(markdown_dir) / INDEX_FILENAME)
+
+
+def create_markdown_files(num_products: int = 5, seed: Optional[int] = None,
+                          output_dir: Optional[str] = None, shard: tuple[int, int] = (0, 1),
+                          index: bool = True, today: Optional[datetime] = None) -> list[str]:
+    """Generate markdown files for the specified number of products.
+    
+    Product numbers come from a ProductNumberAllocator and all other
+    attributes from a vectorized ProductTable, so the same seed and date
+    (today, default: the current date) always yield the same catalog. With a
+    shard (i, n), only that shard's slice of the catalog is written. Unless index is False, each document is also
+    added to the search index of the output directory as it is written,
+    from the text already in memory.
+    """
+    
+    if seed is None:
+        seed = random.getrandbits(64)
+    records = iter_product_records(num_products, seed, shard, today)
     
     # Create output directory
-    output_dir = Path(MARKDOWN_OUTPUT_DIR)
-    output_dir.mkdir(exist_ok=True)
+    output_dir = Path(output_dir or MARKDOWN_OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
     
     generated_files = []
-    product_numbers = set()
     
     print(f"\n{'='*60}")
     print("PHASE 1: Generating Markdown Files")
     print(f"{'='*60}\n")
     
-    for i in range(num_products):
-        # Generate unique product number
-        while True:
-            product_number = generate_product_number()
-            if product_number not in product_numbers:
-                product_numbers.add(product_number)
-                break
-        
-        # Get random category
-        category, specs = get_random_category()
-        
-        # Generate content
-        content = generate_markdown_content(product_number, category, specs)
-        
-        # Write to file
-        filename = f"{product_number}_specification.md"
-        filepath = output_dir / filename
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        generated_files.append(str(filepath))
-        print(f"  ✓ Generated: {filename} ({category})")
+    search_index = open_search_index(output_dir) if index else None
+    try:
+        for record in records:
+            filename = f"{record.product_number}_specification.md"
+            filepath = output_dir / filename
+            
+            if search_index is None:
+                # Stream content to file
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    write_product_markdown(f, record)
+            else:
+                content = "".join(iter_product_sections(record))
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                search_index.add(filepath, content)
+            
+            generated_files.append(str(filepath))
+            print(f"  ✓ Generated: {filename} ({record.category})")
+    finally:
+        # Keep the index of whatever was written, even if generation stopped early
+        if search_index is not None:
+            search_index.commit()
+            search_index.close()
     
     print(f"\n{'='*60}")
-    print(f"Generated {len(generated_files)} markdown files in '{MARKDOWN_OUTPUT_DIR}/'")
+    print(f"Generated {len(generated_files)} markdown files in '{output_dir}/'")
     print("You can now edit these files before converting to PDF.")
     print(f"{'='*60}\n")
     
@@ -861,27 +1310,197 @@ def get_pdf_css() -> str:
     """
 
 
-def convert_markdown_to_pdf(markdown_file: str, output_dir: Optional[str] = None) -> str:
-    """Convert a single markdown file to PDF."""
+# Per-process rendering resources, created on first use (see get_render_resources)
+_font_config: Optional["FontConfiguration"] = None
+_stylesheet: Optional["CSS"] = None
+
+
+def get_render_resources() -> tuple["FontConfiguration", "CSS"]:
+    """Return the font configuration and compiled stylesheet for this process."""
+    global _font_config, _stylesheet
     
-    if output_dir is None:
-        output_dir = PDF_OUTPUT_DIR
+    if _stylesheet is None:
+        from weasyprint import CSS
+        from weasyprint.text.fonts import FontConfiguration
+        
+        _font_config = FontConfiguration()
+        _stylesheet = CSS(string=get_pdf_css(), font_config=_font_config)
+    
+    return _font_config, _stylesheet
+
+
+@dataclass(frozen=True)
+class PdfProfile:
+    """WeasyPrint options for one trade-off between render time and file size."""
+    description: str
+    options: dict
+    strip_metadata: bool = False
+    
+    def write_options(self) -> dict:
+        """Return the keyword arguments for write_pdf()."""
+        options = dict(self.options)
+        if self.strip_metadata:
+            options["finisher"] = strip_pdf_metadata
+        return options
+
+
+# Fonts are subset by default, so "fast" saves the subsetting work by embedding them whole
+PDF_PROFILES = {
+    "standard": PdfProfile("WeasyPrint defaults: subset fonts, compressed streams", {}),
+    "fast": PdfProfile(
+        "Embed whole fonts with hinting, skipping subsetting; largest files",
+        {"full_fonts": True, "hinting": True},
+    ),
+    "small": PdfProfile(
+        "Subset fonts without hinting, recompress images at 150 dpi, strip metadata",
+        {"optimize_images": True, "jpeg_quality": 70, "dpi": 150},
+        strip_metadata=True,
+    ),
+    "archival": PdfProfile(
+        "Tagged PDF/A-3b with hinted fonts and lossless image optimization",
+        {"pdf_variant": "pdf/a-3b", "pdf_tags": True, "hinting": True, "optimize_images": True,
+         "custom_metadata": True},
+    ),
+}
+DEFAULT_PDF_PROFILE = "standard"
+
+_pdf_profile_name = DEFAULT_PDF_PROFILE
+
+
+def strip_pdf_metadata(document, pdf) -> None:
+    """WeasyPrint finisher that drops the document information dictionary."""
+    pdf.info.clear()
+
+
+def use_pdf_profile(name: str) -> PdfProfile:
+    """Select the output profile of every PDF written by this process."""
+    global _pdf_profile_name
     
-    # Create output directory
-    Path(output_dir).mkdir(exist_ok=True)
+    if name not in PDF_PROFILES:
+        raise ValueError(f"Unknown PDF profile '{name}', choose from: {', '.join(PDF_PROFILES)}")
+    _pdf_profile_name = name
+    return PDF_PROFILES[name]
+
+
+def get_pdf_profile() -> PdfProfile:
+    """Return the selected output profile."""
+    return PDF_PROFILES[_pdf_profile_name]
+
+
+def render_settings_hash() -> str:
+    """Return the digest of everything besides the markdown that shapes a PDF.
     
-    # Read markdown content
-    with open(markdown_file, 'r', encoding='utf-8') as f:
-        md_content = f.read()
+    A stylesheet or profile change invalidates every previously rendered PDF.
+    The standard profile hashes the stylesheet alone, as before profiles existed.
+    """
+    settings = get_pdf_css()
+    if _pdf_profile_name != DEFAULT_PDF_PROFILE:
+        settings += json.dumps([_pdf_profile_name, get_pdf_profile().options], sort_keys=True)
+    return hash_content(settings.encode('utf-8'))
+
+def split_markdown_fragments(md_content: str) -> list[str]:
+    """Split markdown into the sections separated by horizontal rules.
+    
+    Only '---' lines preceded by a blank line and outside fenced code blocks
+    count as separators. Reference link definitions, footnotes, a [TOC]
+    marker and repeated headings all depend on the rest of the document, so
+    text using any of them is returned whole and parsed in one pass.
+    """
+    from markdown.extensions.toc import slugify
+    
+    fragments = []
+    current = []
+    headings = set()
+    in_fence = False
+    previous = ""
+    
+    for line in md_content.splitlines(keepends=True):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+        elif not in_fence:
+            if "[^" in line or "[TOC]" in line or REFERENCE_DEFINITION_PATTERN.match(line):
+                return [md_content]
+            heading = ATX_HEADING_PATTERN.match(line)
+            if heading:
+                text = heading.group(1)
+            elif previous and SETEXT_UNDERLINE_PATTERN.match(stripped):
+                text = previous
+            else:
+                text = None
+            if text is not None:
+                slug = slugify(text, "-")
+                if slug in headings:
+                    return [md_content]
+                headings.add(slug)
+        if not in_fence and stripped == "---" and not previous:
+            fragments.append("".join(current))
+            current = []
+        else:
+            current.append(line)
+        previous = stripped
+    
+    fragments.append("".join(current))
+    return fragments
+
+
+@lru_cache(maxsize=None)
+def _markdown_converter() -> "markdown.Markdown":
+    """Return the markdown converter reused for every fragment in this process."""
+    import markdown
+    
+    return markdown.Markdown(extensions=['tables', 'fenced_code', 'toc', 'attr_list'])
+
+
+@lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
+def convert_markdown_fragment(fragment: str) -> str:
+    """Convert one markdown fragment to HTML, caching repeated fragments.
+    
+    Boilerplate sections are identical across products, so they are parsed
+    once per process; the cache is keyed by content, so an edited template
+    or document simply misses.
+    """
+    return _markdown_converter().reset().convert(fragment)
+
+
+def render_fragment_html(fragment: str) -> str:
+    """Convert a fragment to HTML, sharing the cache across product numbers.
+    
+    Product numbers are swapped for numbered placeholders before the cache
+    lookup, so sections that differ only by product number parse once.
+    """
+    
+    numbers = list(dict.fromkeys(PRODUCT_NUMBER_PATTERN.findall(fragment)))
+    if not numbers:
+        return convert_markdown_fragment(fragment)
+    
+    template = PRODUCT_NUMBER_PATTERN.sub(lambda m: f"PRDSLOT{numbers.index(m.group())}X", fragment)
+    html = convert_markdown_fragment(template)
+    for slot, number in enumerate(numbers):
+        # Heading ids generated by the toc extension are lower case
+        html = html.replace(f"PRDSLOT{slot}X", number).replace(f"prdslot{slot}x", number.lower())
+    return html
+
+
+def render_markdown_to_html(md_content: str, bookmark_label: Optional[str] = None) -> str:
+    """Convert markdown content to a complete HTML document.
     
-    # Convert markdown to HTML
-    html_content = markdown.markdown(
-        md_content,
-        extensions=['tables', 'fenced_code', 'toc', 'attr_list']
+    When bookmark_label is given, the document title (first h1) appears
+    under that label in the PDF outline instead of its heading text.
+    """
+    
+    # Convert markdown to HTML section by section, reusing cached fragments
+    html_content = "\n<hr />\n".join(
+        render_fragment_html(fragment)
+        for fragment in split_markdown_fragments(md_content)
     )
     
+    if bookmark_label is not None:
+        label = bookmark_label.replace("\\", "\\\\").replace("'", "\\'")
+        html_content = html_content.replace("<h1", f"<h1 style=\"bookmark-label: '{escape(label)}'\"", 1)
+    
     # Wrap in HTML document
-    full_html = f"""
+    return f"""
     <!DOCTYPE html>
     <html>
     <head>
@@ -893,62 +1512,870 @@ def convert_markdown_to_pdf(markdown_file: str, output_dir: Optional[str] = None
     </body>
     </html>
     """
+
+
+def write_pdf_from_markdown(md_content: str, pdf_path: str, timings: Optional[dict] = None) -> str:
+    """Render markdown content to a PDF file.
+    
+    When a timings dict is given, the seconds spent converting markdown to
+    HTML, laying out the document and writing the PDF are stored in it.
+    """
+    
+    from weasyprint import HTML
+    
+    start_time = time.perf_counter()
+    full_html = render_markdown_to_html(md_content)
+    html_done = time.perf_counter()
+    
+    # Fonts and stylesheet are shared by all documents rendered in this process
+    font_config, stylesheet = get_render_resources()
+    profile = get_pdf_profile()
+    
+    # Lay out and create PDF
+    document = HTML(string=full_html).render(font_config=font_config, stylesheets=[stylesheet], **profile.options)
+    layout_done = time.perf_counter()
+    document.write_pdf(str(pdf_path), **profile.write_options())
+    write_done = time.perf_counter()
+    
+    if timings is not None:
+        timings["markdown_s"] = html_done - start_time
+        timings["layout_s"] = layout_done - html_done
+        timings["write_s"] = write_done - layout_done
+        timings["pages"] = len(document.pages)
+    
+    return str(pdf_path)
+
+
+def render_pdf_bytes(md_content: str) -> bytes:
+    """Render markdown content to PDF and return the document bytes."""
+    from weasyprint import HTML
+    
+    full_html = render_markdown_to_html(md_content)
+    font_config, stylesheet = get_render_resources()
+    
+    return HTML(string=full_html).write_pdf(
+        stylesheets=[stylesheet],
+        font_config=font_config,
+        **get_pdf_profile().write_options()
+    )
+
+
+def create_pdf_bundle(markdown_files: list[Path], bundle_path: Path) -> int:
+    """Combine many markdown documents into a single PDF binder.
+    
+    Each document is laid out on its own, so page numbers restart for every
+    product, and the rendered pages are then written as one PDF. Fonts and
+    the stylesheet are resolved once and embedded once. Every product gets a
+    top-level bookmark. Returns the number of pages written.
+    """
+    from weasyprint import HTML
+    
+    font_config, stylesheet = get_render_resources()
+    profile = get_pdf_profile()
+    
+    pages = []
+    first_document = None
+    for md_file in markdown_files:
+        with open(md_file, 'r', encoding='utf-8') as f:
+            md_content = f.read()
+        
+        match = PRODUCT_NUMBER_PATTERN.search(md_file.stem)
+        label = match.group() if match else md_file.stem
+        full_html = render_markdown_to_html(md_content, bookmark_label=label)
+        
+        document = HTML(string=full_html).render(font_config=font_config, stylesheets=[stylesheet], **profile.options)
+        first_document = first_document or document
+        pages.extend(document.pages)
+    
+    if first_document is None:
+        return 0
+    
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    first_document.copy(pages).write_pdf(str(bundle_path), **profile.write_options())
+    return len(pages)
+
+
+def create_bundle_from_markdown_dir(bundle_name: str = BUNDLE_FILENAME) -> Optional[str]:
+    """Bundle every markdown file in the markdown output directory into one PDF."""
+    
+    markdown_files = sorted(Path(MARKDOWN_OUTPUT_DIR).glob("*.md"))
+    if not markdown_files:
+        print(f"No markdown files found in '{MARKDOWN_OUTPUT_DIR}/'")
+        return None
+    
+    print(f"\n{'='*60}")
+    print("BUNDLE: Combining Markdown Files into One PDF")
+    print(f"{'='*60}\n")
+    
+    bundle_path = Path(PDF_OUTPUT_DIR) / bundle_name
+    start_time = time.perf_counter()
+    page_count = create_pdf_bundle(markdown_files, bundle_path)
+    elapsed = time.perf_counter() - start_time
+    
+    print(f"  ✓ Bundled {len(markdown_files)} documents ({page_count} pages) → {bundle_path}")
+    print(f"  Size: {bundle_path.stat().st_size / 1024:.1f} KiB, elapsed: {elapsed:.1f}s")
+    print(f"\n{'='*60}\n")
+    
+    return str(bundle_path)
+
+
+def convert_markdown_to_pdf_timed(markdown_file: str, output_dir: Optional[str] = None,
+                                  profile: bool = False) -> tuple[str, dict]:
+    """Convert a single markdown file to PDF and measure every stage.
+    
+    Returns the PDF path and a timings dict with the seconds spent reading,
+    converting markdown to HTML, laying out (HTML.render) and writing the PDF,
+    plus output bytes and the process peak RSS. With profile set, the dict
+    also carries the raw cProfile statistics of the conversion.
+    """
+    
+    if output_dir is None:
+        output_dir = PDF_OUTPUT_DIR
+    
+    # Create output directory
+    Path(output_dir).mkdir(exist_ok=True)
+    
+    profiler = cProfile.Profile() if profile else None
+    if profiler is not None:
+        profiler.enable()
+    
+    start_time = time.perf_counter()
+    
+    # Read markdown content
+    with open(markdown_file, 'r', encoding='utf-8') as f:
+        md_content = f.read()
+    
+    timings = {"read_s": time.perf_counter() - start_time}
     
     # Generate PDF filename
     md_filename = Path(markdown_file).stem
     pdf_filename = f"{md_filename}.pdf"
     pdf_path = Path(output_dir) / pdf_filename
     
-    # Configure fonts
-    font_config = FontConfiguration()
+    write_pdf_from_markdown(md_content, str(pdf_path), timings)
+    timings["total_s"] = time.perf_counter() - start_time
     
-    # Create PDF
-    HTML(string=full_html).write_pdf(
-        str(pdf_path),
-        stylesheets=[CSS(string=get_pdf_css(), font_config=font_config)],
-        font_config=font_config
-    )
+    if profiler is not None:
+        profiler.disable()
+        profiler.create_stats()
+        timings["profile"] = profiler.stats
     
-    return str(pdf_path)
+    timings["bytes"] = pdf_path.stat().st_size
+    timings["peak_rss_mb"] = peak_rss_mb()
+    timings["pid"] = os.getpid()
+    
+    return str(pdf_path), timings
+
+
+def convert_markdown_to_pdf(markdown_file: str, output_dir: Optional[str] = None) -> str:
+    """Convert a single markdown file to PDF."""
+    return convert_markdown_to_pdf_timed(markdown_file, output_dir)[0]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
 
 
-def convert_all_markdown_to_pdf() -> list[str]:
-    """Convert all markdown files in the markdown output directory to PDF."""
+def print_timing_summary(all_timings: list[dict]):
+    """Print p50/p95/max for every conversion stage."""
     
-    markdown_dir = Path(MARKDOWN_OUTPUT_DIR)
+    print("Per-document timings:")
+    print(f"  {'stage':<12} {'p50':>10} {'p95':>10} {'max':>10}")
+    for stage in ("read_s", "markdown_s", "layout_s", "write_s", "total_s"):
+        values = [timings[stage] for timings in all_timings]
+        print(f"  {stage[:-2]:<12} {percentile(values, 50) * 1000:8.1f}ms "
+              f"{percentile(values, 95) * 1000:8.1f}ms {max(values) * 1000:8.1f}ms")
+    
+    sizes = [timings["bytes"] for timings in all_timings]
+    print(f"  {'bytes':<12} {percentile(sizes, 50):10.0f} {percentile(sizes, 95):10.0f} {max(sizes):10.0f}")
+    
+    rss = [timings["peak_rss_mb"] for timings in all_timings if timings["peak_rss_mb"] is not None]
+    if rss:
+        print(f"  Peak RSS: {max(rss):.1f} MiB")
+
+
+def save_slowest_profiles(slowest: list[tuple[float, str, dict]], profile_dir: Path):
+    """Write cProfile statistics of the slowest documents as .prof files."""
+    
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    for total, md_name, stats in sorted(slowest, reverse=True):
+        profile_path = profile_dir / f"{Path(md_name).stem}.prof"
+        with open(profile_path, 'wb') as f:
+            marshal.dump(stats, f)
+        print(f"  Profile ({total:.2f}s): {profile_path}")
+
+
+def _init_conversion_worker(pdf_profile: Optional[str] = None):
+    """Warm up fonts, stylesheet and markdown converter once when a worker process starts."""
+    if pdf_profile is not None:
+        use_pdf_profile(pdf_profile)
+    get_render_resources()
+    _markdown_converter()
+
+
+def conversion_worker_initializer() -> Callable[[], None]:
+    """Return the pool initializer, which carries the selected PDF profile to spawned workers."""
+    return partial(_init_conversion_worker, _pdf_profile_name)
+
+
+def hash_content(data: bytes) -> str:
+    """Return the SHA-256 hex digest used to detect changed inputs."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def manifest_filename(shard: tuple[int, int] = (0, 1)) -> str:
+    """Return the manifest file name; each shard keeps its own manifest."""
+    shard_index, shard_count = shard
+    if shard_count == 1:
+        return MANIFEST_FILENAME
+    return f".manifest.shard-{shard_index}-of-{shard_count}.json"
+
+
+def load_manifest(pdf_dir: Path, filename: str = MANIFEST_FILENAME, css_hash: Optional[str] = None) -> dict:
+    """Load the build manifest from the PDF output directory.
+    
+    When css_hash differs from the hash the PDFs were rendered with, every
+    entry is kept but its content hash is cleared: the documents are all
+    converted again, while the PDFs of deleted sources can still be found.
+    """
+    manifest_path = pdf_dir / filename
+    
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"css_hash": css_hash, "documents": {}}
+    
+    manifest.setdefault("css_hash", None)
+    manifest.setdefault("documents", {})
+    if css_hash is not None and manifest["css_hash"] != css_hash:
+        manifest["css_hash"] = css_hash
+        for entry in manifest["documents"].values():
+            entry["hash"] = None
+    return manifest
+
+
+def save_manifest(pdf_dir: Path, manifest: dict, filename: str = MANIFEST_FILENAME):
+    """Atomically write the build manifest to the PDF output directory."""
+    pdf_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = pdf_dir / filename
+    temp_path = manifest_path.with_suffix(".tmp")
+    
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    
+    os.replace(temp_path, manifest_path)
+
+
+def create_conversion_pool(workers: int, max_docs_per_worker: Optional[int] = None,
+                           max_worker_rss_mb: Optional[float] = None):
+    """Return the process pool used for PDF conversion.
+    
+    With either limit set, a RecyclingPool replaces workers that convert
+    max_docs_per_worker documents or grow past max_worker_rss_mb, and
+    retries the documents they were working on.
+    """
+    # Importing the process pool pulls in multiprocessing; keep it off the startup path
+    if max_docs_per_worker or max_worker_rss_mb:
+        from pool import RecyclingPool
+        return RecyclingPool(workers, conversion_worker_initializer(), max_docs_per_worker, max_worker_rss_mb)
+    
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=workers, initializer=conversion_worker_initializer())
+
+
+def print_worker_summary(pool):
+    """Print documents, peak RSS and retirement reason of every recycled worker."""
+    worker_stats = getattr(pool, "worker_stats", None)
+    if not worker_stats:
+        return
+    
+    print(f"Workers: {len(worker_stats)} started, {pool.retried} documents retried")
+    for stats in worker_stats:
+        peak = f"{stats.peak_rss_mb:.0f} MiB" if stats.peak_rss_mb is not None else "n/a"
+        print(f"  pid {stats.pid:>7}: {stats.documents:>5} docs, peak RSS {peak:>9}, {stats.retired}")
+
+
+def convert_all_markdown_to_pdf(workers: int = 1, force: bool = False,
+                                timings_path: Optional[str] = None, profile_slowest: int = 0,
+                                input_dir: Optional[str] = None, output_dir: Optional[str] = None,
+                                shard: tuple[int, int] = (0, 1), errors: Optional[list] = None,
+                                max_docs_per_worker: Optional[int] = None,
+                                max_worker_rss_mb: Optional[float] = None) -> list[str]:
+    """Convert all markdown files in the markdown output directory to PDF.
+    
+    Only documents whose markdown or stylesheet changed since the last run
+    (according to the manifest in the PDF output directory) are re-rendered,
+    unless force is set. PDFs whose markdown source was removed are deleted.
+    
+    With workers > 1 the files are converted in a pool of worker processes,
+    each keeping its own font configuration and compiled stylesheet.
+    
+    With timings_path set, per-document stage timings are written there as
+    JSON Lines and summarized at the end; profile_slowest keeps cProfile
+    dumps of that many slowest documents next to it.
+    
+    With a shard (i, n), only files whose name hashes to shard i are
+    converted, so n nodes can split one directory without coordinating.
+    Names of files that failed to convert are appended to errors if given.
+    
+    max_docs_per_worker and max_worker_rss_mb recycle worker processes in
+    long runs (see create_conversion_pool); with either set, conversion runs
+    in worker processes even when workers is 1.
+    """
+    
+    markdown_dir = Path(input_dir or MARKDOWN_OUTPUT_DIR)
+    pdf_dir = Path(output_dir or PDF_OUTPUT_DIR)
     
     if not markdown_dir.exists():
-        print(f"Error: Markdown directory '{MARKDOWN_OUTPUT_DIR}' does not exist.")
+        print(f"Error: Markdown directory '{markdown_dir}' does not exist.")
         print("Please run Phase 1 first to generate markdown files.")
         return []
     
-    markdown_files = list(markdown_dir.glob("*.md"))
+    all_markdown_files = list(markdown_dir.glob("*.md"))
+    shard_index, shard_count = shard
+    markdown_files = [
+        md_file for md_file in all_markdown_files
+        if zlib.crc32(md_file.name.encode('utf-8')) % shard_count == shard_index
+    ]
     
     if not markdown_files:
-        print(f"No markdown files found in '{MARKDOWN_OUTPUT_DIR}/'")
+        print(f"No markdown files found in '{markdown_dir}/'")
         return []
     
     print(f"\n{'='*60}")
     print("PHASE 2: Converting Markdown to PDF")
     print(f"{'='*60}\n")
     
+    # A stylesheet or profile change invalidates every previously rendered PDF
+    css_hash = render_settings_hash()
+    manifest_name = manifest_filename(shard)
+    manifest = load_manifest(pdf_dir, manifest_name, css_hash)
+    documents = manifest["documents"]
+    
+    # Remove PDFs whose markdown source no longer exists
+    source_names = {md_file.name for md_file in all_markdown_files}
+    removed = 0
+    for name in [name for name in documents if name not in source_names]:
+        entry = documents.pop(name)
+        orphan = pdf_dir / entry["pdf"]
+        if orphan.exists():
+            orphan.unlink()
+            removed += 1
+            print(f"  - Removed orphaned PDF: {orphan.name}")
+    
+    pending = {}
+    skipped = 0
+    for md_file in markdown_files:
+        content_hash = hash_content(md_file.read_bytes())
+        entry = documents.get(md_file.name)
+        if (not force and entry is not None and entry["hash"] == content_hash
+                and (pdf_dir / entry["pdf"]).exists()):
+            skipped += 1
+            continue
+        # The entry stays until the conversion succeeds, so a failed file keeps its PDF tracked
+        pending[md_file] = content_hash
+    
     generated_pdfs = []
+    failed = 0
+    pool = None
+    all_timings = []
+    slowest = []
+    profile = profile_slowest > 0
+    timings_file = open(timings_path, 'w', encoding='utf-8') if timings_path else None
+    start_time = time.perf_counter()
+    
+    def record_result(md_file: Path, result: Optional[tuple[str, dict]], error: Optional[Exception]):
+        nonlocal failed
+        if error is not None:
+            failed += 1
+            if errors is not None:
+                errors.append(md_file.name)
+            print(f"  ✗ Error converting {md_file.name}: {str(error)}")
+            return
+        pdf_path, timings = result
+        generated_pdfs.append(pdf_path)
+        documents[md_file.name] = {"hash": pending[md_file], "pdf": Path(pdf_path).name}
+        print(f"  ✓ Converted: {md_file.name} → {Path(pdf_path).name}")
+        
+        # Keep only the profiles of the slowest documents in memory
+        stats = timings.pop("profile", None)
+        if stats is not None:
+            heapq.heappush(slowest, (timings["total_s"], md_file.name, stats))
+            if len(slowest) > profile_slowest:
+                heapq.heappop(slowest)
+        if timings_file is not None:
+            all_timings.append(timings)
+            timings_file.write(json.dumps({"file": md_file.name, **timings}) + "\n")
+    
+    try:
+        if (workers > 1 or max_docs_per_worker or max_worker_rss_mb) and len(pending) > 1:
+            print(f"Using {workers} worker processes\n")
+            pool = create_conversion_pool(workers, max_docs_per_worker, max_worker_rss_mb)
+            with pool as executor:
+                futures = {
+                    executor.submit(convert_markdown_to_pdf_timed, str(md_file), str(pdf_dir), profile): md_file
+                    for md_file in pending
+                }
+                
+                # Report each document as soon as its worker finishes
+                for future in as_completed(futures):
+                    try:
+                        record_result(futures[future], future.result(), None)
+                    except Exception as e:
+                        record_result(futures[future], None, e)
+        else:
+            for md_file in pending:
+                try:
+                    record_result(md_file, convert_markdown_to_pdf_timed(str(md_file), str(pdf_dir), profile), None)
+                except Exception as e:
+                    record_result(md_file, None, e)
+    finally:
+        if timings_file is not None:
+            timings_file.close()
     
-    for md_file in markdown_files:
-        try:
-            pdf_path = convert_markdown_to_pdf(str(md_file))
+    save_manifest(pdf_dir, manifest, manifest_name)
+    
+    elapsed = time.perf_counter() - start_time
+    rate = len(generated_pdfs) / elapsed if elapsed > 0 else 0.0
+    
+    print(f"\n{'='*60}")
+    print(f"Generated {len(generated_pdfs)} PDF files in '{pdf_dir}/'")
+    if skipped:
+        print(f"Skipped {skipped} unchanged files")
+    if removed:
+        print(f"Removed {removed} orphaned PDF files")
+    if failed:
+        print(f"Failed to convert {failed} files")
+    print(f"Elapsed: {elapsed:.1f}s ({rate:.2f} documents/sec)")
+    print_worker_summary(pool)
+    if all_timings:
+        print(f"Timings written to '{timings_path}'")
+        print_timing_summary(all_timings)
+    if slowest:
+        save_slowest_profiles(slowest, Path(timings_path or pdf_dir).parent / PROFILE_DIR)
+    print(f"{'='*60}\n")
+    
+    return generated_pdfs
+
+
+def _write_markdown_copies(write_queue: queue.Queue, index_dir: Optional[Path] = None):
+    """Write (path, content) items from the queue until a None sentinel arrives.
+    
+    With index_dir set, each written file is also added to the search index
+    there; SQLite connections belong to one thread, so it is opened here.
+    """
+    search_index = open_search_index(index_dir) if index_dir is not None else None
+    try:
+        while True:
+            item = write_queue.get()
+            if item is None:
+                break
+            filepath, content = item
+            try:
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                if search_index is not None:
+                    search_index.add(filepath, content)
+            except OSError as e:
+                print(f"  ✗ Error writing {Path(filepath).name}: {str(e)}")
+    finally:
+        if search_index is not None:
+            search_index.commit()
+            search_index.close()
+
+
+def run_pipeline(num_products: int = 5, workers: int = 1, seed: Optional[int] = None,
+                 queue_size: Optional[int] = None, markdown_dir: Optional[str] = None,
+                 pdf_dir: Optional[str] = None, shard: tuple[int, int] = (0, 1),
+                 errors: Optional[list] = None, max_docs_per_worker: Optional[int] = None,
+                 max_worker_rss_mb: Optional[float] = None, index: bool = True,
+                 today: Optional[datetime] = None) -> list[str]:
+    """Generate and convert products in one overlapped pass.
+    
+    Each generated document goes straight to the conversion workers while
+    generation continues, and the markdown review copy is written by a
+    background thread. At most queue_size documents are held in memory at
+    any time (default: two per worker). With a shard (i, n), only that
+    shard's slice of the catalog is built. Worker limits are applied as in
+    convert_all_markdown_to_pdf, and the search index and date as in
+    create_markdown_files.
+    """
+    
+    if seed is None:
+        seed = random.getrandbits(64)
+    if queue_size is None:
+        queue_size = max(1, workers * 2)
+    records = iter_product_records(num_products, seed, shard, today)
+    
+    markdown_dir = Path(markdown_dir or MARKDOWN_OUTPUT_DIR)
+    pdf_dir = Path(pdf_dir or PDF_OUTPUT_DIR)
+    markdown_dir.mkdir(parents=True, exist_ok=True)
+    pdf_dir.mkdir(parents=True, exist_ok=True)
+    
+    print(f"\n{'='*60}")
+    print("PIPELINE: Generating and Converting Products")
+    print(f"{'='*60}\n")
+    print(f"Using {workers} worker processes, up to {queue_size} documents in flight\n")
+    
+    # Converted documents are recorded so a later Phase 2 run can skip them
+    css_hash = render_settings_hash()
+    manifest_name = manifest_filename(shard)
+    manifest = load_manifest(pdf_dir, manifest_name, css_hash)
+    documents = manifest["documents"]
+    
+    write_queue = queue.Queue(maxsize=queue_size)
+    writer = threading.Thread(
+        target=_write_markdown_copies,
+        args=(write_queue, markdown_dir if index else None),
+        daemon=True,
+    )
+    writer.start()
+    
+    generated_pdfs = []
+    failed = 0
+    in_flight = {}
+    start_time = time.perf_counter()
+    
+    def collect(done):
+        nonlocal failed
+        for future in done:
+            md_name, content_hash = in_flight.pop(future)
+            try:
+                pdf_path = future.result()
+            except Exception as e:
+                failed += 1
+                if errors is not None:
+                    errors.append(md_name)
+                print(f"  ✗ Error converting {md_name}: {str(e)}")
+                continue
             generated_pdfs.append(pdf_path)
-            print(f"  ✓ Converted: {md_file.name} → {Path(pdf_path).name}")
-        except Exception as e:
-            print(f"  ✗ Error converting {md_file.name}: {str(e)}")
+            documents[md_name] = {"hash": content_hash, "pdf": Path(pdf_path).name}
+            print(f"  ✓ Converted: {md_name} → {Path(pdf_path).name}")
+    
+    pool = create_conversion_pool(workers, max_docs_per_worker, max_worker_rss_mb)
+    try:
+        with pool as executor:
+            for record in records:
+                # Wait for a free slot so memory stays bounded by the queue size
+                if len(in_flight) >= queue_size:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                
+                content = "".join(iter_product_sections(record))
+                md_name = f"{record.product_number}_specification.md"
+                pdf_path = pdf_dir / f"{record.product_number}_specification.pdf"
+                
+                write_queue.put((markdown_dir / md_name, content))
+                future = executor.submit(write_pdf_from_markdown, content, str(pdf_path))
+                # Text mode writes os.linesep, so hash what ends up on disk
+                in_flight[future] = (md_name, hash_content(content.replace("\n", os.linesep).encode('utf-8')))
+            
+            collect(wait(in_flight).done)
+    finally:
+        write_queue.put(None)
+        writer.join()
+        save_manifest(pdf_dir, manifest, manifest_name)
+    
+    elapsed = time.perf_counter() - start_time
+    rate = len(generated_pdfs) / elapsed if elapsed > 0 else 0.0
     
     print(f"\n{'='*60}")
-    print(f"Generated {len(generated_pdfs)} PDF files in '{PDF_OUTPUT_DIR}/'")
+    print(f"Generated {len(generated_pdfs) + failed} markdown files in '{markdown_dir}/'")
+    print(f"Generated {len(generated_pdfs)} PDF files in '{pdf_dir}/'")
+    if failed:
+        print(f"Failed to convert {failed} files")
+    print(f"Elapsed: {elapsed:.1f}s ({rate:.2f} documents/sec)")
+    print_worker_summary(pool)
     print(f"{'='*60}\n")
     
     return generated_pdfs
 
 
+class ArchiveWriter:
+    """Append in-memory files to a zip or tar archive chosen by its extension.
+    
+    .zip archives store PDFs as they are (they are already compressed) and
+    deflate markdown; .tar, .tar.gz/.tgz and .tar.xz are written as a stream.
+    The archive is built under a temporary name and moved into place on a
+    clean close, so a failed run never leaves a truncated archive behind.
+    """
+    
+    def __init__(self, archive_path: str):
+        self.path = Path(archive_path)
+        self.temp_path = self.path.with_name(self.path.name + ".tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        
+        name = self.path.name.lower()
+        if name.endswith(".zip"):
+            import zipfile
+            self._zip = zipfile.ZipFile(self.temp_path, 'w')
+            self._tar = None
+        elif name.endswith((".tar", ".tar.gz", ".tgz", ".tar.xz")):
+            import tarfile
+            mode = "w:gz" if name.endswith(("gz", "tgz")) else "w:xz" if name.endswith("xz") else "w"
+            self._zip = None
+            self._tar = tarfile.open(self.temp_path, mode)
+        else:
+            raise ValueError(f"Unsupported archive type '{self.path.name}', use .zip, .tar, .tar.gz or .tar.xz")
+    
+    def add(self, name: str, data: bytes, compress: bool = True):
+        """Add one file to the archive."""
+        if self._zip is not None:
+            import zipfile
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            self._zip.writestr(info, data)
+        else:
+            import io
+            import tarfile
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            self._tar.addfile(info, io.BytesIO(data))
+    
+    def close(self, keep: bool = True):
+        """Finish the archive and move it into place, or discard it."""
+        (self._zip or self._tar).close()
+        if keep:
+            os.replace(self.temp_path, self.path)
+        else:
+            self.temp_path.unlink(missing_ok=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close(keep=exc_type is None)
+
+
+def create_archive(archive_path: str = ARCHIVE_FILENAME, num_products: int = 5, workers: int = 1,
+                   seed: Optional[int] = None, include_markdown: bool = False,
+                   queue_size: Optional[int] = None, shard: tuple[int, int] = (0, 1),
+                   errors: Optional[list] = None, today: Optional[datetime] = None) -> int:
+    """Generate products and stream their PDFs straight into one archive.
+    
+    Markdown, HTML and PDF bytes stay in memory and nothing but the archive
+    touches the disk. At most queue_size documents are in flight (default:
+    two per worker), and entries are written in catalog order, so the same
+    seed and date always yield an archive with the same layout. Returns the number of
+    PDFs written.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    if seed is None:
+        seed = random.getrandbits(64)
+    if queue_size is None:
+        queue_size = max(1, workers * 2)
+    records = iter_product_records(num_products, seed, shard, today)
+    archive = ArchiveWriter(archive_path)
+    
+    print(f"\n{'='*60}")
+    print("ARCHIVE: Streaming PDFs into One Archive")
+    print(f"{'='*60}\n")
+    
+    written = 0
+    failed = 0
+    start_time = time.perf_counter()
+    
+    def store(stem: str, content: str, result: Callable[[], bytes]):
+        nonlocal written, failed
+        try:
+            pdf_bytes = result()
+        except Exception as e:
+            failed += 1
+            if errors is not None:
+                errors.append(f"{stem}.md")
+            print(f"  ✗ Error converting {stem}.md: {str(e)}")
+            return
+        if include_markdown:
+            archive.add(f"{MARKDOWN_OUTPUT_DIR}/{stem}.md", content.encode('utf-8'))
+        archive.add(f"{PDF_OUTPUT_DIR}/{stem}.pdf", pdf_bytes, compress=False)
+        written += 1
+        print(f"  ✓ Archived: {stem}.pdf ({len(pdf_bytes) / 1024:.1f} KiB)")
+    
+    with archive:
+        if workers <= 1:
+            for record in records:
+                content = "".join(iter_product_sections(record))
+                store(f"{record.product_number}_specification", content, partial(render_pdf_bytes, content))
+        else:
+            # Oldest job first keeps the archive order stable and memory bounded
+            in_flight = deque()
+            with ProcessPoolExecutor(max_workers=workers, initializer=conversion_worker_initializer()) as executor:
+                for record in records:
+                    if len(in_flight) >= queue_size:
+                        store(*in_flight.popleft())
+                    content = "".join(iter_product_sections(record))
+                    in_flight.append((
+                        f"{record.product_number}_specification",
+                        content,
+                        executor.submit(render_pdf_bytes, content).result,
+                    ))
+                while in_flight:
+                    store(*in_flight.popleft())
+    
+    elapsed = time.perf_counter() - start_time
+    rate = written / elapsed if elapsed > 0 else 0.0
+    
+    print(f"\n{'='*60}")
+    print(f"Archived {written} PDF files in '{archive_path}' ({Path(archive_path).stat().st_size / 1024:.1f} KiB)")
+    if failed:
+        print(f"Failed to convert {failed} files")
+    print(f"Elapsed: {elapsed:.1f}s ({rate:.2f} documents/sec)")
+    print(f"{'='*60}\n")
+    
+    return written
+
+
+def export_chunks(export_path: str = CHUNKS_FILENAME, num_products: int = 5, seed: Optional[int] = None,
+                  shard: tuple[int, int] = (0, 1), markdown_dir: Optional[str] = None,
+                  full: bool = False, today: Optional[datetime] = None) -> int:
+    """Append the section chunks of generated products to a JSON Lines log.
+    
+    Products are chunked as their sections are generated, without writing
+    markdown files. With markdown_dir, the (possibly edited) files in that
+    directory are chunked instead. Unless full is set, chunks that are
+    unchanged since the last export to the same path are skipped. Chunks of
+    documents missing from this run are marked as deleted. Returns the
+    number of chunks written.
+    """
+    from chunks import ChunkExporter
+    
+    if markdown_dir is not None:
+        paths = sorted(Path(markdown_dir).glob("*.md"))
+        documents = ((path.stem.split("_")[0], [path.read_text(encoding='utf-8')]) for path in paths)
+    else:
+        if seed is None:
+            seed = random.getrandbits(64)
+        documents = (
+            (record.product_number, iter_product_sections(record))
+            for record in iter_product_records(num_products, seed, shard, today)
+        )
+    
+    print(f"\n{'='*60}")
+    print("EXPORT: Streaming Section Chunks as JSON Lines")
+    print(f"{'='*60}\n")
+    
+    start_time = time.perf_counter()
+    scope = (0, 1) if markdown_dir is not None else shard
+    with ChunkExporter(export_path, incremental=not full, shard=scope) as exporter:
+        for doc_id, pieces in documents:
+            exporter.add_document(doc_id, pieces)
+    elapsed = time.perf_counter() - start_time
+    
+    print(f"Exported {exporter.written} chunks of {exporter.documents} documents to '{export_path}'")
+    if exporter.unchanged or exporter.deleted:
+        print(f"Skipped {exporter.unchanged} unchanged chunks, marked {exporter.deleted} as deleted")
+    print(f"Elapsed: {elapsed:.2f}s")
+    print(f"{'='*60}\n")
+    
+    return exporter.written
+
+
+def watch_markdown_dir(workers: int = 1, input_dir: Optional[str] = None,
+                       output_dir: Optional[str] = None, debounce: float = 0.3,
+                       polling: bool = False, poll_interval: float = 0.5, index: bool = True,
+                       max_docs_per_worker: Optional[int] = None,
+                       max_worker_rss_mb: Optional[float] = None):
+    """Re-render markdown files as they are edited, until interrupted.
+    
+    The directory is first brought up to date incrementally. After that,
+    every debounced batch of saves is checked against the build manifest and
+    only files whose content changed are rendered, either in this process or
+    in a pool of warm workers. A worker that crashes is replaced and its
+    document retried. Deleted files lose their PDF. With index, the search
+    index of the markdown directory follows every batch of edits.
+    """
+    from pool import RecyclingPool
+    from watcher import open_watcher, wait_for_changes
+    
+    markdown_dir = Path(input_dir or MARKDOWN_OUTPUT_DIR)
+    pdf_dir = Path(output_dir or PDF_OUTPUT_DIR)
+    markdown_dir.mkdir(parents=True, exist_ok=True)
+    
+    convert_all_markdown_to_pdf(workers, input_dir=str(markdown_dir), output_dir=str(pdf_dir),
+                                max_docs_per_worker=max_docs_per_worker, max_worker_rss_mb=max_worker_rss_mb)
+    
+    css_hash = render_settings_hash()
+    manifest_name = manifest_filename()
+    manifest = load_manifest(pdf_dir, manifest_name, css_hash)
+    documents = manifest["documents"]
+    
+    executor = None
+    if workers > 1:
+        # Unlike ProcessPoolExecutor, the pool survives a worker crashing on one document
+        executor = RecyclingPool(workers, conversion_worker_initializer(), max_docs_per_worker, max_worker_rss_mb)
+        # Start every worker now so the first edit does not pay for font discovery
+        wait([executor.submit(_init_conversion_worker) for _ in range(workers)])
+    else:
+        _init_conversion_worker()
+    
+    search_index = None
+    if index:
+        search_index = open_search_index(markdown_dir)
+        search_index.sync(markdown_dir)
+    watcher = open_watcher(markdown_dir, "*.md", poll_interval, polling)
+    print(f"Watching '{markdown_dir}/' for changes ({watcher.kind}, Ctrl+C to stop)\n")
+    
+    try:
+        while True:
+            changed = wait_for_changes(watcher, debounce)
+            detected = time.perf_counter()
+            if search_index is not None:
+                search_index.update_files(markdown_dir, changed)
+            
+            pending = {}
+            for name in sorted(changed):
+                md_file = markdown_dir / name
+                if not md_file.exists():
+                    entry = documents.pop(name, None)
+                    if entry is not None and (pdf_dir / entry["pdf"]).exists():
+                        (pdf_dir / entry["pdf"]).unlink()
+                        print(f"  - Removed PDF of deleted file: {entry['pdf']}")
+                    continue
+                content_hash = hash_content(md_file.read_bytes())
+                entry = documents.get(name)
+                if entry is not None and entry["hash"] == content_hash and (pdf_dir / entry["pdf"]).exists():
+                    continue
+                pending[md_file] = content_hash
+            
+            if executor is not None:
+                futures = {
+                    executor.submit(convert_markdown_to_pdf_timed, str(md_file), str(pdf_dir)): md_file
+                    for md_file in pending
+                }
+                results = ((futures[future], future.result) for future in as_completed(futures))
+            else:
+                results = ((md_file, partial(convert_markdown_to_pdf_timed, str(md_file), str(pdf_dir)))
+                           for md_file in pending)
+            
+            for md_file, result in results:
+                try:
+                    pdf_path, timings = result()
+                except Exception as e:
+                    print(f"  ✗ Error converting {md_file.name}: {str(e)}")
+                    continue
+                documents[md_file.name] = {"hash": pending[md_file], "pdf": Path(pdf_path).name}
+                latency = time.perf_counter() - detected
+                print(f"  ✓ {datetime.now():%H:%M:%S} {md_file.name} → {Path(pdf_path).name} "
+                      f"in {latency * 1000:.0f} ms (render {timings['total_s'] * 1000:.0f} ms, "
+                      f"layout {timings['layout_s'] * 1000:.0f} ms)")
+            
+            save_manifest(pdf_dir, manifest, manifest_name)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
+        if search_index is not None:
+            search_index.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
 def list_markdown_files() -> list[str]:
     """List all markdown files in the output directory."""
     markdown_dir = Path(MARKDOWN_OUTPUT_DIR)
@@ -981,13 +2408,240 @@ def print_menu():
     print("  3. List generated markdown files")
     print("  4. List generated PDF files")
     print("  5. Run full pipeline (Phase 1 + Phase 2)")
-    print("  6. Exit")
+    print("  6. Run overlapped pipeline (generate + convert, no edit pause)")
+    print("  7. Create PDF bundle (all markdown files in one PDF)")
+    print("  8. Exit")
     print("-"*60)
 
 
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="PDF Creator - Product Documentation Generator")
+    
+    # Batch subcommands run without prompts; with no subcommand the interactive menu starts
+    subparsers = parser.add_subparsers(dest="command")
+    
+    gen = subparsers.add_parser("generate", help="Generate markdown files without prompting")
+    conv = subparsers.add_parser("convert", help="Convert markdown files to PDF without prompting")
+    build = subparsers.add_parser("build", help="Generate and convert in one overlapped pass")
+    arch = subparsers.add_parser("archive", help="Stream generated PDFs into a zip or tar archive")
+    watch = subparsers.add_parser("watch", help="Re-render markdown files as they are edited")
+    idx = subparsers.add_parser("index", help="Update the search index of a markdown directory")
+    query = subparsers.add_parser("query", help="Look up products in the search index")
+    export = subparsers.add_parser("export", help="Stream section chunks as JSON Lines for retrieval ingestion")
+    
+    def add_shared_argument(subcommands, *flags, **kwargs):
+        """Accept an option before the subcommand (and in the menu) as well as after it."""
+        parser.add_argument(*flags, **kwargs)
+        for sub in subcommands:
+            # SUPPRESS keeps the root-level value when the option is given before the subcommand
+            sub.add_argument(*flags, **{**kwargs, "default": argparse.SUPPRESS})
+    
+    add_shared_argument(
+        (conv, build, arch, watch),
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used for PDF conversion (default: 1)",
+    )
+    add_shared_argument(
+        (conv,),
+        "--force",
+        action="store_true",
+        default=False,
+        help="Re-render every PDF, ignoring the incremental build manifest",
+    )
+    add_shared_argument(
+        (conv,),
+        "--timings",
+        metavar="FILE",
+        help="Write per-document conversion timings as JSON Lines and print a percentile summary",
+    )
+    add_shared_argument(
+        (conv, build, arch, watch),
+        "--pdf-profile",
+        choices=PDF_PROFILES,
+        default=DEFAULT_PDF_PROFILE,
+        help="PDF output profile: fast (whole fonts), small (optimized, no metadata), "
+             f"archival (PDF/A-3b) or standard (default: {DEFAULT_PDF_PROFILE})",
+    )
+    add_shared_argument(
+        (gen, build, arch, export),
+        "--catalog",
+        metavar="FILE",
+        help="Generate products from a JSON, YAML or CSV catalog instead of the built-in one",
+    )
+    add_shared_argument(
+        (conv, build, watch),
+        "--max-docs-per-worker",
+        type=int,
+        metavar="N",
+        help="Replace each conversion worker after it converted N documents",
+    )
+    add_shared_argument(
+        (conv, build, watch),
+        "--max-worker-rss",
+        type=float,
+        metavar="MB",
+        help="Replace conversion workers whose resident memory goes over MB MiB, retrying their document",
+    )
+    add_shared_argument(
+        (conv,),
+        "--profile-slowest",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Save cProfile dumps of the N slowest conversions in a 'profiles' folder",
+    )
+    
+    for sub in (gen, build, arch, export):
+        sub.add_argument("--count", type=int, default=5, help="Number of products in the whole catalog (default: 5)")
+        sub.add_argument("--seed", type=int, help="Catalog seed; required with --shard so shards agree")
+        sub.add_argument(
+            "--date",
+            type=parse_date,
+            metavar="YYYY-MM-DD",
+            help="Date revision histories and serial numbers count from (default: today); "
+                 "pin it so runs on other days reproduce the same catalog",
+        )
+    for sub in (gen, conv, build, arch, export):
+        sub.add_argument(
+            "--shard",
+            type=parse_shard,
+            default=(0, 1),
+            metavar="I/N",
+            help="Only process shard I of N (e.g. 0/10), so N machines can split one job",
+        )
+    
+    gen.add_argument("--output", default=MARKDOWN_OUTPUT_DIR, help=f"Markdown directory (default: {MARKDOWN_OUTPUT_DIR})")
+    conv.add_argument("--input", default=MARKDOWN_OUTPUT_DIR, help=f"Markdown directory (default: {MARKDOWN_OUTPUT_DIR})")
+    conv.add_argument("--output", default=PDF_OUTPUT_DIR, help=f"PDF directory (default: {PDF_OUTPUT_DIR})")
+    build.add_argument("--markdown-dir", default=MARKDOWN_OUTPUT_DIR, help=f"Markdown directory (default: {MARKDOWN_OUTPUT_DIR})")
+    build.add_argument("--output", default=PDF_OUTPUT_DIR, help=f"PDF directory (default: {PDF_OUTPUT_DIR})")
+    arch.add_argument(
+        "--output",
+        default=ARCHIVE_FILENAME,
+        help=f"Archive path; .zip, .tar, .tar.gz or .tar.xz (default: {ARCHIVE_FILENAME})",
+    )
+    watch.add_argument("--input", default=MARKDOWN_OUTPUT_DIR, help=f"Markdown directory (default: {MARKDOWN_OUTPUT_DIR})")
+    watch.add_argument("--output", default=PDF_OUTPUT_DIR, help=f"PDF directory (default: {PDF_OUTPUT_DIR})")
+    watch.add_argument("--debounce", type=float, default=0.3, help="Seconds of quiet before rendering a burst of saves (default: 0.3)")
+    watch.add_argument("--poll", action="store_true", help="Poll modification times instead of using inotify")
+    for sub in (gen, build, watch):
+        sub.add_argument("--no-index", dest="index", action="store_false", help="Do not update the search index")
+    for sub in (idx, query):
+        sub.add_argument("--markdown-dir", default=MARKDOWN_OUTPUT_DIR, help=f"Markdown directory (default: {MARKDOWN_OUTPUT_DIR})")
+    idx.add_argument("--rebuild", action="store_true", help="Re-index every file from scratch")
+    query.add_argument("text", nargs="?", help='Free text in FTS5 syntax, e.g. \'ATEX "force ventilated"\'')
+    query.add_argument("--product", help="Product number, e.g. PRD12345")
+    query.add_argument("--category", help="Category name")
+    query.add_argument(
+        "--spec",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Spec filter, repeatable; a bare VALUE matches any spec (e.g. --spec Enclosure=IP66 --spec '400V AC')",
+    )
+    query.add_argument("--limit", type=int, default=20, help="Maximum products to list (default: 20)")
+    query.add_argument("--refresh", action="store_true", help="Update the index from the files before querying")
+    arch.add_argument("--include-markdown", action="store_true", help="Also store the markdown sources")
+    export.add_argument("--output", default=CHUNKS_FILENAME, help=f"JSON Lines file (default: {CHUNKS_FILENAME})")
+    export.add_argument("--markdown-dir", help="Chunk the markdown files in this directory instead of generating products")
+    export.add_argument("--full", action="store_true", help="Write every chunk, not only those changed since the last export")
+    
+    args = parser.parse_args()
+    if args.command in ("generate", "build", "archive", "export") and args.shard[1] > 1 and args.seed is None:
+        parser.error("--shard requires --seed so every shard samples the same catalog")
+    return args
+
+
+def update_search_index(markdown_dir: str, rebuild: bool = False) -> dict:
+    """Bring the search index of a markdown directory up to date and report it."""
+    with open_search_index(markdown_dir) as search_index:
+        result = search_index.sync(Path(markdown_dir), rebuild)
+    print(f"Indexed {result['indexed']} and removed {result['removed']} of {result['documents']} "
+          f"documents in '{markdown_dir}/' ({result['seconds'] * 1000:.0f} ms)")
+    return result
+
+
+def query_search_index(args: argparse.Namespace) -> int:
+    """Print the products matching a query; exit code 1 means no match."""
+    from search_index import parse_spec_filter
+    
+    if args.refresh:
+        update_search_index(args.markdown_dir)
+    
+    specs = [parse_spec_filter(value) for value in args.spec]
+    start_time = time.perf_counter()
+    with open_search_index(args.markdown_dir) as search_index:
+        total, rows = search_index.search(args.text, args.product, args.category, specs, args.limit)
+        elapsed = time.perf_counter() - start_time
+        
+        for row in rows:
+            print(f"{row['product_number']}  {row['category'] or '-':<28} {Path(args.markdown_dir) / row['file']}")
+            if args.product:
+                for name, value in search_index.specs_of(row["file"]):
+                    print(f"    {name}: {value}")
+    
+    shown = f", showing {len(rows)}" if total > len(rows) else ""
+    print(f"{total} matching products{shown} ({elapsed * 1000:.1f} ms)")
+    return 0 if total else 1
+
+
+def run_batch_command(args: argparse.Namespace) -> int:
+    """Run a non-interactive subcommand and return the process exit code."""
+    errors: list[str] = []
+    
+    try:
+        if args.command == "generate":
+            create_markdown_files(args.count, args.seed, args.output, args.shard, args.index, args.date)
+        elif args.command == "convert":
+            if not Path(args.input).is_dir():
+                print(f"Error: Markdown directory '{args.input}' does not exist.", file=sys.stderr)
+                return 2
+            convert_all_markdown_to_pdf(args.workers, args.force, args.timings, args.profile_slowest,
+                                        args.input, args.output, args.shard, errors,
+                                        args.max_docs_per_worker, args.max_worker_rss)
+        elif args.command == "build":
+            run_pipeline(args.count, args.workers, args.seed, markdown_dir=args.markdown_dir,
+                         pdf_dir=args.output, shard=args.shard, errors=errors,
+                         max_docs_per_worker=args.max_docs_per_worker, max_worker_rss_mb=args.max_worker_rss,
+                         index=args.index, today=args.date)
+        elif args.command == "index":
+            update_search_index(args.markdown_dir, args.rebuild)
+        elif args.command == "query":
+            return query_search_index(args)
+        elif args.command == "watch":
+            watch_markdown_dir(args.workers, args.input, args.output, args.debounce, args.poll,
+                               index=args.index, max_docs_per_worker=args.max_docs_per_worker,
+                               max_worker_rss_mb=args.max_worker_rss)
+        elif args.command == "archive":
+            create_archive(args.output, args.count, args.workers, args.seed, args.include_markdown,
+                           shard=args.shard, errors=errors, today=args.date)
+        elif args.command == "export":
+            export_chunks(args.output, args.count, args.seed, args.shard, args.markdown_dir, args.full, args.date)
+    except (ValueError, OSError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 2
+    
+    return 1 if errors else 0
+
+
 def main():
     """Main entry point for the PDF Creator application."""
     
+    args = parse_args()
+    use_pdf_profile(args.pdf_profile)
+    if args.catalog:
+        try:
+            catalog = use_catalog(args.catalog)
+        except (ValueError, OSError, ImportError) as e:
+            print(f"Error: Cannot load catalog '{args.catalog}': {str(e)}", file=sys.stderr)
+            sys.exit(2)
+        print(f"Using catalog '{args.catalog}' ({len(catalog)} categories)")
+    if args.command:
+        sys.exit(run_batch_command(args))
+    
     print("\n" + "="*60)
     print("  Welcome to PDF Creator")
     print("  Product Documentation Generator")
@@ -997,18 +2651,20 @@ def main():
         print_menu()
         
         try:
-            choice = input("\nEnter your choice (1-6): ").strip()
+            choice = input("\nEnter your choice (1-8): ").strip()
             
             if choice == "1":
                 try:
                     num = int(input("How many products to generate? [5]: ").strip() or "5")
-                    create_markdown_files(num)
                 except ValueError:
                     print("Invalid number. Using default (5).")
-                    create_markdown_files(5)
+                    num = 5
+                create_markdown_files(num)
                     
             elif choice == "2":
-                convert_all_markdown_to_pdf()
+                convert_all_markdown_to_pdf(args.workers, args.force, args.timings, args.profile_slowest,
+                                            max_docs_per_worker=args.max_docs_per_worker,
+                                            max_worker_rss_mb=args.max_worker_rss)
                 
             elif choice == "3":
                 files = list_markdown_files()
@@ -1035,14 +2691,27 @@ def main():
                     num = 5
                 create_markdown_files(num)
                 input("\nPress Enter to continue to PDF generation (or edit files first)...")
-                convert_all_markdown_to_pdf()
+                convert_all_markdown_to_pdf(args.workers, args.force, args.timings, args.profile_slowest,
+                                            max_docs_per_worker=args.max_docs_per_worker,
+                                            max_worker_rss_mb=args.max_worker_rss)
                 
             elif choice == "6":
+                try:
+                    num = int(input("How many products to generate? [5]: ").strip() or "5")
+                except ValueError:
+                    num = 5
+                run_pipeline(num, args.workers, max_docs_per_worker=args.max_docs_per_worker,
+                             max_worker_rss_mb=args.max_worker_rss)
+                
+            elif choice == "7":
+                create_bundle_from_markdown_dir()
+                
+            elif choice == "8":
                 print("\nThank you for using PDF Creator. Goodbye!\n")
                 break
                 
             else:
-                print("\nInvalid choice. Please enter a number between 1 and 6.")
+                print("\nInvalid choice. Please enter a number between 1 and 8.")
                 
         except KeyboardInterrupt:
             print("\n\nOperation cancelled by user.")
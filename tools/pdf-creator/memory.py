@@ -0,0 +1,36 @@
+"""
+PDF Creator - Process Memory
+
+Resident set size readings shared by the per-document timings and the
+recycling worker pool. Both return None where the platform cannot tell.
+"""
+
+import os
+import sys
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Return the current resident set size of a process in MiB, where /proc allows."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", 'r') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Return the peak resident set size of this process in MiB, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
@@ -0,0 +1,270 @@
+"""
+PDF Creator - Recycling Worker Pool
+
+A process pool that replaces workers before long batches let them grow
+without bound. WeasyPrint keeps font and layout caches for the life of a
+process, so a worker is retired after a set number of documents or once its
+resident memory passes a ceiling. Work that was running on a worker that had
+to be stopped or that died is retried on a fresh one.
+
+RecyclingPool is a concurrent.futures.Executor, so submit(), map(),
+as_completed() and wait() work as they do with ProcessPoolExecutor.
+"""
+
+import threading
+import traceback
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from multiprocessing.connection import wait as wait_connections
+from typing import Callable, Optional
+
+from memory import current_rss_mb, peak_rss_mb
+
+
+RSS_CHECK_INTERVAL = 0.25
+
+
+def _worker_main(conn, initializer: Optional[Callable]):
+    """Run tasks received on conn until a None sentinel arrives."""
+    if initializer is not None:
+        initializer()
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        task_id, fn, args, kwargs = task
+        try:
+            ok, result = True, fn(*args, **kwargs)
+        except BaseException as e:
+            ok, result = False, e
+        peak = peak_rss_mb()
+        current = current_rss_mb() or peak
+        try:
+            conn.send((task_id, ok, result, current, peak))
+        except Exception:
+            # The result or exception could not be pickled
+            error = RuntimeError(traceback.format_exc())
+            conn.send((task_id, False, error, current, peak))
+    conn.close()
+
+
+class WorkerDiedError(RuntimeError):
+    """A task was lost with its worker more often than the retry limit allows."""
+
+
+@dataclass
+class WorkerStats:
+    """What one worker process did before it was retired."""
+
+    pid: int
+    documents: int = 0
+    peak_rss_mb: Optional[float] = None
+    retired: str = "running"
+
+
+@dataclass
+class _Task:
+    task_id: int
+    fn: Callable
+    args: tuple
+    kwargs: dict
+    future: Future
+    attempts: int = 0
+
+
+@dataclass
+class _Worker:
+    process: multiprocessing.Process
+    conn: object
+    stats: WorkerStats
+    task: Optional[_Task] = None
+
+
+class RecyclingPool(Executor):
+    """Process pool that retires workers by document count or memory ceiling.
+
+    max_tasks_per_worker retires a worker after it finished that many tasks.
+    max_rss_mb retires a worker whose resident memory is above the ceiling
+    after a task; a worker that crosses it while still working is stopped
+    and its task is retried, at most max_retries times per task.
+    """
+
+    def __init__(self, max_workers: int, initializer: Optional[Callable] = None,
+                 max_tasks_per_worker: Optional[int] = None, max_rss_mb: Optional[float] = None,
+                 max_retries: int = 2):
+        self.max_workers = max(1, max_workers)
+        self.initializer = initializer
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_rss_mb = max_rss_mb
+        self.max_retries = max_retries
+        self.worker_stats: list[WorkerStats] = []
+        self.retried = 0
+
+        self._context = multiprocessing.get_context()
+        self._pending: deque[_Task] = deque()
+        self._workers: list[_Worker] = []
+        self._lock = threading.Lock()
+        self._wakeup_reader, self._wakeup_writer = self._context.Pipe(duplex=False)
+        self._next_id = 0
+        self._shutdown = False
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._pending.append(_Task(self._next_id, fn, args, kwargs, future))
+            self._next_id += 1
+        self._wakeup_writer.send(None)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._pending:
+                    self._pending.popleft().future.cancel()
+        self._wakeup_writer.send(None)
+        if wait:
+            self._thread.join()
+
+    def _start_worker(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn, self.initializer), daemon=True)
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn, WorkerStats(process.pid))
+        self._workers.append(worker)
+        self.worker_stats.append(worker.stats)
+
+    def _retire(self, worker: _Worker, reason: str, kill: bool = False):
+        if kill:
+            worker.process.terminate()
+        else:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        worker.process.join()
+        worker.conn.close()
+        worker.stats.retired = reason
+        self._workers.remove(worker)
+
+    def _retry(self, worker: _Worker, reason: str):
+        task, worker.task = worker.task, None
+        task.attempts += 1
+        if task.attempts > self.max_retries:
+            task.future.set_exception(WorkerDiedError(
+                f"Task failed {task.attempts} times because its worker {reason}"
+            ))
+            return
+        self.retried += 1
+        with self._lock:
+            self._pending.appendleft(task)
+
+    def _assign(self):
+        with self._lock:
+            idle = [worker for worker in self._workers if worker.task is None]
+            while self._pending and (idle or len(self._workers) < self.max_workers):
+                task = self._pending.popleft()
+                if not task.future.running() and not task.future.set_running_or_notify_cancel():
+                    continue
+                if not idle:
+                    self._start_worker()
+                    idle.append(self._workers[-1])
+                worker = idle.pop()
+                try:
+                    worker.conn.send((task.task_id, task.fn, task.args, task.kwargs))
+                except OSError:
+                    # The idle worker died since its last task; the task never
+                    # reached it, so it goes back to the queue for a new worker
+                    self._pending.appendleft(task)
+                    self._retire(worker, f"died (exit code {worker.process.exitcode})", kill=True)
+                    continue
+                except Exception as e:
+                    # The task could not be pickled; nothing was written to the pipe
+                    task.future.set_exception(e)
+                    idle.append(worker)
+                    continue
+                worker.task = task
+
+    def _collect(self, worker: _Worker):
+        task_id, ok, result, current, peak = worker.conn.recv()
+        task, worker.task = worker.task, None
+        worker.stats.documents += 1
+        if peak is not None:
+            worker.stats.peak_rss_mb = max(worker.stats.peak_rss_mb or 0.0, peak)
+        if ok:
+            task.future.set_result(result)
+        else:
+            task.future.set_exception(result)
+
+        if self.max_tasks_per_worker and worker.stats.documents >= self.max_tasks_per_worker:
+            self._retire(worker, "max documents")
+        elif self.max_rss_mb and current is not None and current > self.max_rss_mb:
+            self._retire(worker, "memory ceiling")
+
+    def _check_memory(self):
+        if not self.max_rss_mb:
+            return
+        for worker in list(self._workers):
+            rss = current_rss_mb(worker.process.pid)
+            if worker.task is not None and rss is not None and rss > self.max_rss_mb:
+                worker.stats.peak_rss_mb = max(worker.stats.peak_rss_mb or 0.0, rss)
+                self._retry(worker, "went over the memory ceiling")
+                self._retire(worker, "memory ceiling (stopped)", kill=True)
+
+    def _dispatch(self):
+        try:
+            self._run()
+        except BaseException as e:
+            self._fail_outstanding(e)
+            raise
+
+    def _fail_outstanding(self, error: BaseException):
+        """Fail every future still waiting when the dispatch thread stops abnormally."""
+        with self._lock:
+            self._shutdown = True
+            tasks = [worker.task for worker in self._workers if worker.task is not None]
+            tasks += self._pending
+            self._pending.clear()
+        for task in tasks:
+            if not task.future.done():
+                task.future.set_exception(RuntimeError(f"Worker pool stopped: {error!r}"))
+        for worker in list(self._workers):
+            self._retire(worker, "pool stopped", kill=True)
+
+    def _run(self):
+        while True:
+            self._assign()
+            with self._lock:
+                busy = [worker for worker in self._workers if worker.task is not None]
+                if self._shutdown and not busy and not self._pending:
+                    break
+
+            waitables = [self._wakeup_reader]
+            for worker in busy:
+                waitables += [worker.conn, worker.process.sentinel]
+            ready = wait_connections(waitables, RSS_CHECK_INTERVAL if self.max_rss_mb else None)
+
+            if self._wakeup_reader in ready:
+                while self._wakeup_reader.poll():
+                    self._wakeup_reader.recv()
+            for worker in busy:
+                if worker.conn in ready:
+                    try:
+                        self._collect(worker)
+                        continue
+                    except (EOFError, OSError):
+                        pass
+                if worker.process.sentinel in ready or not worker.process.is_alive():
+                    self._retry(worker, "died")
+                    self._retire(worker, f"died (exit code {worker.process.exitcode})", kill=True)
+            self._check_memory()
+
+        for worker in list(self._workers):
+            self._retire(worker, "shutdown")
@@ -0,0 +1,272 @@
+"""
+PDF Creator - Search Index
+
+A SQLite index over the generated markdown files. Each document is keyed by
+its file name and carries its product number, category and serial number as
+columns, one row per specification in a separate table, and its full text
+in an FTS5 table, so product-number, spec-filter and free-text lookups are
+answered without reading the files.
+
+The FTS5 table is contentless: it keeps only the index, not a copy of the
+text. An edited document is indexed again under a new row id, and its old
+row is simply no longer referenced. Those stale rows are dropped when they
+outnumber the live ones by rebuilding the text index from the files.
+"""
+
+import re
+import time
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import Iterable, Optional
+
+
+INDEX_FILENAME = ".search_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    file TEXT PRIMARY KEY,
+    product_number TEXT COLLATE NOCASE,
+    category TEXT COLLATE NOCASE,
+    serial_number TEXT,
+    hash TEXT NOT NULL,
+    mtime_ns INTEGER,
+    size INTEGER,
+    text_rowid INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_product ON documents(product_number);
+CREATE INDEX IF NOT EXISTS documents_category ON documents(category);
+CREATE TABLE IF NOT EXISTS specs (
+    file TEXT NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    value TEXT NOT NULL COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS specs_name_value ON specs(name, value);
+CREATE INDEX IF NOT EXISTS specs_value ON specs(value);
+CREATE INDEX IF NOT EXISTS specs_file ON specs(file);
+CREATE VIRTUAL TABLE IF NOT EXISTS document_text USING fts5(body, content='');
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+FIELD_PATTERN = re.compile(r"^\| \*\*(Product Number|Serial Number|Category)\*\* \| (.*?) \|\s*$", re.MULTILINE)
+SPEC_TABLE_HEADER = "| Parameter | Specification |"
+
+
+def hash_text(text: str) -> str:
+    """Return the digest used to detect edited documents."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def parse_document(text: str) -> tuple[dict, list[tuple[str, str]]]:
+    """Extract the document fields and the general specification rows."""
+    fields = {name: value.strip() for name, value in FIELD_PATTERN.findall(text)}
+
+    specs = []
+    start = text.find(SPEC_TABLE_HEADER)
+    if start != -1:
+        # Skip the header and separator rows, then read until the table ends
+        for line in text[start:].splitlines()[2:]:
+            if not line.startswith("|"):
+                break
+            cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+            if len(cells) >= 2 and cells[0]:
+                specs.append((cells[0], cells[1]))
+    return fields, specs
+
+
+def parse_spec_filter(value: str) -> tuple[Optional[str], str]:
+    """Split 'Name=Value' into (name, value); a bare value matches any spec."""
+    name, separator, spec_value = value.partition("=")
+    if not separator:
+        return None, value.strip()
+    return name.strip(), spec_value.strip()
+
+
+class SearchIndex:
+    """Read and update the search index of one markdown directory."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._load_counters()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def commit(self):
+        # The counters live in memory between commits, saving two queries per document
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+            [("next_rowid", self.next_rowid), ("stale_rows", self.stale_rows)],
+        )
+        self.conn.commit()
+
+    def _load_counters(self):
+        meta = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        self.next_rowid = meta.get("next_rowid", 0)
+        self.stale_rows = meta.get("stale_rows", 0)
+
+    def add(self, path: Path, text: str, content_hash: Optional[str] = None):
+        """Index (or re-index) one markdown file from its text."""
+        path = Path(path)
+        stat = path.stat()
+        fields, specs = parse_document(text)
+
+        self.remove(path.name)
+        self.next_rowid += 1
+        text_rowid = self.next_rowid
+
+        self.conn.execute("INSERT INTO document_text(rowid, body) VALUES (?, ?)", (text_rowid, text))
+        self.conn.execute(
+            "INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                path.name,
+                fields.get("Product Number") or path.stem.split("_")[0],
+                fields.get("Category"),
+                fields.get("Serial Number"),
+                content_hash or hash_text(text),
+                stat.st_mtime_ns,
+                stat.st_size,
+                text_rowid,
+            ),
+        )
+        self.conn.executemany(
+            "INSERT INTO specs(file, name, value) VALUES (?, ?, ?)",
+            [(path.name, name, value) for name, value in specs],
+        )
+
+    def remove(self, file_name: str) -> bool:
+        """Drop one document; its text row becomes stale. Returns whether it was indexed."""
+        deleted = self.conn.execute("DELETE FROM documents WHERE file = ?", (file_name,)).rowcount
+        if deleted:
+            self.conn.execute("DELETE FROM specs WHERE file = ?", (file_name,))
+            self.stale_rows += 1
+        return bool(deleted)
+
+    def update_files(self, markdown_dir: Path, names: Iterable[str]) -> tuple[int, int]:
+        """Re-index the named files if their content changed. Returns (indexed, removed)."""
+        markdown_dir = Path(markdown_dir)
+        indexed = removed = 0
+        for name in names:
+            path = markdown_dir / name
+            if not path.exists():
+                removed += self.remove(name)
+                continue
+            text = path.read_text(encoding='utf-8')
+            content_hash = hash_text(text)
+            row = self.conn.execute("SELECT hash FROM documents WHERE file = ?", (name,)).fetchone()
+            if row is not None and row["hash"] == content_hash:
+                stat = path.stat()
+                self.conn.execute(
+                    "UPDATE documents SET mtime_ns = ?, size = ? WHERE file = ?",
+                    (stat.st_mtime_ns, stat.st_size, name),
+                )
+                continue
+            self.add(path, text, content_hash)
+            indexed += 1
+        self.commit()
+        return indexed, removed
+
+    def sync(self, markdown_dir: Path, rebuild: bool = False) -> dict:
+        """Bring the index up to date with a markdown directory.
+
+        Files whose size and modification time match the index are skipped
+        without being read. The text index is rebuilt when asked to, or when
+        stale rows outnumber the live documents.
+        """
+        markdown_dir = Path(markdown_dir)
+        start_time = time.perf_counter()
+        known = {
+            row["file"]: (row["mtime_ns"], row["size"])
+            for row in self.conn.execute("SELECT file, mtime_ns, size FROM documents")
+        }
+
+        changed = []
+        present = set()
+        for path in markdown_dir.glob("*.md"):
+            present.add(path.name)
+            stat = path.stat()
+            if rebuild or known.get(path.name) != (stat.st_mtime_ns, stat.st_size):
+                changed.append(path.name)
+        deleted = [name for name in known if name not in present]
+
+        rebuilt = rebuild or self.stale_rows > max(1000, len(present))
+        if rebuilt:
+            self._drop_text_index()
+            changed, deleted = sorted(present), [name for name in known if name not in present]
+
+        indexed, removed = self.update_files(markdown_dir, changed + deleted)
+        if rebuilt:
+            removed = len(deleted)
+        return {
+            "documents": len(present),
+            "indexed": indexed,
+            "removed": removed,
+            "seconds": time.perf_counter() - start_time,
+        }
+
+    def _drop_text_index(self):
+        self.conn.execute("DROP TABLE document_text")
+        self.conn.execute("DELETE FROM documents")
+        self.conn.execute("DELETE FROM specs")
+        self.conn.execute("DELETE FROM meta")
+        self.conn.executescript(SCHEMA)
+        self._load_counters()
+
+    def search(self, text: Optional[str] = None, product_number: Optional[str] = None,
+               category: Optional[str] = None, specs: Iterable[tuple[Optional[str], str]] = (),
+               limit: int = 20) -> tuple[int, list[sqlite3.Row]]:
+        """Return (total matches, first limit documents) matching every given condition.
+
+        text uses FTS5 query syntax: words must all appear, "quoted phrases"
+        match in order, and OR / NOT combine terms.
+        """
+        conditions, params = [], []
+        if product_number:
+            conditions.append("d.product_number = ?")
+            params.append(product_number)
+        if category:
+            conditions.append("d.category = ?")
+            params.append(category)
+        for name, value in specs:
+            if name:
+                conditions.append("d.file IN (SELECT file FROM specs WHERE name = ? AND value = ?)")
+                params += [name, value]
+            else:
+                conditions.append("d.file IN (SELECT file FROM specs WHERE value = ?)")
+                params.append(value)
+        if text:
+            conditions.append("d.text_rowid IN (SELECT rowid FROM document_text WHERE document_text MATCH ?)")
+            params.append(text)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM documents d {where}", params).fetchone()[0]
+            rows = self.conn.execute(
+                f"SELECT d.product_number, d.category, d.file FROM documents d {where} "
+                f"ORDER BY d.product_number LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid query: {e}") from None
+        return total, rows
+
+    def specs_of(self, file_name: str) -> list[tuple[str, str]]:
+        """Return the indexed specification rows of one document."""
+        return [
+            (row["name"], row["value"])
+            for row in self.conn.execute("SELECT name, value FROM specs WHERE file = ? ORDER BY rowid", (file_name,))
+        ]
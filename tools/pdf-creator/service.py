@@ -0,0 +1,220 @@
+"""
+PDF Creator - Warm Conversion Service
+
+A long-lived local HTTP service that keeps WeasyPrint, the discovered fonts
+and the compiled stylesheet loaded between jobs, so each conversion only pays
+for layout. A thin client sends markdown files to it.
+
+    python service.py serve --port 8765 --output-dir pdf_output
+    python service.py convert markdown_output/PRD12345_specification.md
+
+API (JSON in, localhost only by default):
+    GET  /health   -> {"status": "ok", "jobs": 12}
+    POST /convert  {"markdown": "..."}                       -> application/pdf bytes
+    POST /convert  {"markdown": "...", "output": "a.pdf"}    -> {"output": "/.../pdf_output/a.pdf", "seconds": 0.41}
+
+An "output" path is resolved against the service's output directory, and a
+path outside that directory is rejected with 400.
+"""
+
+import json
+import time
+import argparse
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+import main
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    """Handle conversion jobs one at a time in the warm server process."""
+
+    jobs = 0
+    output_dir = Path(main.PDF_OUTPUT_DIR).resolve()
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "jobs": ConversionHandler.jobs})
+        else:
+            self._send_json(404, {"error": f"Unknown path '{self.path}'"})
+
+    def do_POST(self):
+        if self.path != "/convert":
+            self._send_json(404, {"error": f"Unknown path '{self.path}'"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length))
+            md_content = job["markdown"]
+            output = job.get("output")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self._send_json(400, {"error": "Expected a JSON body with a 'markdown' field"})
+            return
+
+        output_path = None
+        if output:
+            try:
+                output_path = (self.output_dir / output).resolve()
+            except (TypeError, ValueError, OSError):
+                output_path = None
+            if output_path is None or not output_path.parent.is_relative_to(self.output_dir):
+                self._send_json(400, {"error": f"Output must be a file under '{self.output_dir}'"})
+                return
+
+        start_time = time.perf_counter()
+        try:
+            if output_path is not None:
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                main.write_pdf_from_markdown(md_content, str(output_path))
+                pdf_bytes = None
+            else:
+                pdf_bytes = main.render_pdf_bytes(md_content)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        elapsed = time.perf_counter() - start_time
+        ConversionHandler.jobs += 1
+
+        if pdf_bytes is None:
+            self._send_json(200, {"output": str(output_path), "seconds": elapsed})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(pdf_bytes)))
+        self.send_header("X-Render-Seconds", f"{elapsed:.4f}")
+        self.end_headers()
+        self.wfile.write(pdf_bytes)
+
+
+def warm_up():
+    """Load fonts and the stylesheet and lay out one document before serving."""
+    start_time = time.perf_counter()
+    main.get_render_resources()
+    main.render_pdf_bytes("# Warm-up\n\n| Field | Value |\n|---|---|\n| a | b |\n")
+    return time.perf_counter() - start_time
+
+
+def serve(host: str, port: int, pdf_profile: str = main.DEFAULT_PDF_PROFILE,
+          output_dir: Path = Path(main.PDF_OUTPUT_DIR)):
+    """Run the conversion service until interrupted; jobs may only write under output_dir."""
+    ConversionHandler.output_dir = Path(output_dir).resolve()
+    main.use_pdf_profile(pdf_profile)
+    print(f"Warming up renderer ('{pdf_profile}' PDF profile)...")
+    print(f"  ✓ Ready in {warm_up():.2f}s")
+
+    # Jobs are handled sequentially: one warm renderer per service process
+    server = HTTPServer((host, port), ConversionHandler)
+    print(f"Listening on http://{host}:{port}, writing under '{ConversionHandler.output_dir}' (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping conversion service.")
+    finally:
+        server.server_close()
+
+
+def error_message(error: urllib.error.HTTPError) -> str:
+    """Return the service's error text, or the HTTP reason for a non-JSON body (e.g. from a proxy)."""
+    try:
+        return json.loads(error.read())["error"]
+    except (ValueError, KeyError, TypeError, OSError):
+        return str(error.reason)
+
+
+def convert_files(files: list[Path], output_dir: Path, url: str, server_writes: bool) -> int:
+    """Send markdown files to the service and return the number of failures."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    failed = 0
+
+    for md_file in files:
+        pdf_path = output_dir / f"{md_file.stem}.pdf"
+        job = {"markdown": md_file.read_text(encoding='utf-8')}
+        if server_writes:
+            job["output"] = str(pdf_path.resolve())
+
+        request = urllib.request.Request(
+            f"{url}/convert",
+            data=json.dumps(job).encode('utf-8'),
+            headers={"Content-Type": "application/json"},
+        )
+        start_time = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                body = response.read()
+                if not server_writes:
+                    pdf_path.write_bytes(body)
+        except urllib.error.HTTPError as e:
+            failed += 1
+            print(f"  ✗ Error converting {md_file.name}: {error_message(e)}")
+            continue
+        except urllib.error.URLError as e:
+            print(f"  ✗ Cannot reach conversion service at {url}: {e.reason}")
+            return failed + 1
+        elapsed = time.perf_counter() - start_time
+        print(f"  ✓ Converted: {md_file.name} → {pdf_path.name} ({elapsed * 1000:.0f} ms)")
+
+    return failed
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="PDF Creator warm conversion service")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    srv = subparsers.add_parser("serve", help="Run the conversion service")
+    srv.add_argument("--host", default=DEFAULT_HOST, help=f"Address to bind (default: {DEFAULT_HOST})")
+    srv.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    srv.add_argument(
+        "--pdf-profile",
+        choices=main.PDF_PROFILES,
+        default=main.DEFAULT_PDF_PROFILE,
+        help=f"Output size/speed profile (default: {main.DEFAULT_PDF_PROFILE})",
+    )
+    srv.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path(main.PDF_OUTPUT_DIR),
+        help=f"Only directory jobs may write PDFs under (default: {main.PDF_OUTPUT_DIR})",
+    )
+
+    conv = subparsers.add_parser("convert", help="Convert markdown files using a running service")
+    conv.add_argument("files", nargs="+", type=Path, help="Markdown files to convert")
+    conv.add_argument("--output-dir", type=Path, default=Path(main.PDF_OUTPUT_DIR), help="Directory for PDF files")
+    conv.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", help="Service URL")
+    conv.add_argument(
+        "--server-writes",
+        action="store_true",
+        help="Let the service write the PDFs to the output paths instead of returning bytes",
+    )
+
+    return parser.parse_args()
+
+
+def main_cli():
+    """Entry point for the service command line."""
+    args = parse_args()
+    if args.command == "serve":
+        serve(args.host, args.port, args.pdf_profile, args.output_dir)
+    elif args.command == "convert":
+        failed = convert_files(args.files, args.output_dir, args.url.rstrip("/"), args.server_writes)
+        raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
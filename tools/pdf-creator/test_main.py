@@ -0,0 +1,235 @@
+"""Tests for pdf-creator. Run with: python -m unittest test_main"""
+
+import io
+import os
+import signal
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import main
+from pool import RecyclingPool, WorkerDiedError
+from search_index import INDEX_FILENAME, SearchIndex
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+def worker_pid() -> int:
+    return os.getpid()
+
+
+def crash():
+    os._exit(3)
+
+
+def fake_convert(markdown_file: str, output_dir: str, profile: bool = False) -> tuple[str, dict]:
+    """Stand in for the WeasyPrint conversion, which the tests do not need."""
+    pdf_path = Path(output_dir) / f"{Path(markdown_file).stem}.pdf"
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    pdf_path.write_bytes(Path(markdown_file).read_bytes())
+    return str(pdf_path), {"total_s": 0.0}
+
+
+def render_whole(md_content: str) -> str:
+    """Convert markdown in one pass, as before the fragment cache existed."""
+    import markdown
+    return markdown.markdown(md_content, extensions=['tables', 'fenced_code', 'toc', 'attr_list'])
+
+
+def render_fragments(md_content: str) -> str:
+    """Convert markdown section by section, as render_markdown_to_html does."""
+    return "\n<hr />\n".join(main.render_fragment_html(fragment)
+                             for fragment in main.split_markdown_fragments(md_content))
+
+
+class FragmentRenderingTests(unittest.TestCase):
+    def assertRendersLikeWholeDocument(self, md_content: str):
+        self.assertEqual(render_fragments(md_content), render_whole(md_content))
+
+    def test_product_documents(self):
+        table = main.sample_product_table(5, seed=7)
+        numbers = main.ProductNumberAllocator(7).allocate(5)
+        for position, number in enumerate(numbers):
+            md_content = "".join(main.iter_product_sections(table.record(position, number)))
+            self.assertGreater(len(main.split_markdown_fragments(md_content)), 1)
+            self.assertRendersLikeWholeDocument(md_content)
+
+    def test_reference_links_across_sections(self):
+        self.assertRendersLikeWholeDocument(
+            "# Manual\n\nSee the [datasheet][ds].\n\n---\n\n[ds]: https://example.com/ds.pdf\n"
+        )
+
+    def test_footnotes_across_sections(self):
+        self.assertRendersLikeWholeDocument("Rated load[^1].\n\n---\n\n[^1]: At 25 degrees.\n")
+
+    def test_repeated_headings_across_sections(self):
+        self.assertRendersLikeWholeDocument("## Notes\n\nFirst.\n\n---\n\n## Notes\n\nSecond.\n")
+        self.assertRendersLikeWholeDocument("Notes\n=====\n\nFirst.\n\n---\n\n## Notes\n\nSecond.\n")
+
+    def test_rule_inside_code_block_is_not_a_separator(self):
+        md_content = "# Config\n\n```\na\n\n---\nb\n```\n"
+        self.assertEqual(main.split_markdown_fragments(md_content), [md_content])
+        self.assertRendersLikeWholeDocument(md_content)
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+
+    def generate(self, directory: str, count: int, shard: tuple[int, int] = (0, 1), index: bool = False) -> Path:
+        output_dir = self.temp_dir / directory
+        with redirect_stdout(io.StringIO()):
+            main.create_markdown_files(count, seed=11, output_dir=str(output_dir), shard=shard, index=index)
+        return output_dir
+
+
+class ProductNumberTests(unittest.TestCase):
+    def test_numbers_are_unique(self):
+        numbers = list(main.ProductNumberAllocator(3).allocate(20000))
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertTrue(all(main.PRODUCT_NUMBER_PATTERN.fullmatch(number) for number in numbers))
+
+    def test_shards_are_disjoint_and_cover_the_single_node_numbers(self):
+        whole = list(main.ProductNumberAllocator(3).allocate(3000))
+        shards = [set(main.ProductNumberAllocator(3, index, 3).allocate(1000)) for index in range(3)]
+        self.assertFalse(shards[0] & shards[1] or shards[0] & shards[2] or shards[1] & shards[2])
+        self.assertEqual(set().union(*shards), set(whole))
+
+    def test_same_seed_gives_the_same_numbers(self):
+        self.assertEqual(list(main.ProductNumberAllocator(5).allocate(10)),
+                         list(main.ProductNumberAllocator(5).allocate(10)))
+        self.assertNotEqual(list(main.ProductNumberAllocator(5).allocate(10)),
+                            list(main.ProductNumberAllocator(6).allocate(10)))
+
+
+class SamplingTests(unittest.TestCase):
+    def test_distinct_draws_from_small_and_large_populations(self):
+        import numpy as np
+        rng = np.random.default_rng(1)
+        for population in (7, 10, 500):
+            draws = main._sample_distinct(rng, 2000, population, 7)
+            self.assertEqual(draws.shape, (2000, 7))
+            self.assertTrue(((draws >= 0) & (draws < population)).all())
+            self.assertTrue(all(len(set(row)) == 7 for row in draws.tolist()))
+
+
+class ShardedGenerationTests(TempDirTestCase):
+    def test_union_of_shards_is_the_single_node_catalog(self):
+        whole = self.generate("whole", 12)
+        shard_files = {}
+        for index in range(3):
+            for path in self.generate(f"shard-{index}", 12, (index, 3)).glob("*.md"):
+                self.assertNotIn(path.name, shard_files)
+                shard_files[path.name] = path.read_text(encoding="utf-8")
+        whole_files = {path.name: path.read_text(encoding="utf-8") for path in whole.glob("*.md")}
+        self.assertEqual(len(whole_files), 12)
+        self.assertEqual(shard_files, whole_files)
+
+
+class SearchIndexTests(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.markdown_dir = self.generate("md", 6, index=True)
+        self.files = sorted(self.markdown_dir.glob("*.md"))
+
+    def open_index(self) -> SearchIndex:
+        search_index = SearchIndex(self.markdown_dir / INDEX_FILENAME)
+        self.addCleanup(search_index.close)
+        return search_index
+
+    def test_generated_documents_are_indexed(self):
+        search_index = self.open_index()
+        self.assertEqual(search_index.search()[0], 6)
+        product_number = self.files[0].name.split("_")[0]
+        total, rows = search_index.search(product_number=product_number)
+        self.assertEqual((total, rows[0]["file"]), (1, self.files[0].name))
+        self.assertTrue(search_index.specs_of(self.files[0].name))
+        self.assertEqual(search_index.sync(self.markdown_dir)["indexed"], 0)
+
+    def test_sync_follows_edits_and_deletions(self):
+        edited, deleted = self.files[0], self.files[1]
+        edited.write_text(edited.read_text(encoding="utf-8") + "\nMentions xylophone.\n", encoding="utf-8")
+        deleted.unlink()
+        search_index = self.open_index()
+        stats = search_index.sync(self.markdown_dir)
+        self.assertEqual((stats["documents"], stats["indexed"], stats["removed"]), (5, 1, 1))
+        total, rows = search_index.search("xylophone")
+        self.assertEqual((total, rows[0]["file"]), (1, edited.name))
+        self.assertEqual(search_index.search(product_number=deleted.name.split("_")[0])[0], 0)
+
+    def test_rebuild_reindexes_every_file(self):
+        search_index = self.open_index()
+        stats = search_index.sync(self.markdown_dir, rebuild=True)
+        self.assertEqual((stats["documents"], stats["indexed"], stats["removed"]), (6, 6, 0))
+        self.assertEqual(search_index.search()[0], 6)
+
+
+class ManifestTests(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.markdown_dir = self.generate("md", 3)
+        self.pdf_dir = self.temp_dir / "pdf"
+        patcher = mock.patch.object(main, "convert_markdown_to_pdf_timed", side_effect=fake_convert)
+        self.convert = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def convert_all(self, **kwargs) -> list[str]:
+        with redirect_stdout(io.StringIO()):
+            return main.convert_all_markdown_to_pdf(input_dir=str(self.markdown_dir), output_dir=str(self.pdf_dir), **kwargs)
+
+    def test_only_changed_files_are_converted_again(self):
+        self.assertEqual(len(self.convert_all()), 3)
+        self.assertEqual(self.convert_all(), [])
+        edited = sorted(self.markdown_dir.glob("*.md"))[0]
+        edited.write_text(edited.read_text(encoding="utf-8") + "\nEdited.\n", encoding="utf-8")
+        self.assertEqual([Path(path).stem for path in self.convert_all()], [edited.stem])
+        self.assertEqual(len(self.convert_all(force=True)), 3)
+
+    def test_pdfs_of_deleted_sources_are_removed(self):
+        self.convert_all()
+        deleted = sorted(self.markdown_dir.glob("*.md"))[0]
+        deleted.unlink()
+        self.convert_all()
+        self.assertEqual(len(list(self.pdf_dir.glob("*.pdf"))), 2)
+        self.assertFalse((self.pdf_dir / f"{deleted.stem}.pdf").exists())
+
+
+class RecyclingPoolTests(unittest.TestCase):
+    def test_workers_are_recycled_after_max_tasks(self):
+        with RecyclingPool(2, max_tasks_per_worker=2) as pool:
+            self.assertEqual(list(pool.map(square, range(10))), [value * value for value in range(10)])
+        self.assertGreaterEqual(len(pool.worker_stats), 5)
+        self.assertTrue(all(stats.documents <= 2 for stats in pool.worker_stats))
+        self.assertEqual(sum(stats.documents for stats in pool.worker_stats), 10)
+
+    def test_task_that_kills_its_worker_fails_after_retries(self):
+        with RecyclingPool(1, max_retries=2) as pool:
+            with self.assertRaises(WorkerDiedError):
+                pool.submit(crash).result(timeout=30)
+            # The pool keeps working with fresh workers
+            self.assertEqual(pool.submit(square, 4).result(timeout=30), 16)
+        self.assertEqual(pool.retried, 2)
+
+    def test_idle_worker_killed_between_tasks_is_replaced(self):
+        with RecyclingPool(1) as pool:
+            pid = pool.submit(worker_pid).result(timeout=30)
+            os.kill(pid, signal.SIGKILL)
+            pool._workers[0].process.join()
+            self.assertEqual(pool.submit(square, 5).result(timeout=30), 25)
+            self.assertNotEqual(pool.submit(worker_pid).result(timeout=30), pid)
+
+    def test_unpicklable_task_fails_only_its_own_future(self):
+        with RecyclingPool(1) as pool:
+            with self.assertRaises(Exception):
+                pool.submit(square, lambda: None).result(timeout=30)
+            self.assertEqual(pool.submit(square, 3).result(timeout=30), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
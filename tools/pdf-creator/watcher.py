@@ -0,0 +1,137 @@
+"""
+PDF Creator - Directory Watching
+
+Reports which files in one directory were created, edited or deleted. Linux
+inotify is used through ctypes when it is available, and other platforms
+fall back to polling modification times. Bursts of saves are debounced into
+a single batch of changed names.
+"""
+
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Optional
+
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Detect changes by comparing modification times and sizes between scans."""
+
+    kind = "polling"
+
+    def __init__(self, directory: Path, pattern: str = "*", interval: float = 0.5):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        for path in self.directory.glob(self.pattern):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read_changes(self, timeout: Optional[float]) -> set[str]:
+        """Return the names changed since the last call, waiting up to timeout seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self._scan()
+            changed = {
+                name for name in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(name) != self._snapshot.get(name)
+            }
+            self._snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            remaining = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            time.sleep(max(0.0, remaining))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Receive change events from the Linux kernel without scanning the directory."""
+
+    kind = "inotify"
+
+    def __init__(self, directory: Path, pattern: str = "*"):
+        self.directory = Path(directory)
+        self.pattern = pattern
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self._fd, os.fsencode(self.directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"Cannot watch '{self.directory}'")
+
+    def read_changes(self, timeout: Optional[float]) -> set[str]:
+        """Return the names changed since the last call, waiting up to timeout seconds."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        data = os.read(self._fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, so report every matching file
+                changed.update(path.name for path in self.directory.glob(self.pattern))
+            elif name and fnmatch(name, self.pattern):
+                changed.add(name)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def open_watcher(directory: Path, pattern: str = "*", interval: float = 0.5,
+                 polling: bool = False):
+    """Return an inotify watcher where supported, otherwise a polling watcher."""
+    if not polling and hasattr(select, "select") and os.name == "posix":
+        try:
+            return InotifyWatcher(directory, pattern)
+        except (OSError, AttributeError, TypeError):
+            # No inotify (macOS, BSD) or no libc symbol: fall back to polling
+            pass
+    return PollingWatcher(directory, pattern, interval)
+
+
+def wait_for_changes(watcher, debounce: float = 0.3) -> set[str]:
+    """Block until files change, then collect more until debounce seconds pass quietly."""
+    changed = watcher.read_changes(None)
+    while True:
+        more = watcher.read_changes(debounce)
+        if not more:
+            return changed
+        changed |= more